@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+"""
+psycopg2 vs psycopg (3) catch-up benchmark.
+
+Runs the database side of a catch-up (pull) once per driver against a live
+database and reports:
+
+    round trips    txid_current() round trips per second
+    pg_settings    the validate() settings read one by one vs pipelined
+    fetch          rows/s of the root sync query (server side cursor,
+                   binary format with psycopg)
+    slot           rows/s reading the replication slot (with --slot)
+
+Each driver runs in its own process as PG_DRIVER is read at import time.
+Nothing is written to Elasticsearch/OpenSearch or to the slot.
+
+Usage:
+    python benchmarks/drivers.py --config schema.json --slot <slot>
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+import typing as t
+
+import click
+
+DRIVERS: t.Tuple[str, ...] = ("psycopg2", "psycopg")
+SETTINGS: t.List[str] = [
+    "max_replication_slots",
+    "wal_level",
+    "rds.logical_replication",
+]
+
+
+def measure(doc: dict, slot: t.Optional[str], repeat: int) -> dict:
+    # imported here so that PG_DRIVER from the environment is honoured
+    from pgsync.base import Base
+    from pgsync.node import Tree
+    from pgsync.querybuilder import QueryBuilder
+
+    results: dict = {}
+    base: Base = Base(doc["database"])
+
+    since: float = time.perf_counter()
+    for _ in range(repeat):
+        base.txid_current
+    results["round trips"] = repeat / (time.perf_counter() - since)
+
+    since = time.perf_counter()
+    for _ in range(repeat):
+        for name in SETTINGS:
+            base.pg_settings(name)
+    results["pg_settings"] = repeat / (time.perf_counter() - since)
+
+    since = time.perf_counter()
+    for _ in range(repeat):
+        base.pg_settings_many(SETTINGS)
+    results["pg_settings (many)"] = repeat / (time.perf_counter() - since)
+
+    tree: Tree = Tree(
+        base.models, nodes=doc["nodes"], database=doc["database"]
+    )
+    query_builder: QueryBuilder = QueryBuilder()
+    query_builder.isouter = True
+    query_builder.from_obj = None
+    for node in tree.traverse_post_order():
+        node._subquery = None
+        node._filters = []
+        node.setup()
+        query_builder.build_queries(node)
+    since = time.perf_counter()
+    count: int = sum(1 for _ in base.fetchmany(node._subquery))
+    results["fetch"] = count / (time.perf_counter() - since)
+
+    if slot:
+        since = time.perf_counter()
+        count = sum(1 for _ in base.logical_slot_stream_changes(slot))
+        results["slot"] = count / (time.perf_counter() - since)
+
+    return results
+
+
+@click.command()
+@click.option(
+    "--config",
+    "-c",
+    help="Schema config",
+    type=click.Path(exists=True),
+    required=True,
+)
+@click.option("--slot", help="Replication slot to read (peek only).")
+@click.option(
+    "--repeat",
+    "-n",
+    default=200,
+    help="Number of round trips per measurement.",
+    type=int,
+)
+@click.option("--child", is_flag=True, hidden=True)
+def main(config: str, slot: t.Optional[str], repeat: int, child: bool) -> None:
+    with open(config) as fp:
+        doc: dict = json.load(fp)[0]
+
+    if child:
+        click.echo(json.dumps(measure(doc, slot, repeat)))
+        return
+
+    results: t.Dict[str, dict] = {}
+    for driver in DRIVERS:
+        args: t.List[str] = [
+            sys.executable,
+            __file__,
+            "--config",
+            config,
+            "--repeat",
+            str(repeat),
+            "--child",
+        ]
+        if slot:
+            args.extend(["--slot", slot])
+        output: str = subprocess.run(
+            args,
+            env={**os.environ, "PG_DRIVER": driver},
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results[driver] = json.loads(output.splitlines()[-1])
+
+    click.echo(f"{'':<20}" + "".join(f"{d:>14}" for d in DRIVERS))
+    for key in results[DRIVERS[0]]:
+        click.echo(
+            f"{key:<20}"
+            + "".join(f"{results[d][key]:>12.0f}/s" for d in DRIVERS)
+        )
+
+
+if __name__ == "__main__":
+    main()
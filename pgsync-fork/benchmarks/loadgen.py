@@ -0,0 +1,510 @@
+#!/usr/bin/env python
+
+"""
+Change stream load generator.
+
+Replays changes into a running pgsync at a target rate that steps up until
+the pipeline can no longer keep up, to size the producer and consumer. The
+changes are either synthetic changes to the museum dataset (see
+benchmarks/museum.py) with a mix of inserts, updates and deletes across the
+root and child tables, or a recording replayed in a loop:
+
+    *.jsonl     trigger notification payloads, one per line
+    *.txt       test_decoding WAL rows e.g benchmarks/data/test_decoding.txt
+
+and are sent to one of:
+
+    redis       the queue of the index in Redis/Valkey i.e load on the
+                consumer only (the notifications of synthetic changes refer
+                to existing rows of the dataset)
+    dml         INSERT/UPDATE/DELETE statements against the museum
+                database i.e load on the triggers, the producer and the
+                consumer. Each tick is a transaction. Only rows inserted by
+                the generator are deleted so no foreign key is violated
+                (a delete before any insert to the table is an update).
+
+Every step runs at its rate for --duration secs while the depth of the
+queue is sampled every second. The depth growing by more than --tolerance
+of the rate means the consumer (or with dml the producer) is saturated. The
+highest rate reached without the queue growing is reported as the
+sustainable throughput. With --metrics the notifications/s of the producer
+and the events/s resolved by the consumer are read from the metrics
+endpoint of the pgsync process as well.
+
+Usage:
+    python benchmarks/suite.py --config ../schema.json --scale 10000
+    python benchmarks/loadgen.py --config ../schema.json \\
+        --write-schema benchmark.json
+    python benchmarks/sink.py --port 9200 &
+    pgsync --config benchmark.json --daemon &
+    python benchmarks/loadgen.py --config ../schema.json --target dml \\
+        --rate 500 --step 500 --steps 10
+"""
+
+import datetime
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import typing as t
+import urllib.request
+
+import click
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import museum  # noqa: E402
+
+TG_OPS: t.Tuple[str, ...] = ("INSERT", "UPDATE", "DELETE")
+TABLES: t.Dict[str, sa.Table] = {
+    table.name: table for table in museum.metadata.sorted_tables
+}
+# the metrics read with --metrics
+NOTIFICATIONS: str = "pgsync_notifications_total"
+EVENTS_RESOLVED: str = "pgsync_events_resolved_total"
+# the width of each column of the report
+COLUMNS: t.Dict[str, int] = {
+    "rate": 10,
+    "sent/s": 10,
+    "depth": 10,
+    "growth/s": 10,
+    "producer/s": 12,
+    "consumer/s": 12,
+}
+# time between two batches of changes
+TICK: float = 0.05
+
+
+def parse_mix(value: str, keys: t.Iterable[str]) -> t.Dict[str, float]:
+    """Parse e.g UPDATE=8,DELETE=1 into the share of each key."""
+    mix: t.Dict[str, float] = {}
+    for item in value.split(","):
+        key, _, weight = item.partition("=")
+        if key not in keys:
+            raise click.BadParameter(f"Unknown {key}")
+        mix[key] = float(weight or 1)
+    return mix
+
+
+def queue_name(database: str, index: str) -> str:
+    """The name of the Redis/Valkey queue of an index (see Sync)."""
+    return re.sub("[^0-9a-zA-Z_]+", "", f"{database.lower()}_{index}")
+
+
+def row_key(item: dict) -> str:
+    """Sync._row_key of the museum tables (all keyed by id)."""
+    if item.get("tg_op") not in TG_OPS:
+        return ""
+    data: t.Optional[dict] = item.get(
+        "old" if item["tg_op"] == "DELETE" else "new"
+    )
+    if not data or data.get("id") is None:
+        return ""
+    return f"{item['schema']}.{item['table']}:{json.dumps([data['id']])}"
+
+
+def recorded(path: str, index: str) -> t.Iterator[dict]:
+    """Endlessly replay the notifications of a recording."""
+    from pgsync.base import Base
+
+    items: t.List[dict] = []
+    with open(path) as fp:
+        if path.endswith(".jsonl"):
+            items = [json.loads(line) for line in fp if line.strip()]
+        else:
+            parser: Base = Base.__new__(Base)
+            parser.verbose = False
+            xmin: t.Optional[int] = None
+            for line in fp:
+                line = line.rstrip("\n")
+                if line.startswith("BEGIN"):
+                    xmin = int(line.split()[1])
+                elif line.startswith("table "):
+                    payload: t.Any = parser.parse_logical_slot(line)
+                    items.append(
+                        {
+                            "xmin": xmin,
+                            "new": payload.new or None,
+                            "old": payload.old or None,
+                            "tg_op": payload.tg_op,
+                            "table": payload.table,
+                            "schema": payload.schema,
+                        }
+                    )
+    if not items:
+        raise click.BadParameter(f"No changes in {path}")
+    while True:
+        for item in items:
+            yield {**item, "indices": [index]}
+
+
+class Changes(object):
+    """Synthetic changes to the museum dataset."""
+
+    def __init__(
+        self,
+        scale: int,
+        images: float,
+        seed: int,
+        tables: t.Dict[str, float],
+        ops: t.Dict[str, float],
+    ):
+        self.existing: t.Iterator[t.Tuple[str, dict]] = museum.changes(
+            scale, images, seed, tables
+        )
+        self.ops: t.List[str] = [op for op in ops if ops[op] > 0]
+        self.weights: t.List[float] = [ops[op] for op in self.ops]
+        self.rng: random.Random = random.Random(seed + 3)
+
+    def __iter__(self) -> t.Iterator[t.Tuple[str, str, dict]]:
+        """(tg_op, table, row) of existing rows of the dataset."""
+        while True:
+            table, row = next(self.existing)
+            yield self.rng.choices(self.ops, self.weights)[0], table, row
+
+
+class Dml(object):
+    """Apply synthetic changes to the museum database."""
+
+    def __init__(self, database: str, changes: Changes):
+        from pgsync.base import Base
+
+        self.changes: t.Iterator[t.Tuple[str, str, dict]] = iter(changes)
+        self.rng: random.Random = changes.rng
+        self.engine: sa.engine.Engine = Base(database).engine
+        with self.engine.connect() as conn:
+            self.ids: t.Dict[str, int] = {
+                name: conn.execute(
+                    sa.select(sa.func.COALESCE(sa.func.MAX(table.c.id), 0))
+                ).scalar()
+                for name, table in TABLES.items()
+            }
+        # the rows inserted by the generator that can be deleted
+        self.inserted: t.Dict[str, t.List[int]] = {name: [] for name in TABLES}
+
+    def close(self) -> None:
+        self.engine.dispose()
+
+    def _row(self, table: str, owner: int) -> dict:
+        self.ids[table] += 1
+        i: int = self.ids[table]
+        now: datetime.datetime = datetime.datetime.now()
+        row: dict = {"id": i, "ThoiGianTao": now, "ThoiGianCapNhat": now}
+        if table == "HoSo":
+            row.update(
+                HoatDong=1,
+                TrangThai=self.rng.choice(museum.STATES),
+                LoaiHoSo="HienVat",
+            )
+        elif table == "ChiTietHienVat":
+            # HoSoId is unique so an artifact is not attached to a HoSo
+            row.update(
+                TenHienVat=f"Hiện vật {i}",
+                TenHeThong=f"hien-vat-{i}",
+                SoDangKy=f"LOAD-{i:08d}",
+            )
+        elif table == "HinhAnhHienVat":
+            row.update(TenHinhAnh=f"Ảnh {i}", ChiTietHienVatId=owner)
+        else:
+            row.update(
+                TenTep=f"anh-{i}.jpg",
+                LoaiTep="jpg",
+                Khoa=f"load/{i}.jpg",
+                DuongDan=f"/uploads/load/{i}.jpg",
+                LoaiMime="image/jpeg",
+            )
+        return row
+
+    def send(self, count: int) -> None:
+        with self.engine.begin() as conn:
+            for _ in range(count):
+                tg_op, name, row = next(self.changes)
+                table: sa.Table = TABLES[name]
+                if tg_op == "DELETE" and self.inserted[name]:
+                    i: int = self.inserted[name].pop()
+                    conn.execute(table.delete().where(table.c.id == i))
+                elif tg_op == "INSERT":
+                    values: dict = self._row(name, row.get("ChiTietHienVatId"))
+                    conn.execute(table.insert().values(**values))
+                    self.inserted[name].append(values["id"])
+                else:
+                    conn.execute(
+                        table.update()
+                        .where(table.c.id == row["id"])
+                        .values(ThoiGianCapNhat=sa.func.NOW())
+                    )
+
+
+class Redis(object):
+    """Push the notifications of changes onto the queue of the index."""
+
+    def __init__(
+        self,
+        database: str,
+        index: str,
+        items: t.Iterator[dict],
+    ):
+        from pgsync import settings
+        from pgsync.base import Base
+        from pgsync.redisqueue import CoalescingRedisQueue, RedisQueue
+
+        name: str = queue_name(database, index)
+        self.queue: RedisQueue = (
+            CoalescingRedisQueue(name, row_key=row_key)
+            if settings.REDIS_COALESCE
+            else RedisQueue(name)
+        )
+        self.items: t.Iterator[dict] = items
+        # the items must be visible in the snapshot of the consumer
+        self.xmin: int = Base(database).txid_current
+
+    def send(self, count: int) -> None:
+        items: t.List[dict] = []
+        for _ in range(count):
+            item: dict = next(self.items)
+            if item.get("xmin") is None:
+                item["xmin"] = self.xmin
+            items.append(item)
+        self.queue.push(items)
+
+    def close(self) -> None:
+        pass
+
+
+def scrape(url: str, index: str) -> t.Dict[str, float]:
+    """The totals of the metrics of an index from a metrics endpoint."""
+    totals: t.Dict[str, float] = {NOTIFICATIONS: 0, EVENTS_RESOLVED: 0}
+    with urllib.request.urlopen(url, timeout=5) as response:
+        for line in response.read().decode().splitlines():
+            name, _, rest = line.partition("{")
+            if name in totals and f'index="{index}"' in rest:
+                totals[name] += float(rest.rsplit(" ", 1)[1])
+    return totals
+
+
+def slope(samples: t.List[t.Tuple[float, int]]) -> float:
+    """Least squares growth per second of the queue depth samples."""
+    if len(samples) < 2:
+        return 0.0
+    n: int = len(samples)
+    mean_x: float = sum(x for x, _ in samples) / n
+    mean_y: float = sum(y for _, y in samples) / n
+    var: float = sum((x - mean_x) ** 2 for x, _ in samples)
+    if not var:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in samples) / var
+
+
+def step(
+    target: t.Any,
+    depth: t.Callable[[], int],
+    rate: float,
+    duration: float,
+    metrics: t.Optional[t.Callable[[], t.Dict[str, float]]],
+) -> dict:
+    """Send changes at rate for duration and sample the queue depth."""
+    samples: t.List[t.Tuple[float, int]] = []
+    stop: threading.Event = threading.Event()
+    since: float = time.perf_counter()
+
+    def sample() -> None:
+        while not stop.wait(1):
+            samples.append((time.perf_counter() - since, depth()))
+
+    sampler: threading.Thread = threading.Thread(target=sample, daemon=True)
+    before: t.Optional[t.Dict[str, float]] = metrics() if metrics else None
+    samples.append((0.0, depth()))
+    sampler.start()
+    sent: int = 0
+    while True:
+        elapsed: float = time.perf_counter() - since
+        if elapsed >= duration:
+            break
+        # catch up with the schedule if a batch took longer than a tick
+        count: int = int(rate * elapsed) - sent
+        if count > 0:
+            target.send(count)
+            sent += count
+        time.sleep(max(0.0, TICK - (time.perf_counter() - since - elapsed)))
+    elapsed = time.perf_counter() - since
+    stop.set()
+    sampler.join()
+    samples.append((elapsed, depth()))
+    results: dict = {
+        "rate": rate,
+        "sent/s": sent / elapsed,
+        "depth": samples[-1][1],
+        "growth/s": slope(samples),
+    }
+    if metrics:
+        after: t.Dict[str, float] = metrics()
+        results["producer/s"] = (
+            after[NOTIFICATIONS] - before[NOTIFICATIONS]
+        ) / elapsed
+        results["consumer/s"] = (
+            after[EVENTS_RESOLVED] - before[EVENTS_RESOLVED]
+        ) / elapsed
+    return results
+
+
+@click.command()
+@click.option(
+    "--config",
+    "-c",
+    help="Schema config (the cmm-search-artifact schema is used)",
+    type=click.Path(exists=True),
+    required=True,
+)
+@click.option(
+    "--database",
+    default="pgsync_benchmark",
+    help="Database of the dataset (see suite.py).",
+)
+@click.option(
+    "--write-schema",
+    help="Write the schema config of the benchmark index and exit.",
+    type=click.Path(),
+)
+@click.option(
+    "--target",
+    type=click.Choice(["redis", "dml"]),
+    default="redis",
+    help="Push notifications to Redis/Valkey or run DML.",
+)
+@click.option(
+    "--replay",
+    help="Notifications (.jsonl) or test_decoding rows to replay.",
+    type=click.Path(exists=True),
+)
+@click.option("--scale", default=10000, help="Number of HoSo.", type=int)
+@click.option(
+    "--images",
+    default=4.0,
+    help="Mean number of images per artifact.",
+    type=float,
+)
+@click.option("--seed", default=1, help="Dataset seed.", type=int)
+@click.option(
+    "--mix",
+    default="HoSo=1,ChiTietHienVat=3,HinhAnhHienVat=2,Tep=2",
+    help="Share of the changes per table.",
+)
+@click.option(
+    "--ops",
+    default="INSERT=1,UPDATE=8,DELETE=1",
+    help="Share of the changes per operation.",
+)
+@click.option(
+    "--rate", default=100.0, help="Changes/s of the first step.", type=float
+)
+@click.option(
+    "--step",
+    "increment",
+    default=100.0,
+    help="Changes/s added at each step.",
+    type=float,
+)
+@click.option("--steps", default=10, help="Number of steps.", type=int)
+@click.option("--duration", default=30.0, help="Secs per step.", type=float)
+@click.option(
+    "--tolerance",
+    default=0.02,
+    help="Queue growth as a share of the rate that means saturated.",
+    type=float,
+)
+@click.option(
+    "--metrics",
+    help="Metrics endpoint of pgsync e.g http://localhost:9100/metrics",
+)
+def main(
+    config: str,
+    database: str,
+    write_schema: t.Optional[str],
+    target: str,
+    replay: t.Optional[str],
+    scale: int,
+    images: float,
+    seed: int,
+    mix: str,
+    ops: str,
+    rate: float,
+    increment: float,
+    steps: int,
+    duration: float,
+    tolerance: float,
+    metrics: t.Optional[str],
+) -> None:
+    doc: dict = museum.schema(config, database)
+    if write_schema:
+        with open(write_schema, "w") as fp:
+            json.dump([doc], fp, indent=2, ensure_ascii=False)
+        click.echo(f"Schema of {doc['index']} written to {write_schema}")
+        return
+
+    from pgsync.redisqueue import RedisQueue
+
+    changes: Changes = Changes(
+        scale,
+        images,
+        seed,
+        parse_mix(mix, museum.ROW_KEYS),
+        parse_mix(ops, TG_OPS),
+    )
+    if target == "dml":
+        if replay:
+            raise click.BadParameter("--replay is only sent to redis")
+        sender: t.Any = Dml(database, changes)
+    else:
+        items: t.Iterator[dict] = (
+            recorded(replay, doc["index"])
+            if replay
+            else (
+                museum.notification(tg_op, table, row, doc["index"], None)
+                for tg_op, table, row in changes
+            )
+        )
+        sender = Redis(database, doc["index"], items)
+    # the depth of the queue of the index whichever way it is fed
+    queue: RedisQueue = RedisQueue(queue_name(database, doc["index"]))
+
+    click.echo(
+        "".join(
+            f"{key:>{width}}"
+            for key, width in COLUMNS.items()
+            if metrics or not key.endswith("er/s")
+        )
+    )
+    sustainable: float = 0.0
+    try:
+        for i in range(steps):
+            results: dict = step(
+                sender,
+                lambda: queue.qsize,
+                rate + i * increment,
+                duration,
+                (lambda: scrape(metrics, doc["index"])) if metrics else None,
+            )
+            saturated: bool = (
+                results["growth/s"] > tolerance * results["sent/s"]
+            )
+            click.echo(
+                "".join(
+                    f"{value:>{COLUMNS[key]}.1f}"
+                    for key, value in results.items()
+                )
+                + ("  saturated" if saturated else "")
+            )
+            if saturated:
+                break
+            sustainable = results["sent/s"]
+    finally:
+        sender.close()
+    click.echo(f"Sustainable throughput: {sustainable:.1f} changes/s")
+
+
+if __name__ == "__main__":
+    main()
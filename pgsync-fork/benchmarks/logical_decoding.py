@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+"""
+Logical decoding parser microbenchmark.
+
+Measures the rows/s of parsing a recorded WAL sample for the test_decoding
+and wal2json output plugins. The test_decoding sample is also parsed with
+the previous regex based parser as a baseline.
+
+The samples in benchmarks/data mirror the museum HoSo/ChiTietHienVat tables.
+To record your own sample run:
+
+    psql -Atc "SELECT data FROM PG_LOGICAL_SLOT_PEEK_CHANGES('<slot>', NULL, NULL)" > sample.txt
+
+Usage:
+    python benchmarks/logical_decoding.py --repeat 200
+"""
+
+import os
+import time
+import typing as t
+
+import click
+
+from pgsync.base import Base, Payload
+from pgsync.constants import LOGICAL_SLOT_PREFIX, LOGICAL_SLOT_SUFFIX
+from pgsync.utils import format_number
+
+DATA_DIR: str = os.path.join(os.path.dirname(__file__), "data")
+
+
+def legacy_parse_logical_slot(parser: Base, row: str) -> Payload:
+    """The regex based parser this benchmark is compared against."""
+    match = LOGICAL_SLOT_PREFIX.search(row)
+    payload: Payload = Payload(old=None, new=None, **match.groupdict())
+    suffix: str = f"{row[match.span()[1]:]} "
+    pos: int = 0
+    while True:
+        match = LOGICAL_SLOT_SUFFIX.search(suffix, pos)
+        if not match:
+            break
+        key: str = match.group("key").replace('"', "")
+        value: str = match.group("value")
+        type_: str = match.group("type").lower()
+        if value.lower() == "null":
+            value = None
+        elif type_ in parser.INT_TYPES:
+            value = int(value)
+        elif type_ in parser.CHAR_TYPES:
+            value = value.lstrip("'").rstrip("'")
+        elif type_ in parser.FLOAT_TYPES:
+            value = float(value)
+        payload.new[key] = value
+        pos = match.end()
+    return payload
+
+
+def run(
+    label: str,
+    func: t.Callable[[str], t.Optional[Payload]],
+    rows: t.List[str],
+    repeat: int,
+) -> None:
+    since: float = time.perf_counter()
+    for _ in range(repeat):
+        for row in rows:
+            func(row)
+    elapsed: float = time.perf_counter() - since
+    total: int = len(rows) * repeat
+    click.echo(
+        f"{label:<24} {format_number(total):>12} rows "
+        f"{elapsed:8.3f} secs {format_number(int(total / elapsed)):>12} rows/s"
+    )
+
+
+@click.command()
+@click.option(
+    "--test-decoding",
+    default=os.path.join(DATA_DIR, "test_decoding.txt"),
+    help="Recorded test_decoding sample (one row per line).",
+    type=click.Path(exists=True),
+)
+@click.option(
+    "--wal2json",
+    default=os.path.join(DATA_DIR, "wal2json.jsonl"),
+    help="Recorded wal2json format-version 2 sample (one row per line).",
+    type=click.Path(exists=True),
+)
+@click.option(
+    "--repeat",
+    "-n",
+    default=100,
+    help="Number of passes over each sample.",
+    type=int,
+)
+def main(test_decoding: str, wal2json: str, repeat: int) -> None:
+    # no database connection is needed to parse
+    parser: Base = Base.__new__(Base)
+    parser.verbose = False
+
+    with open(test_decoding) as fp:
+        rows: t.List[str] = [
+            row for row in fp.read().splitlines() if row.startswith("table ")
+        ]
+    run(
+        "test_decoding (regex)",
+        lambda row: legacy_parse_logical_slot(parser, row),
+        rows,
+        repeat,
+    )
+    run("test_decoding", parser.parse_logical_slot, rows, repeat)
+
+    with open(wal2json) as fp:
+        rows = fp.read().splitlines()
+    run("wal2json", parser.parse_wal2json, rows, repeat)
+
+
+if __name__ == "__main__":
+    main()
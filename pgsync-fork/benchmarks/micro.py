@@ -0,0 +1,394 @@
+#!/usr/bin/env python
+
+"""
+Microbenchmarks of the functions run per row or per event.
+
+Each function is a pyperf benchmark of its own over the same recorded
+sample so that an optimisation shows up as a speedup of that function:
+
+    parse_logical_slot      Base.parse_logical_slot of a test_decoding row
+    transform               Transform.transform of a root row
+    get_primary_keys        Transform.get_primary_keys of the _keys of a row
+    plugins                 Plugins.transform with SearchFilterPlugin
+    build_filters           QueryBuilder._build_filters of a chunk of roots
+    get_doc_id              Sync.get_doc_id of a root row
+    queue_encode            the json encoding of RedisQueue.push
+    queue_decode            the json decoding of RedisQueue.pop
+    coalesce_encode         CoalescingRedisQueue._args
+    coalesce_decode         CoalescingRedisQueue._decode
+
+The timings are per row (or per event) of the sample.
+
+The rows in benchmarks/data/museum_docs.jsonl are (keys, row, primary_keys)
+of the cmm-search-artifact root query as fetched by Base.fetchmany. The
+shipped sample mirrors the museum tables (benchmarks/museum.py). To record
+your own sample from a museum database run:
+
+    python benchmarks/micro.py --config ../schema.json --database <db> \\
+        --record benchmarks/data/museum_docs.jsonl
+
+Usage:
+    python benchmarks/micro.py -o before.json
+    python benchmarks/micro.py -o after.json
+    python -m pyperf compare_to before.json after.json --table
+
+pyperf runs the benchmarks in worker processes with a clean environment so
+settings that are not in .env have to be passed on with --copy-env (or
+--inherit-environ=PG_USER,...).
+
+The plugins benchmark imports the plugins package from the parent of the
+current directory (or PYTHONPATH) and is skipped if it is not importable.
+"""
+
+import copy
+import json
+import os
+import sys
+import time
+import typing as t
+
+import pyperf
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import museum  # noqa: E402
+
+DATA_DIR: str = os.path.join(os.path.dirname(__file__), "data")
+SAMPLE: str = os.path.join(DATA_DIR, "museum_docs.jsonl")
+PLUGINS: t.List[str] = ["SearchFilter"]
+
+
+def load(path: str) -> t.List[t.Tuple[t.Any, dict, list]]:
+    """The (keys, row, primary_keys) of a recorded sample."""
+    with open(path) as fp:
+        return [
+            (item["keys"], item["row"], item["primary_keys"])
+            for item in map(json.loads, fp)
+        ]
+
+
+def record(config: str, database: str, count: int, path: str) -> int:
+    """Record the first count rows of the root query of a database."""
+    from pgsync.base import Base
+    from pgsync.node import Tree
+    from pgsync.querybuilder import QueryBuilder
+
+    doc: dict = museum.schema(config, database)
+    base: Base = Base(doc["database"])
+    tree: Tree = Tree(base.models, nodes=doc["nodes"], database=database)
+    query_builder: QueryBuilder = QueryBuilder()
+    for node in tree.traverse_post_order():
+        node._subquery = None
+        node._filters = []
+        node.setup()
+        query_builder.build_queries(node)
+    n: int = 0
+    with open(path, "w") as fp:
+        for keys, row, primary_keys in base.fetchmany(
+            node._subquery.limit(count)
+        ):
+            fp.write(
+                json.dumps(
+                    {"keys": keys, "row": row, "primary_keys": primary_keys},
+                    ensure_ascii=False,
+                    default=str,
+                )
+                + "\n"
+            )
+            n += 1
+    return n
+
+
+def models(schema: str = "public") -> t.Callable[[str, str], sa.sql.Alias]:
+    """Base.models over the museum tables without a database."""
+    from pgsync.base import TupleIdentifierType
+
+    metadata: sa.MetaData = sa.MetaData()
+    aliases: t.Dict[str, sa.sql.Alias] = {}
+    for table in museum.metadata.sorted_tables:
+        model: sa.Table = table.to_metadata(metadata, schema=schema)
+        model.append_column(sa.Column("xmin", sa.BigInteger))
+        model.append_column(sa.Column("ctid", TupleIdentifierType))
+        model.append_column(sa.Column("oid", sa.dialects.postgresql.OID))
+        alias: sa.sql.Alias = model.alias()
+        setattr(
+            alias,
+            "primary_keys",
+            sorted([primary_key.key for primary_key in alias.primary_key]),
+        )
+        aliases[table.name] = alias
+    return lambda table, schema: aliases[table]
+
+
+def bench_parse_logical_slot(loops: int, rows: t.List[str]) -> float:
+    from pgsync.base import Base
+
+    parser: Base = Base.__new__(Base)
+    parser.verbose = False
+    since: float = time.perf_counter()
+    for _ in range(loops):
+        for row in rows:
+            parser.parse_logical_slot(row)
+    return time.perf_counter() - since
+
+
+def bench_transform(loops: int, docs: list, nodes: dict) -> float:
+    from pgsync.transform import Transform
+
+    since: float = time.perf_counter()
+    for _ in range(loops):
+        for _, row, _ in docs:
+            Transform.transform(row, nodes)
+    return time.perf_counter() - since
+
+
+def bench_get_primary_keys(loops: int, docs: list) -> float:
+    from pgsync.transform import Transform
+
+    since: float = time.perf_counter()
+    for _ in range(loops):
+        for keys, _, _ in docs:
+            Transform.get_primary_keys(keys)
+    return time.perf_counter() - since
+
+
+def bench_plugins(loops: int, docs: list, plugins: t.Any) -> float:
+    elapsed: float = 0
+    for _ in range(loops):
+        # the plugins replace the _source so each loop gets its own docs
+        actions: t.List[dict] = copy.deepcopy(docs)
+        since: float = time.perf_counter()
+        for _ in plugins.transform(actions):
+            pass
+        elapsed += time.perf_counter() - since
+    return elapsed
+
+
+def bench_build_filters(
+    loops: int, filters: t.List[dict], node: t.Any
+) -> float:
+    from pgsync.querybuilder import QueryBuilder
+
+    query_builder: QueryBuilder = QueryBuilder()
+    since: float = time.perf_counter()
+    for _ in range(loops):
+        for chunk in filters:
+            query_builder._build_filters(chunk, node)
+    return time.perf_counter() - since
+
+
+def bench_get_doc_id(loops: int, docs: list) -> float:
+    from pgsync.sync import Sync
+
+    sync: Sync = Sync.__new__(Sync)
+    since: float = time.perf_counter()
+    for _ in range(loops):
+        for _, _, primary_keys in docs:
+            sync.get_doc_id(primary_keys, "HoSo")
+    return time.perf_counter() - since
+
+
+def bench_queue_encode(loops: int, items: t.List[dict]) -> float:
+    since: float = time.perf_counter()
+    for _ in range(loops):
+        list(map(json.dumps, items))
+    return time.perf_counter() - since
+
+
+def bench_queue_decode(loops: int, values: t.List[bytes]) -> float:
+    since: float = time.perf_counter()
+    for _ in range(loops):
+        list(map(lambda value: json.loads(value), values))
+    return time.perf_counter() - since
+
+
+def bench_coalesce_encode(
+    loops: int, queue: t.Any, items: t.List[dict]
+) -> float:
+    since: float = time.perf_counter()
+    for _ in range(loops):
+        queue._args(items)
+    return time.perf_counter() - since
+
+
+def bench_coalesce_decode(
+    loops: int, queue: t.Any, values: t.List[bytes]
+) -> float:
+    since: float = time.perf_counter()
+    for _ in range(loops):
+        queue._decode(values)
+    return time.perf_counter() - since
+
+
+def add_cmdline_args(cmd: t.List[str], args: t.Any) -> None:
+    cmd.extend(["--config", args.config, "--sample", args.sample])
+
+
+def main() -> None:
+    runner: pyperf.Runner = pyperf.Runner(add_cmdline_args=add_cmdline_args)
+    runner.argparser.add_argument(
+        "--config",
+        default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "..",
+            "..",
+            "schema.json",
+        ),
+        help="Schema config (the cmm-search-artifact schema is used)",
+    )
+    runner.argparser.add_argument(
+        "--sample", default=SAMPLE, help="Recorded sample of root rows."
+    )
+    runner.argparser.add_argument(
+        "--database", help="Database to record the sample from."
+    )
+    runner.argparser.add_argument(
+        "--record", metavar="PATH", help="Record a sample and exit."
+    )
+    runner.argparser.add_argument(
+        "--count", default=200, type=int, help="Number of rows to record."
+    )
+    args: t.Any = runner.parse_args()
+
+    if args.record:
+        count: int = record(
+            args.config, args.database, args.count, args.record
+        )
+        print(f"Recorded {count} rows to {args.record}")
+        return
+
+    from pgsync.node import Tree
+    from pgsync.plugin import Plugins
+    from pgsync.redisqueue import CoalescingRedisQueue
+    from pgsync.transform import Transform
+
+    docs: list = load(args.sample)
+    doc: dict = museum.schema(args.config, "museum")
+
+    with open(os.path.join(DATA_DIR, "test_decoding.txt")) as fp:
+        rows: t.List[str] = [
+            line.rstrip("\n") for line in fp if line.startswith("table ")
+        ]
+    # inner_loops reports the time per row (or event) of the sample
+    runner.bench_time_func(
+        "parse_logical_slot",
+        bench_parse_logical_slot,
+        rows,
+        inner_loops=len(rows),
+    )
+    runner.bench_time_func(
+        "transform",
+        bench_transform,
+        docs,
+        doc["nodes"],
+        inner_loops=len(docs),
+    )
+    runner.bench_time_func(
+        "get_primary_keys",
+        bench_get_primary_keys,
+        docs,
+        inner_loops=len(docs),
+    )
+
+    sys.path.append(os.path.dirname(os.getcwd()))
+    try:
+        plugins: t.Optional[Plugins] = Plugins("plugins", PLUGINS)
+    except ImportError:
+        plugins = None
+    if plugins and plugins.plugins:
+        actions: t.List[dict] = [
+            {
+                "_id": str(primary_keys[0]),
+                "_index": doc["index"],
+                "_source": Transform.transform(row, doc["nodes"]),
+            }
+            for _, row, primary_keys in docs
+        ]
+        runner.bench_time_func(
+            "plugins",
+            bench_plugins,
+            actions,
+            plugins,
+            inner_loops=len(actions),
+        )
+
+    tree: Tree = Tree(models(), nodes=doc["nodes"], database="museum")
+    # the root docs of a batch of changes by FILTER_CHUNK_SIZE
+    filters: t.List[dict] = [
+        {
+            tree.root.table: [
+                {"id": primary_keys[0]}
+                for _, _, primary_keys in docs[i : i + 100]
+            ]
+        }
+        for i in range(0, len(docs), 100)
+    ]
+    runner.bench_time_func(
+        "build_filters",
+        bench_build_filters,
+        filters,
+        tree.root,
+        inner_loops=len(docs),
+    )
+    runner.bench_time_func(
+        "get_doc_id", bench_get_doc_id, docs, inner_loops=len(docs)
+    )
+
+    # the notifications of an update to every table of each doc
+    items: t.List[dict] = [
+        museum.notification(
+            "UPDATE",
+            table,
+            {
+                "id": primary_keys[0],
+                "HoSoId": primary_keys[0],
+                "ChiTietHienVatId": primary_keys[0],
+                "TepId": primary_keys[0],
+            },
+            doc["index"],
+            i,
+        )
+        for i, (_, _, primary_keys) in enumerate(docs)
+        for table in museum.ROW_KEYS
+    ]
+    runner.bench_time_func(
+        "queue_encode", bench_queue_encode, items, inner_loops=len(items)
+    )
+    runner.bench_time_func(
+        "queue_decode",
+        bench_queue_decode,
+        [json.dumps(item).encode() for item in items],
+        inner_loops=len(items),
+    )
+
+    queue: CoalescingRedisQueue = CoalescingRedisQueue.__new__(
+        CoalescingRedisQueue
+    )
+    queue.row_key = lambda item: (
+        f"{item['schema']}.{item['table']}:[{item['new']['id']}]"
+    )
+    values: list = queue._args(items)
+    runner.bench_time_func(
+        "coalesce_encode",
+        bench_coalesce_encode,
+        queue,
+        items,
+        inner_loops=len(items),
+    )
+    # the drained head, old, new and xmin of each item
+    runner.bench_time_func(
+        "coalesce_decode",
+        bench_coalesce_decode,
+        queue,
+        [
+            value.encode()
+            for i in range(0, len(values), 6)
+            for value in values[i + 2 : i + 6]
+        ],
+        inner_loops=len(items),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Synthetic museum dataset.
+
+The HoSo -> ChiTietHienVat -> HinhAnhHienVat -> Tep tables of the
+cmm-search-artifact index with the columns and foreign keys of the museum
+database, filled with seeded random rows so that every run at the same
+scale, images and seed builds the same data.
+
+    scale       number of HoSo (each with one ChiTietHienVat)
+    images      mean number of HinhAnhHienVat (each with its own Tep) per
+                artifact, drawn from a geometric distribution so a few
+                artifacts have many more images than the rest
+
+The ids are assigned in order so the rows (and the payloads of changes to
+them) can be derived from the layout without reading the database.
+"""
+
+import datetime
+import json
+import random
+import typing as t
+
+import sqlalchemy as sa
+
+INDEX: str = "cmm-search-artifact"
+CHUNK_SIZE: int = 5000
+
+metadata: sa.MetaData = sa.MetaData()
+
+HoSo: sa.Table = sa.Table(
+    "HoSo",
+    metadata,
+    sa.Column("id", sa.BigInteger, primary_key=True),
+    sa.Column("HoatDong", sa.Integer, nullable=False, default=1),
+    sa.Column("TrangThai", sa.String(255), nullable=False),
+    sa.Column("LoaiHoSo", sa.String(255), nullable=False),
+    sa.Column("GhiChu", sa.Text),
+    sa.Column("ThoiGianTao", sa.DateTime),
+    sa.Column("ThoiGianCapNhat", sa.DateTime),
+)
+Tep: sa.Table = sa.Table(
+    "Tep",
+    metadata,
+    sa.Column("id", sa.BigInteger, primary_key=True),
+    sa.Column("TenTep", sa.String(255), nullable=False),
+    sa.Column("LoaiTep", sa.String(255), nullable=False),
+    sa.Column("KichThuocTep", sa.BigInteger),
+    sa.Column("Khoa", sa.String(255), nullable=False),
+    sa.Column("DuongDan", sa.String(2000), nullable=False),
+    sa.Column("LoaiMime", sa.String(255), nullable=False),
+    sa.Column("ThoiGianTao", sa.DateTime),
+    sa.Column("ThoiGianCapNhat", sa.DateTime),
+)
+ChiTietHienVat: sa.Table = sa.Table(
+    "ChiTietHienVat",
+    metadata,
+    sa.Column("id", sa.BigInteger, primary_key=True),
+    sa.Column("TenHienVat", sa.String(255), nullable=False),
+    sa.Column("TenHeThong", sa.String(255), nullable=False),
+    sa.Column("SoDangKy", sa.String(255), nullable=False),
+    sa.Column("LoaiHienVatId", sa.BigInteger),
+    sa.Column("ChatLieu", sa.String(255)),
+    sa.Column("MieuTa", sa.Text),
+    sa.Column("HoSoId", sa.BigInteger, sa.ForeignKey("HoSo.id"), unique=True),
+    sa.Column("ThoiGianTao", sa.DateTime),
+    sa.Column("ThoiGianCapNhat", sa.DateTime),
+)
+HinhAnhHienVat: sa.Table = sa.Table(
+    "HinhAnhHienVat",
+    metadata,
+    sa.Column("id", sa.BigInteger, primary_key=True),
+    sa.Column("TenHinhAnh", sa.String(255)),
+    sa.Column(
+        "ChiTietHienVatId",
+        sa.BigInteger,
+        sa.ForeignKey("ChiTietHienVat.id"),
+        nullable=False,
+        index=True,
+    ),
+    sa.Column("TepId", sa.BigInteger, sa.ForeignKey("Tep.id"), unique=True),
+    sa.Column("ThoiGianTao", sa.DateTime),
+    sa.Column("ThoiGianCapNhat", sa.DateTime),
+)
+
+# the primary and foreign keys of each table i.e the row of a notification
+ROW_KEYS: t.Dict[str, t.Tuple[str, ...]] = {
+    "HoSo": ("id",),
+    "ChiTietHienVat": ("id", "HoSoId"),
+    "HinhAnhHienVat": ("id", "ChiTietHienVatId", "TepId"),
+    "Tep": ("id",),
+}
+
+WORDS: t.List[str] = (
+    "bình gốm sứ men lam trống đồng tượng phật gỗ sơn son thếp vàng "
+    "hoa văn rồng phượng thời lý trần lê nguyễn đông sơn óc eo sa huỳnh "
+    "chén đĩa ấm lư hương ấn triện sắc phong bia đá mộc bản chiêng cồng "
+    "khai quật hiện vật cổ quý hiếm bảo tàng lịch sử văn hóa dân tộc"
+).split()
+MATERIALS: t.List[str] = ["gốm", "đồng", "gỗ", "đá", "giấy", "vải", "bạc"]
+STATES: t.List[str] = ["da_duyet", "cho_duyet", "nhap_lieu"]
+
+
+def layout(scale: int, images: float, seed: int) -> t.List[int]:
+    """The number of images of each artifact."""
+    rng: random.Random = random.Random(seed)
+    if images <= 0:
+        return [0] * scale
+    p: float = 1 / (images + 1)
+    counts: t.List[int] = []
+    for _ in range(scale):
+        count: int = 0
+        while rng.random() > p:
+            count += 1
+        counts.append(count)
+    return counts
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def rows(
+    scale: int, images: float, seed: int
+) -> t.Iterator[t.Tuple[sa.Table, dict]]:
+    """The rows of every table in foreign key order."""
+    rng: random.Random = random.Random(seed + 1)
+    since: datetime.datetime = datetime.datetime(2020, 1, 1)
+    image: int = 0
+    for i, count in enumerate(layout(scale, images, seed), 1):
+        created: datetime.datetime = since + datetime.timedelta(
+            minutes=rng.randrange(3 * 365 * 24 * 60)
+        )
+        yield HoSo, {
+            "id": i,
+            "HoatDong": 1,
+            "TrangThai": rng.choice(STATES),
+            "LoaiHoSo": "HienVat",
+            "GhiChu": _text(rng, 8),
+            "ThoiGianTao": created,
+            "ThoiGianCapNhat": created,
+        }
+        name: str = _text(rng, 4).capitalize()
+        yield ChiTietHienVat, {
+            "id": i,
+            "TenHienVat": name,
+            "TenHeThong": name.lower().replace(" ", "-"),
+            "SoDangKy": f"BTLS-{i:08d}",
+            "LoaiHienVatId": rng.randrange(1, 50),
+            "ChatLieu": rng.choice(MATERIALS),
+            "MieuTa": _text(rng, rng.randrange(20, 200)),
+            "HoSoId": i,
+            "ThoiGianTao": created,
+            "ThoiGianCapNhat": created,
+        }
+        for _ in range(count):
+            image += 1
+            yield Tep, {
+                "id": image,
+                "TenTep": f"anh-{image}.jpg",
+                "LoaiTep": "jpg",
+                "KichThuocTep": rng.randrange(10_000, 10_000_000),
+                "Khoa": f"hien-vat/{i}/{rng.getrandbits(64):016x}.jpg",
+                "DuongDan": f"/uploads/hien-vat/{i}/anh-{image}.jpg",
+                "LoaiMime": "image/jpeg",
+                "ThoiGianTao": created,
+                "ThoiGianCapNhat": created,
+            }
+            yield HinhAnhHienVat, {
+                "id": image,
+                "TenHinhAnh": f"Ảnh {image}",
+                "ChiTietHienVatId": i,
+                "TepId": image,
+                "ThoiGianTao": created,
+                "ThoiGianCapNhat": created,
+            }
+
+
+def create(database: str, scale: int, images: float, seed: int) -> int:
+    """(Re)create the database with the dataset and return the row count."""
+    from pgsync.base import create_database, drop_database, pg_engine
+
+    drop_database(database)
+    create_database(database)
+    count: int = 0
+    with pg_engine(database) as engine:
+        metadata.create_all(engine)
+        # HinhAnhHienVat references Tep which is yielded just before it
+        order: t.List[sa.Table] = [HoSo, ChiTietHienVat, Tep, HinhAnhHienVat]
+        chunks: t.Dict[sa.Table, t.List[dict]] = {table: [] for table in order}
+
+        def flush() -> None:
+            with engine.begin() as conn:
+                for table in order:
+                    if chunks[table]:
+                        conn.execute(table.insert(), chunks[table])
+                        chunks[table] = []
+
+        for table, row in rows(scale, images, seed):
+            chunks[table].append(row)
+            count += 1
+            if count % CHUNK_SIZE == 0:
+                flush()
+        flush()
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(
+                sa.text("VACUUM ANALYZE")
+            )
+    return count
+
+
+def schema(
+    config: str,
+    database: str,
+    index: str = INDEX,
+    plugins: bool = False,
+) -> dict:
+    """
+    The schema of index from the schema config, reading the dataset.
+
+    The plugins are dropped unless asked for as they have to be importable
+    from the plugins package.
+    """
+    with open(config) as fp:
+        docs: t.List[dict] = json.load(fp)
+    doc: dict = next(
+        doc for doc in docs if (doc.get("index") or doc["database"]) == index
+    )
+    doc = {**doc, "database": database, "index": f"benchmark-{index}"}
+    if not plugins:
+        doc.pop("plugins", None)
+    return doc
+
+
+def notification(
+    tg_op: str, table: str, row: dict, index: str, xmin: int
+) -> dict:
+    """The trigger notification of a change to a row."""
+    keys: t.Dict[str, t.Any] = {key: row[key] for key in ROW_KEYS[table]}
+    return {
+        "xmin": xmin,
+        "new": None if tg_op == "DELETE" else keys,
+        "old": {"id": row["id"]} if tg_op != "INSERT" else None,
+        "indices": [index],
+        "tg_op": tg_op,
+        "table": table,
+        "schema": "public",
+    }
+
+
+def changes(
+    scale: int,
+    images: float,
+    seed: int,
+    mix: t.Dict[str, float],
+) -> t.Iterator[t.Tuple[str, dict]]:
+    """
+    An endless seeded stream of (table, row) of existing rows to change.
+
+    mix is the share of the changes to each table.
+    """
+    # the artifact of every image
+    owners: t.List[int] = [
+        i
+        for i, count in enumerate(layout(scale, images, seed), 1)
+        for _ in range(count)
+    ]
+    tables: t.List[str] = [table for table in mix if mix[table] > 0]
+    if not owners:
+        tables = [
+            table for table in tables if table not in ("HinhAnhHienVat", "Tep")
+        ]
+    weights: t.List[float] = [mix[table] for table in tables]
+    rng: random.Random = random.Random(seed + 2)
+    while True:
+        table: str = rng.choices(tables, weights)[0]
+        if table in ("HoSo", "ChiTietHienVat"):
+            i: int = rng.randrange(1, scale + 1)
+            yield table, {"id": i, "HoSoId": i}
+        else:
+            image: int = rng.randrange(1, len(owners) + 1)
+            yield table, {
+                "id": image,
+                "ChiTietHienVatId": owners[image - 1],
+                "TepId": image,
+            }
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+
+"""
+Root lookup benchmark.
+
+Replays the private area lookups that changes to child tables make to
+resolve their root docs (SearchClient._search) against a live index, with
+as many concurrent lookups as workers, and reports per strategy:
+
+    p50/p95/p99     lookup latency in ms
+    lookups         lookups per second
+    heap            peak JVM heap used across the cluster during the run
+    contexts        peak open search (scroll/PIT) contexts
+
+Strategies:
+
+    scroll          a scroll over both the field and its keyword sub-field
+                    (the previous lookup)
+    lookup          SearchClient._search i.e a single sized search or PIT
+                    with search_after over a single mapped field
+
+The lookups are sampled from the private area of random docs of the index
+excluding the root table. Nothing is written.
+
+Usage:
+    python benchmarks/search_lookups.py --config schema.json --workers 100
+"""
+
+import json
+import random
+import threading
+import time
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+
+STRATEGIES: t.Tuple[str, ...] = ("scroll", "lookup")
+
+
+def sample(
+    client: t.Any, index: str, root: str, count: int, terms: int
+) -> t.List[t.Tuple[str, dict]]:
+    from pgsync.constants import META
+
+    response: t.Any = client.search(
+        index=index,
+        body={
+            "size": count,
+            "_source": [META],
+            "query": {"function_score": {"random_score": {}}},
+        },
+    )
+    lookups: t.List[t.Tuple[str, dict]] = []
+    for hit in response["hits"]["hits"]:
+        for table, columns in hit["_source"].get(META, {}).items():
+            if table == root:
+                continue
+            lookups.append(
+                (
+                    table,
+                    {
+                        column: values[:terms]
+                        for column, values in columns.items()
+                    },
+                )
+            )
+    random.shuffle(lookups)
+    return lookups
+
+
+def scroll(
+    search_client: t.Any, using: t.Any, index: str, table: str, fields: dict
+):
+    from pgsync.constants import META
+
+    search = search_client.Search(using=using, index=index)
+    search = search.source(excludes=["*"])
+    for key, values in fields.items():
+        search = search.query(
+            search_client.Bool(
+                filter=[
+                    search_client.Q(
+                        "terms", **{f"{META}.{table}.{key}": values}
+                    )
+                    | search_client.Q(
+                        "terms",
+                        **{f"{META}.{table}.{key}.keyword": values},
+                    )
+                ]
+            )
+        )
+    for hit in search.scan():
+        yield hit.meta.id
+
+
+def client() -> t.Any:
+    import elastic_transport
+    import elasticsearch
+    import opensearchpy
+
+    from pgsync import settings
+    from pgsync.search_client import get_search_client
+    from pgsync.urls import get_search_url
+
+    if settings.OPENSEARCH:
+        return get_search_client(
+            get_search_url(),
+            client=opensearchpy.OpenSearch,
+            connection_class=opensearchpy.RequestsHttpConnection,
+        )
+    return get_search_client(
+        get_search_url(),
+        client=elasticsearch.Elasticsearch,
+        node_class=elastic_transport.RequestsHttpNode,
+    )
+
+
+class ClusterStats(threading.Thread):
+    """Poll the peak heap used and open search contexts of the cluster."""
+
+    def __init__(self, client: t.Any, interval: float = 0.2):
+        super().__init__(daemon=True)
+        self.client: t.Any = client
+        self.interval: float = interval
+        self.heap: int = 0
+        self.contexts: int = 0
+        self.stop: threading.Event = threading.Event()
+
+    def run(self) -> None:
+        while not self.stop.is_set():
+            nodes: dict = self.client.nodes.stats(
+                metric="jvm,indices", index_metric="search"
+            )["nodes"]
+            self.heap = max(
+                self.heap,
+                sum(
+                    node["jvm"]["mem"]["heap_used_in_bytes"]
+                    for node in nodes.values()
+                ),
+            )
+            self.contexts = max(
+                self.contexts,
+                sum(
+                    node["indices"]["search"]["open_contexts"]
+                    for node in nodes.values()
+                ),
+            )
+            self.stop.wait(self.interval)
+
+
+def measure(
+    strategy: str,
+    index: str,
+    lookups: t.List[t.Tuple[str, dict]],
+    workers: int,
+) -> dict:
+    from pgsync.search_client import SearchClient
+
+    search_client: SearchClient = SearchClient()
+    using: t.Any = client()
+    lookup: t.Callable = (
+        search_client._search
+        if strategy == "lookup"
+        else (lambda *args: scroll(search_client, using, *args))
+    )
+
+    def run(table: str, fields: dict) -> float:
+        since: float = time.perf_counter()
+        for _ in lookup(index, table, fields):
+            pass
+        return time.perf_counter() - since
+
+    stats: ClusterStats = ClusterStats(using)
+    stats.start()
+    since: float = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        latencies: t.List[float] = sorted(
+            executor.map(lambda lookup: run(*lookup), lookups)
+        )
+    elapsed: float = time.perf_counter() - since
+    stats.stop.set()
+    stats.join()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    return {
+        "p50": percentile(0.5) * 1000,
+        "p95": percentile(0.95) * 1000,
+        "p99": percentile(0.99) * 1000,
+        "lookups": len(latencies) / elapsed,
+        "heap": stats.heap / 1024 / 1024,
+        "contexts": stats.contexts,
+    }
+
+
+@click.command()
+@click.option(
+    "--config",
+    "-c",
+    help="Schema config",
+    type=click.Path(exists=True),
+    required=True,
+)
+@click.option(
+    "--workers",
+    "-w",
+    default=100,
+    help="Number of concurrent lookups.",
+    type=int,
+)
+@click.option(
+    "--samples",
+    "-n",
+    default=2000,
+    help="Number of docs to sample lookups from.",
+    type=int,
+)
+@click.option(
+    "--terms",
+    default=10,
+    help="Maximum number of values per lookup.",
+    type=int,
+)
+def main(config: str, workers: int, samples: int, terms: int) -> None:
+    with open(config) as fp:
+        doc: dict = json.load(fp)[0]
+    index: str = doc.get("index") or doc["database"]
+
+    lookups: t.List[t.Tuple[str, dict]] = sample(
+        client(), index, doc["nodes"]["table"], samples, terms
+    )
+    click.echo(f"{len(lookups)} lookups on {index} with {workers} workers")
+
+    results: t.Dict[str, dict] = {
+        strategy: measure(strategy, index, lookups, workers)
+        for strategy in STRATEGIES
+    }
+    units: t.Dict[str, str] = {
+        "p50": "ms",
+        "p95": "ms",
+        "p99": "ms",
+        "lookups": "/s",
+        "heap": "MB",
+        "contexts": "",
+    }
+    click.echo(f"{'':<12}" + "".join(f"{s:>14}" for s in STRATEGIES))
+    for key, unit in units.items():
+        click.echo(
+            f"{key:<12}"
+            + "".join(f"{results[s][key]:>12.1f}{unit:<2}" for s in STRATEGIES)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+
+"""
+Fake Elasticsearch bulk sink.
+
+A stand-in for Elasticsearch that the benchmarks point pgsync at so that
+the numbers measure pgsync rather than a cluster. It answers the requests
+pgsync makes with the least work that keeps them realistic:
+
+    /                   the version info of an 8.x cluster
+    _bulk               parses the actions, acknowledges every item and
+                        keeps the private area (_meta) of each doc
+    _mapping/field      maps every requested _meta field
+    _settings           a 1s refresh interval
+    _search/_msearch    matches the terms filters against the kept _meta so
+                        child table changes resolve to their root docs
+    _pit                opens and closes a point in time (PIT) so lookups
+                        of more than ELASTICSEARCH_LOOKUP_SIZE docs page
+                        with search_after in _id order
+    anything else       {"acknowledged": true}
+
+The sink counts the docs, requests and bytes it receives.
+
+Usage:
+    python benchmarks/sink.py --port 9200
+"""
+
+import gzip
+import json
+import re
+import threading
+import typing as t
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import click
+
+META: str = "_meta"
+VERSION: str = "8.11.0"
+HEADERS: t.Dict[str, str] = {
+    "Content-Type": "application/json",
+    "X-Elastic-Product": "Elasticsearch",
+}
+
+
+class Store(object):
+    """The _meta postings of the docs indexed into the sink."""
+
+    def __init__(self):
+        self.lock: threading.Lock = threading.Lock()
+        # (table, column, value) => doc ids
+        self.postings: t.Dict[t.Tuple[str, str, str], t.Set[str]] = (
+            defaultdict(set)
+        )
+        self.docs: int = 0
+        self.requests: int = 0
+        self.bytes: int = 0
+
+    def bulk(self, body: bytes) -> t.List[dict]:
+        items: t.List[dict] = []
+        lines: t.List[bytes] = body.splitlines()
+        i: int = 0
+        postings: t.List[t.Tuple[t.Tuple[str, str, str], str]] = []
+        while i < len(lines):
+            if not lines[i].strip():
+                i += 1
+                continue
+            action: dict = json.loads(lines[i])
+            op_type, meta = next(iter(action.items()))
+            i += 1
+            if op_type != "delete":
+                source: dict = json.loads(lines[i])
+                i += 1
+                if op_type == "update":
+                    source = source.get("doc", {})
+                for table, columns in (source.get(META) or {}).items():
+                    for column, values in columns.items():
+                        for value in values:
+                            postings.append(
+                                ((table, column, str(value)), meta.get("_id"))
+                            )
+            items.append(
+                {
+                    op_type: {
+                        "_index": meta.get("_index"),
+                        "_id": meta.get("_id"),
+                        "status": 201 if op_type == "create" else 200,
+                        "result": "updated",
+                    }
+                }
+            )
+        with self.lock:
+            for key, _id in postings:
+                self.postings[key].add(_id)
+            self.docs += len(items)
+            self.requests += 1
+            self.bytes += len(body)
+        return items
+
+    def search(self, body: dict) -> t.List[str]:
+        """The ids of the docs matching every terms filter of a search."""
+        ids: t.Optional[t.Set[str]] = None
+        for field, values in _terms(body.get("query", {})):
+            _, table, column = field.removesuffix(".keyword").split(".", 2)
+            matched: t.Set[str] = set()
+            with self.lock:
+                for value in values:
+                    matched |= self.postings.get(
+                        (table, column, str(value)), set()
+                    )
+            ids = matched if ids is None else ids & matched
+        values: t.List[str] = sorted(ids or ())
+        if body.get("search_after"):
+            # the next page of a PIT search in _id order
+            values = [_id for _id in values if _id > body["search_after"][0]]
+        return values[: body.get("size", 10)]
+
+
+def _terms(query: t.Any) -> t.Iterator[t.Tuple[str, list]]:
+    """The terms filters of a query i.e the _meta lookups of pgsync."""
+    if isinstance(query, dict):
+        for key, value in query.items():
+            if key == "terms":
+                yield from value.items()
+            elif key == "should":
+                # the field or its keyword sub-field
+                for field, values in list(_terms(value))[:1]:
+                    yield field, values
+            else:
+                yield from _terms(value)
+    elif isinstance(query, list):
+        for value in query:
+            yield from _terms(value)
+
+
+def _hits(ids: t.List[str], pit_id: t.Optional[str] = None) -> dict:
+    hits: dict = {
+        "took": 0,
+        "timed_out": False,
+        "hits": {
+            "hits": [{"_id": _id, "_score": 0, "sort": [_id]} for _id in ids]
+        },
+    }
+    if pit_id is not None:
+        hits["pit_id"] = pit_id
+    return hits
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version: str = "HTTP/1.1"
+    store: Store
+
+    def _body(self) -> bytes:
+        length: int = int(self.headers.get("Content-Length") or 0)
+        body: bytes = self.rfile.read(length) if length else b""
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return body
+
+    def _reply(self, payload: t.Any, status: int = 200) -> None:
+        data: bytes = json.dumps(payload).encode()
+        self.send_response(status)
+        for key, value in HEADERS.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        self._handle()
+
+    def do_POST(self) -> None:
+        self._handle()
+
+    def do_PUT(self) -> None:
+        self._handle()
+
+    def do_DELETE(self) -> None:
+        self._handle()
+
+    def do_HEAD(self) -> None:
+        self._handle()
+
+    def _handle(self) -> None:
+        path: str = self.path.split("?")[0]
+        body: bytes = self._body()
+        if path == "/":
+            self._reply(
+                {
+                    "name": "sink",
+                    "cluster_name": "sink",
+                    "version": {
+                        "number": VERSION,
+                        "build_flavor": "default",
+                    },
+                    "tagline": "You Know, for Search",
+                }
+            )
+        elif path.endswith("/_bulk"):
+            items: t.List[dict] = self.store.bulk(body)
+            self._reply({"took": 0, "errors": False, "items": items})
+        elif "/_mapping/field/" in path:
+            index: str = path.strip("/").split("/")[0]
+            fields: t.List[str] = path.rsplit("/", 1)[1].split(",")
+            self._reply(
+                {
+                    index: {
+                        "mappings": {
+                            field: {"full_name": field, "mapping": {}}
+                            for field in fields
+                            if not field.endswith(".keyword")
+                        }
+                    }
+                }
+            )
+        elif path.endswith("/_msearch"):
+            lines: t.List[dict] = [
+                json.loads(line) for line in body.splitlines() if line.strip()
+            ]
+            self._reply(
+                {
+                    "took": 0,
+                    "responses": [
+                        {**_hits(self.store.search(query)), "status": 200}
+                        for query in lines[1::2]
+                    ],
+                }
+            )
+        elif path.endswith("/_search"):
+            query: dict = json.loads(body or b"{}")
+            self._reply(
+                _hits(
+                    self.store.search(query),
+                    (query.get("pit") or {}).get("id"),
+                )
+            )
+        elif path.endswith("/_pit"):
+            if self.command == "DELETE":
+                self._reply({"succeeded": True, "num_freed": 1})
+            else:
+                # the sink keeps no snapshots so the PIT is just the index
+                self._reply({"id": path.strip("/").split("/")[0]})
+        elif "/_settings" in path and self.command == "GET":
+            index = path.strip("/").split("/")[0]
+            self._reply(
+                {index: {"settings": {"index.refresh_interval": "1s"}}}
+            )
+        elif re.search(r"/_count$", path):
+            self._reply({"count": self.store.docs})
+        else:
+            self._reply({"acknowledged": True})
+
+    def log_message(self, format: str, *args: t.Any) -> None:
+        pass
+
+
+def serve(
+    host: str = "127.0.0.1", port: int = 0
+) -> t.Tuple[ThreadingHTTPServer, Store]:
+    """Serve a sink in a background thread (port 0 picks a free port)."""
+    store: Store = Store()
+    handler: type = type("Handler", (Handler,), {"store": store})
+    server: ThreadingHTTPServer = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, store
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", help="Host to listen on.")
+@click.option("--port", "-p", default=9200, help="Port to listen on.")
+def main(host: str, port: int) -> None:
+    server, store = serve(host, port)
+    click.echo(f"Sink listening on http://{host}:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        click.echo(
+            f"{store.docs} docs in {store.requests} requests "
+            f"({store.bytes} bytes)"
+        )
+
+
+if __name__ == "__main__":
+    main()
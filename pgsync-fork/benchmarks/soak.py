@@ -0,0 +1,391 @@
+#!/usr/bin/env python
+
+"""
+Soak test with memory and leak tracking.
+
+Runs the daemon threads of pgsync in this process for hours against local
+stand-ins (the fake Elasticsearch sink and fakeredis, or Redis/Valkey with
+--redis) on the museum dataset built by suite.py, while changes are fed at
+a steady rate:
+
+    redis       notifications pushed onto the queue of the index, running
+                the consumer threads only
+    dml         statements against the database (see loadgen.py), running
+                the triggers, the producer and the consumer i.e a bootstrap
+                and the full daemon
+
+Every --interval secs the sampler records:
+
+    rss         the RSS of the process in MB
+    traced      the memory traced by tracemalloc in MB
+    caches      the size of the caches that live as long as the daemon:
+                the per model caches of Base, utils._col_cache, the _meta
+                lookup fields of the search client, the SQLAlchemy compiled
+                cache of the engine and the pending dirty roots (the
+                QueryBuilder and Tree are thread local so their caches only
+                show up in the tracemalloc lines)
+    objects     the count of the live objects of the --top most common types
+
+After the --warmup share of the run a series that keeps growing (its second
+half mean above its first half by more than --threshold with a positive
+slope) is flagged along with the tracemalloc lines that grew the most since
+the warmup. The samples are written as JSON lines to --output and the exit
+code is 1 if anything was flagged.
+
+Usage:
+    python benchmarks/suite.py --config ../schema.json --scale 10000
+    python benchmarks/soak.py --config ../schema.json --skip-setup \\
+        --hours 4 --rate 200
+"""
+
+import gc
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import typing as t
+from collections import Counter
+
+import click
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import loadgen  # noqa: E402
+import museum  # noqa: E402
+import sink  # noqa: E402
+import suite  # noqa: E402
+
+
+def rss() -> float:
+    """The current RSS of this process in MB."""
+    try:
+        with open("/proc/self/statm") as fp:
+            pages: int = int(fp.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        # the peak where /proc is not available
+        return suite.peak_rss()
+
+
+def caches(sync: t.Any) -> t.Dict[str, int]:
+    """The size of the caches kept for the lifetime of the daemon."""
+    from pgsync import utils
+
+    sizes: t.Dict[str, int] = {}
+    for name in (
+        "models",
+        "metadata",
+        "indices",
+        "views",
+        "materialized_views",
+        "tables",
+        "columns",
+        "advisory_keys",
+    ):
+        sizes[f"Base.{name}"] = len(getattr(sync, f"_Base__{name}", ()))
+    sizes["utils._col_cache"] = len(utils._col_cache)
+    sizes["SearchClient._lookup_fields"] = len(
+        getattr(sync.search_client, "_lookup_fields", ())
+    )
+    sizes["engine._compiled_cache"] = len(
+        getattr(sync.engine, "_compiled_cache", None) or ()
+    )
+    if sync._dirty_roots is not None:
+        sizes["DirtyRoots"] = len(sync._dirty_roots)
+    return sizes
+
+
+class Sampler(threading.Thread):
+    """Sample the memory of the process at an interval."""
+
+    def __init__(self, sync: t.Any, interval: float, top: int, output: str):
+        super().__init__(name="soak", daemon=True)
+        self.sync: t.Any = sync
+        self.interval: float = interval
+        self.top: int = top
+        self.output: str = output
+        self.samples: t.List[dict] = []
+        # the tracemalloc snapshot at the end of the warmup
+        self.baseline: t.Optional[tracemalloc.Snapshot] = None
+        self.since: float = time.monotonic()
+        self.stop: threading.Event = threading.Event()
+
+    def sample(self) -> dict:
+        gc.collect()
+        objects: t.Counter[str] = Counter(
+            type(obj).__name__ for obj in gc.get_objects()
+        )
+        sample: dict = {
+            "secs": time.monotonic() - self.since,
+            "rss": rss(),
+            "traced": tracemalloc.get_traced_memory()[0] / 1024 / 1024,
+            "caches": caches(self.sync),
+            "objects": dict(objects.most_common(self.top)),
+        }
+        self.samples.append(sample)
+        with open(self.output, "a") as fp:
+            fp.write(json.dumps(sample) + "\n")
+        return sample
+
+    def run(self) -> None:
+        while not self.stop.wait(self.interval):
+            sample: dict = self.sample()
+            click.echo(
+                f"{sample['secs'] / 60:>8.1f} min  rss {sample['rss']:.1f} MB"
+                f"  traced {sample['traced']:.1f} MB"
+            )
+
+
+def series(
+    samples: t.List[dict],
+) -> t.Dict[str, t.List[t.Tuple[float, float]]]:
+    """The (secs, value) of every sampled value by name."""
+    values: t.Dict[str, t.List[t.Tuple[float, float]]] = {}
+    for sample in samples:
+        for name in ("rss", "traced"):
+            values.setdefault(name, []).append((sample["secs"], sample[name]))
+        for group in ("caches", "objects"):
+            for name, value in sample[group].items():
+                values.setdefault(f"{group}.{name}", []).append(
+                    (sample["secs"], value)
+                )
+    return values
+
+
+def growing(points: t.List[t.Tuple[float, float]], threshold: float) -> bool:
+    """Whether a series keeps growing rather than levelling off."""
+    if len(points) < 4:
+        return False
+    half: int = len(points) // 2
+    first: float = sum(value for _, value in points[:half]) / half
+    second: float = sum(value for _, value in points[half:]) / (
+        len(points) - half
+    )
+    return (
+        loadgen.slope(points) > 0
+        and second > first * (1 + threshold)
+        and points[-1][1] > max(value for _, value in points[:half])
+    )
+
+
+def report(sampler: Sampler, warmup: float, threshold: float, top: int) -> int:
+    """Report the growth of every series after the warmup."""
+    samples: t.List[dict] = sampler.samples
+    start: int = int(len(samples) * warmup)
+    flagged: int = 0
+    click.echo(f"\n{'':<40}{'first':>12}{'last':>12}{'per hour':>12}")
+    for name, points in series(samples[start:]).items():
+        is_growing: bool = growing(points, threshold)
+        if not is_growing and name.startswith("objects."):
+            continue
+        flagged += is_growing
+        click.echo(
+            f"{name[:40]:<40}{points[0][1]:>12.1f}{points[-1][1]:>12.1f}"
+            f"{loadgen.slope(points) * 3600:>12.1f}"
+            f"{'  growing' if is_growing else ''}"
+        )
+    if sampler.baseline is not None:
+        click.echo("\nTop allocations since the warmup:")
+        for stat in tracemalloc.take_snapshot().compare_to(
+            sampler.baseline, "lineno"
+        )[:top]:
+            click.echo(f"  {stat}")
+    return flagged
+
+
+@click.command()
+@click.option(
+    "--config",
+    "-c",
+    help="Schema config (the cmm-search-artifact schema is used)",
+    type=click.Path(exists=True),
+    required=True,
+)
+@click.option(
+    "--database",
+    default="pgsync_benchmark",
+    help="Database to (re)create the dataset in.",
+)
+@click.option("--scale", default=10000, help="Number of HoSo.", type=int)
+@click.option(
+    "--images",
+    default=4.0,
+    help="Mean number of images per artifact.",
+    type=float,
+)
+@click.option("--seed", default=1, help="Dataset seed.", type=int)
+@click.option(
+    "--skip-setup",
+    is_flag=True,
+    default=False,
+    help="Reuse the dataset of a previous run.",
+)
+@click.option(
+    "--target",
+    type=click.Choice(["redis", "dml"]),
+    default="redis",
+    help="Push notifications to Redis/Valkey or run DML.",
+)
+@click.option(
+    "--mix",
+    default="HoSo=1,ChiTietHienVat=3,HinhAnhHienVat=2,Tep=2",
+    help="Share of the changes per table.",
+)
+@click.option(
+    "--ops",
+    default="INSERT=1,UPDATE=8,DELETE=1",
+    help="Share of the changes per operation.",
+)
+@click.option("--rate", default=200.0, help="Changes/s.", type=float)
+@click.option("--hours", default=1.0, help="Duration of the soak.", type=float)
+@click.option(
+    "--interval", default=60.0, help="Secs between samples.", type=float
+)
+@click.option(
+    "--warmup",
+    default=0.2,
+    help="Share of the run before growth is tracked.",
+    type=float,
+)
+@click.option(
+    "--threshold",
+    default=0.05,
+    help="Growth between the halves of the run that is flagged.",
+    type=float,
+)
+@click.option(
+    "--top", default=20, help="Number of types and allocations shown."
+)
+@click.option(
+    "--frames",
+    default=1,
+    help="Frames kept per tracemalloc allocation.",
+    type=int,
+)
+@click.option(
+    "--redis",
+    is_flag=True,
+    default=False,
+    help="Use the Redis/Valkey of REDIS_HOST rather than fakeredis.",
+)
+@click.option(
+    "--output",
+    "-o",
+    default="soak.jsonl",
+    help="Samples file.",
+    type=click.Path(),
+)
+def main(
+    config: str,
+    database: str,
+    scale: int,
+    images: float,
+    seed: int,
+    skip_setup: bool,
+    target: str,
+    mix: str,
+    ops: str,
+    rate: float,
+    hours: float,
+    interval: float,
+    warmup: float,
+    threshold: float,
+    top: int,
+    frames: int,
+    redis: bool,
+    output: str,
+) -> None:
+    if not skip_setup:
+        count: int = museum.create(database, scale, images, seed)
+        click.echo(f"Created {count} rows in {database}")
+
+    server, store = sink.serve()
+    os.environ.update(
+        {
+            "ELASTICSEARCH": "True",
+            "OPENSEARCH": "False",
+            "ELASTICSEARCH_SCHEME": "http",
+            "ELASTICSEARCH_HOST": "127.0.0.1",
+            "ELASTICSEARCH_PORT": str(server.server_port),
+            "CHECKPOINT_PATH": tempfile.mkdtemp(),
+        }
+    )
+    # settings are read at import so pgsync is imported after the env
+    from pgsync.sync import Sync
+
+    if not redis:
+        suite.use_fakeredis()
+    tracemalloc.start(frames)
+    changes: loadgen.Changes = loadgen.Changes(
+        scale,
+        images,
+        seed,
+        loadgen.parse_mix(mix, museum.ROW_KEYS),
+        loadgen.parse_mix(ops, loadgen.TG_OPS),
+    )
+    doc: dict = museum.schema(config, database)
+    if target == "dml":
+        sync: Sync = Sync(doc, repl_slots=False)
+        sync.setup()
+        sync.search_client.bulk(sync.index, sync.sync())
+        sync.receive()
+        sender: t.Any = loadgen.Dml(database, changes)
+    else:
+        sync = Sync(doc, validate=False, repl_slots=False, producer=False)
+        for _ in range(sync.num_workers):
+            sync.poll_redis()
+        if sync._dirty_roots is not None:
+            sync.build_dirty_roots()
+        sender = loadgen.Redis.__new__(loadgen.Redis)
+        sender.queue = sync.redis
+        sender.xmin = sync.txid_current
+        sender.items = (
+            museum.notification(tg_op, table, row, doc["index"], None)
+            for tg_op, table, row in changes
+        )
+
+    if os.path.exists(output):
+        os.remove(output)
+    sampler: Sampler = Sampler(sync, interval, top, output)
+    sampler.start()
+    duration: float = hours * 3600
+    since: float = time.perf_counter()
+    sent: int = 0
+    try:
+        while True:
+            elapsed: float = time.perf_counter() - since
+            if elapsed >= duration:
+                break
+            if sampler.baseline is None and elapsed >= duration * warmup:
+                sampler.baseline = tracemalloc.take_snapshot()
+            count = int(rate * elapsed) - sent
+            if count > 0:
+                sender.send(count)
+                sent += count
+            time.sleep(loadgen.TICK)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.stop.set()
+        sampler.join()
+        sampler.sample()
+        sender.close()
+
+    click.echo(
+        f"\nSent {sent} changes, {store.docs} docs in {store.requests} "
+        f"bulk requests"
+    )
+    flagged: int = report(sampler, warmup, threshold, top)
+    click.echo(f"\n{flagged} growing series, samples in {output}")
+    if target == "dml":
+        sync.teardown()
+    # the daemon threads of pgsync never return
+    sys.stdout.flush()
+    os._exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python
+
+"""
+End to end benchmark suite.
+
+Builds the synthetic museum dataset (benchmarks/museum.py) in a local
+Postgres database and syncs it with pgsync into the fake Elasticsearch sink
+(benchmarks/sink.py) through fakeredis, or a real Redis/Valkey with
+--redis. Each stage runs in its own process and reports:
+
+    full_sync   docs/s of a full sync of the index
+    live        events/s and the p50/p99 latency from a batch of changes
+                being queued to the bulk acknowledgement of their docs for
+                a mix of changes to the root and child tables
+    rss         the peak RSS of the stage in MB
+
+The live stage resolves child table changes through the _meta kept by the
+sink so it runs after the full sync. Changes are applied inline i.e with
+DIRTY_ROOT_DEBOUNCE=0. Other settings (PG_DRIVER, COPY_EXPORT, SYNC_PIPELINE,
+ELASTICSEARCH_CHUNK_SIZE, ...) are read from the environment as usual and
+recorded with the results.
+
+The results are written as JSON named after the commit so that runs can be
+compared across commits:
+
+    python benchmarks/suite.py --config ../schema.json --scale 10000
+    python benchmarks/suite.py --config ../schema.json --scale 10000 \\
+        --compare benchmarks/results/<commit>.json
+"""
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import typing as t
+
+import click
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import museum  # noqa: E402
+import sink  # noqa: E402
+
+STAGES: t.Tuple[str, ...] = ("full_sync", "live")
+RESULTS_DIR: str = os.path.join(os.path.dirname(__file__), "results")
+# the settings that change the numbers and are recorded with them
+SETTINGS: t.Tuple[str, ...] = (
+    "PG_DRIVER",
+    "COPY_EXPORT",
+    "SYNC_PIPELINE",
+    "SYNC_PARTITIONS",
+    "QUERY_CHUNK_SIZE",
+    "FILTER_CHUNK_SIZE",
+    "ELASTICSEARCH_CHUNK_SIZE",
+    "ELASTICSEARCH_STREAMING_BULK",
+    "ELASTICSEARCH_THREAD_COUNT",
+    "ELASTICSEARCH_LOOKUP_SIZE",
+    "REDIS_READ_CHUNK_SIZE",
+    "REDIS_COALESCE",
+)
+# the change in each result that is an improvement
+HIGHER: t.Set[str] = {"docs/s", "events/s"}
+
+
+def parse_mix(value: str) -> t.Dict[str, float]:
+    """Parse e.g HoSo=1,Tep=2 into the share of changes per table."""
+    mix: t.Dict[str, float] = {}
+    for item in value.split(","):
+        table, _, weight = item.partition("=")
+        if table not in museum.ROW_KEYS:
+            raise click.BadParameter(f"Unknown table {table}")
+        mix[table] = float(weight or 1)
+    return mix
+
+
+def peak_rss() -> float:
+    """Peak RSS of this process in MB (ru_maxrss is in KB on Linux)."""
+    rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def use_fakeredis() -> None:
+    import fakeredis
+
+    from pgsync import redisqueue
+
+    redisqueue.Redis = fakeredis.FakeRedis
+    redisqueue.AsyncRedis = fakeredis.FakeAsyncRedis
+
+
+def full_sync(sync: t.Any, options: dict) -> dict:
+    since: float = time.perf_counter()
+    with sync.bulk_load():
+        if sync.sync_workers > 1:
+            sync.range_checkpoint.clear()
+            sync.parallel_sync()
+        else:
+            sync.search_client.bulk(sync.index, sync.sync())
+    elapsed: float = time.perf_counter() - since
+    docs: int = sync.search_client.doc_count
+    return {
+        "docs": docs,
+        "seconds": elapsed,
+        "docs/s": docs / elapsed,
+    }
+
+
+def live(sync: t.Any, options: dict) -> dict:
+    from pgsync.base import Payload
+
+    changes: t.Iterator[t.Tuple[str, dict]] = museum.changes(
+        options["scale"],
+        options["images"],
+        options["seed"],
+        parse_mix(options["mix"]),
+    )
+    xmin: int = sync.txid_current
+    latencies: t.List[float] = []
+    sync.redis.delete()
+    since: float = time.perf_counter()
+    while len(latencies) < options["events"]:
+        items: t.List[dict] = [
+            museum.notification("UPDATE", table, row, sync.index, xmin)
+            for table, row in (
+                next(changes)
+                for _ in range(
+                    min(options["batch"], options["events"] - len(latencies))
+                )
+            )
+        ]
+        queued: float = time.perf_counter()
+        sync.redis.push(items)
+        while True:
+            payloads: t.Optional[t.List[dict]] = sync.redis.pop()
+            if not payloads:
+                break
+            sync.on_publish([Payload.from_dict(item) for item in payloads])
+            acked: float = time.perf_counter()
+            latencies.extend([acked - queued] * len(payloads))
+    elapsed: float = time.perf_counter() - since
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    return {
+        "events": len(latencies),
+        "seconds": elapsed,
+        "events/s": len(latencies) / elapsed,
+        "p50 ms": percentile(0.5) * 1000,
+        "p99 ms": percentile(0.99) * 1000,
+    }
+
+
+def measure(stage: str, options: dict) -> dict:
+    from pgsync.sync import Sync
+
+    if not options["redis"]:
+        use_fakeredis()
+    doc: dict = museum.schema(
+        options["config"], options["database"], plugins=options["plugins"]
+    )
+    sync: Sync = Sync(
+        doc,
+        validate=False,
+        repl_slots=False,
+        sync_workers=options["sync_workers"],
+    )
+    results: dict = {"full_sync": full_sync, "live": live}[stage](
+        sync, options
+    )
+    results["rss MB"] = peak_rss()
+    return results
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare_results(results: dict, path: str) -> None:
+    with open(path) as fp:
+        baseline: dict = json.load(fp)
+    click.echo(
+        f"\n{'':<24}{baseline['commit']:>14}{results['commit']:>14}"
+        f"{'change':>10}"
+    )
+    for stage, values in results["stages"].items():
+        for key, value in values.items():
+            old: t.Optional[float] = baseline["stages"].get(stage, {}).get(key)
+            if old is None:
+                continue
+            change: float = (value - old) / old * 100 if old else 0
+            # flag regressions of more than 5%
+            worse: bool = change < -5 if key in HIGHER else change > 5
+            click.echo(
+                f"{stage + ' ' + key:<24}{old:>14.1f}{value:>14.1f}"
+                f"{change:>+9.1f}%{' !' if worse else ''}"
+            )
+
+
+@click.command()
+@click.option(
+    "--config",
+    "-c",
+    help="Schema config (the cmm-search-artifact schema is used)",
+    type=click.Path(exists=True),
+    required=True,
+)
+@click.option(
+    "--database",
+    default="pgsync_benchmark",
+    help="Database to (re)create the dataset in.",
+)
+@click.option("--scale", default=10000, help="Number of HoSo.", type=int)
+@click.option(
+    "--images",
+    default=4.0,
+    help="Mean number of images per artifact.",
+    type=float,
+)
+@click.option("--seed", default=1, help="Dataset seed.", type=int)
+@click.option(
+    "--events",
+    default=10000,
+    help="Number of changes in the live stage.",
+    type=int,
+)
+@click.option(
+    "--batch",
+    default=100,
+    help="Changes queued at once in the live stage.",
+    type=int,
+)
+@click.option(
+    "--mix",
+    default="HoSo=1,ChiTietHienVat=3,HinhAnhHienVat=2,Tep=2",
+    help="Share of the live changes per table.",
+)
+@click.option(
+    "--sync_workers",
+    default=1,
+    help="Number of workers syncing ranges in the full sync.",
+    type=int,
+)
+@click.option(
+    "--redis",
+    is_flag=True,
+    default=False,
+    help="Use the Redis/Valkey of REDIS_HOST rather than fakeredis.",
+)
+@click.option(
+    "--plugins",
+    is_flag=True,
+    default=False,
+    help="Keep the schema plugins (they must be importable).",
+)
+@click.option(
+    "--skip-setup",
+    is_flag=True,
+    default=False,
+    help="Reuse the dataset of a previous run.",
+)
+@click.option(
+    "--output",
+    "-o",
+    help="Results file (default benchmarks/results/<commit>.json).",
+    type=click.Path(),
+)
+@click.option(
+    "--compare",
+    help="Results file of a previous run to compare against.",
+    type=click.Path(exists=True),
+)
+@click.option("--stage", type=click.Choice(STAGES), hidden=True)
+def main(
+    skip_setup: bool,
+    output: t.Optional[str],
+    compare: t.Optional[str],
+    stage: t.Optional[str],
+    **options,
+) -> None:
+    if stage:
+        click.echo(json.dumps(measure(stage, options)))
+        return
+
+    if not skip_setup:
+        since: float = time.perf_counter()
+        count: int = museum.create(
+            options["database"],
+            options["scale"],
+            options["images"],
+            options["seed"],
+        )
+        click.echo(
+            f"Created {count} rows in {options['database']} in "
+            f"{time.perf_counter() - since:.1f} secs"
+        )
+
+    server, store = sink.serve()
+    results: dict = {
+        "commit": commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "options": options,
+        "settings": {
+            name: os.environ[name] for name in SETTINGS if name in os.environ
+        },
+        "stages": {},
+    }
+    with tempfile.TemporaryDirectory() as checkpoint_path:
+        env: t.Dict[str, str] = {
+            **os.environ,
+            "ELASTICSEARCH": "True",
+            "OPENSEARCH": "False",
+            "ELASTICSEARCH_SCHEME": "http",
+            "ELASTICSEARCH_HOST": "127.0.0.1",
+            "ELASTICSEARCH_PORT": str(server.server_port),
+            "CHECKPOINT_PATH": checkpoint_path,
+            "REDIS_CHECKPOINT": "False",
+            "DIRTY_ROOT_DEBOUNCE": "0",
+        }
+        args: t.List[str] = [sys.executable, __file__]
+        for key, value in options.items():
+            if isinstance(value, bool):
+                if value:
+                    args.append(f"--{key}")
+            else:
+                args.extend([f"--{key}", str(value)])
+        for name in STAGES:
+            stdout: str = subprocess.run(
+                [*args, "--stage", name],
+                env=env,
+                check=True,
+                stdout=subprocess.PIPE,
+                text=True,
+            ).stdout
+            results["stages"][name] = json.loads(stdout.splitlines()[-1])
+    server.shutdown()
+
+    for name, values in results["stages"].items():
+        click.echo(
+            f"{name:<12}"
+            + "  ".join(f"{key}: {value:.1f}" for key, value in values.items())
+        )
+    click.echo(
+        f"sink: {store.docs} docs in {store.requests} bulk requests "
+        f"({store.bytes / 1024 / 1024:.1f} MB)"
+    )
+
+    output = output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as fp:
+        json.dump(results, fp, indent=2)
+    click.echo(f"Results written to {output}")
+
+    if compare:
+        compare_results(results, compare)
+
+
+if __name__ == "__main__":
+    main()
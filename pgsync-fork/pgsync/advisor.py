@@ -0,0 +1,143 @@
+"""
+PGSync Advisor.
+
+Reads the EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) plans of the sync queries
+run by --analyze and flags the scans that cost the most:
+
+    lateral seq scan    a Seq Scan run once per parent row i.e the LATERAL
+                        subquery of a child node without an index on its
+                        join columns
+    selective seq scan  a Seq Scan that removes most of the rows it reads
+                        with its filter
+    xmin cast           the CAST(CAST(xmin AS text) AS bigint) predicate of
+                        a sync from a checkpoint, which scans the whole table
+
+The gain of an index is estimated from the buffers it would read, about
+BTREE_DEPTH pages plus a page per row returned on every loop, against the
+buffers the scan read.
+"""
+
+import re
+import typing as t
+from dataclasses import dataclass
+
+# the pages read to descend a btree index
+BTREE_DEPTH: int = 3
+# the rows removed per row returned that make a filter selective
+SELECTIVITY: int = 10
+XMIN_CAST_RE: re.Pattern = re.compile(r"\(\(xmin\)::text\)::bigint")
+
+
+@dataclass
+class Finding:
+    kind: str
+    table: str
+    # the total time of the scan over its loops in ms
+    time: float
+    buffers: int
+    loops: int
+    detail: str
+    suggestion: str
+    # the estimated time saved by the suggestion in ms
+    gain: t.Optional[float] = None
+
+
+def walk(plan: dict) -> t.Iterator[dict]:
+    """Every node of a plan."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+
+def buffers(plan: dict) -> int:
+    """The shared buffers read (hit or from disk) by a plan node."""
+    return plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+
+
+def total_time(plan: dict) -> float:
+    """The time of a plan node over all of its loops in ms."""
+    return plan.get("Actual Total Time", 0) * plan.get("Actual Loops", 1)
+
+
+def create_index(table: str, columns: t.List[str]) -> str:
+    quoted: t.List[str] = [f'"{column}"' for column in columns]
+    return (
+        f'CREATE INDEX "idx_{table}_{"_".join(columns)}" ON '
+        f'"{table}" ({", ".join(quoted)})'
+    )
+
+
+def index_gain(plan: dict) -> float:
+    """The time an index scan would save over a seq scan node."""
+    read: int = buffers(plan)
+    if not read:
+        return 0
+    loops: int = plan.get("Actual Loops", 1)
+    # Actual Rows is the average per loop
+    estimate: float = loops * (BTREE_DEPTH + plan.get("Actual Rows", 0))
+    return total_time(plan) * max(1 - estimate / read, 0)
+
+
+def findings(
+    explain: dict, columns: t.Dict[str, t.List[str]]
+) -> t.List[Finding]:
+    """
+    The findings of an EXPLAIN (ANALYZE, BUFFERS) plan.
+
+    columns are the columns each table is looked up by i.e the columns an
+    index is suggested on.
+    """
+    values: t.List[Finding] = []
+    for plan in walk(explain["Plan"]):
+        if plan.get("Node Type") != "Seq Scan":
+            continue
+        table: str = plan.get("Relation Name", "")
+        condition: str = plan.get("Filter", "")
+        loops: int = plan.get("Actual Loops", 1)
+        removed: int = plan.get("Rows Removed by Filter", 0)
+        rows: int = plan.get("Actual Rows", 0)
+
+        if XMIN_CAST_RE.search(condition):
+            values.append(
+                Finding(
+                    kind="xmin cast",
+                    table=table,
+                    time=total_time(plan),
+                    buffers=buffers(plan),
+                    loops=loops,
+                    detail=f"Filter: {condition} removed {removed:,} rows",
+                    suggestion=(
+                        "xmin is a system column so no index or expression "
+                        "index can serve CAST(CAST(xmin AS text) AS bigint); "
+                        "every sync from a checkpoint scans the table so "
+                        "keep the daemon running rather than catching up"
+                    ),
+                )
+            )
+        elif loops > 1 or removed > SELECTIVITY * max(rows, 1):
+            suggestion: str = (
+                create_index(table, columns[table])
+                if columns.get(table)
+                else "an index on the columns of the filter"
+            )
+            values.append(
+                Finding(
+                    kind=(
+                        "lateral seq scan"
+                        if loops > 1
+                        else "selective seq scan"
+                    ),
+                    table=table,
+                    time=total_time(plan),
+                    buffers=buffers(plan),
+                    loops=loops,
+                    detail=(
+                        f"Filter: {condition} removed {removed:,} rows"
+                        if condition
+                        else f"{rows:,} rows per loop"
+                    ),
+                    suggestion=suggestion,
+                    gain=index_gain(plan),
+                )
+            )
+    return sorted(values, key=lambda finding: finding.time, reverse=True)
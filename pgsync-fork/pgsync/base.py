@@ -1,8 +1,12 @@
 """PGSync Base."""
 
+import json
 import logging
 import os
+import queue
 import random
+import re
+import sys
 import threading
 import time
 import typing as t
@@ -16,13 +20,12 @@ from .constants import (
     BUILTIN_SCHEMAS,
     DEFAULT_SCHEMA,
     DELETE,
-    LOGICAL_SLOT_PREFIX,
-    LOGICAL_SLOT_SUFFIX,
     MATERIALIZED_VIEW,
-    PLUGIN,
     TG_OPS,
     TRIGGER_FUNC,
     UPDATE,
+    WAL2JSON,
+    WAL2JSON_ACTIONS,
 )
 from .exc import (
     LogicalSlotParseError,
@@ -31,8 +34,11 @@ from .exc import (
 )
 from .settings import (
     IS_MYSQL_COMPAT,
+    LOGICAL_DECODING_PLUGIN,
     MYSQL_DATABASE,
+    PG_ASYNC_DRIVER,
     PG_DATABASE,
+    PG_DRIVER,
     PG_HOST_RO,
     PG_PASSWORD_RO,
     PG_PORT_RO,
@@ -66,6 +72,25 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# COPY text format escape sequences
+COPY_ESCAPE_RE = re.compile(r"\\(.)")
+COPY_ESCAPES: t.Dict[str, str] = {
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+    "v": "\v",
+}
+
+# a test_decoding column e.g "title"[character varying]:'it''s'
+# or the new-tuple: marker separating the old-key of an UPDATE
+COLUMN_RE = re.compile(
+    r"(new-tuple:)"
+    r'|("[^"]*(?:""[^"]*)*"|[^\s\["]+)\[([^\]]*\]*)\]:'
+    r"('[^']*(?:''[^']*)*'|\S+)"
+)
+
 SSL_MODES = (
     "allow",
     "disable",
@@ -88,9 +113,19 @@ class Payload(object):
         new (dict): The new values of the row that was affected by the event (for INSERT and UPDATE operations).
         xmin (int): The transaction ID of the event.
         indices (List[str]): The indices of the affected rows (for UPDATE and DELETE operations).
+        ts (float): The time of the change in epoch seconds (from the trigger).
     """
 
-    __slots__ = ("tg_op", "table", "schema", "old", "new", "xmin", "indices")
+    __slots__ = (
+        "tg_op",
+        "table",
+        "schema",
+        "old",
+        "new",
+        "xmin",
+        "indices",
+        "ts",
+    )
 
     def __init__(
         self,
@@ -101,14 +136,40 @@ class Payload(object):
         new: t.Optional[t.Dict[str, t.Any]] = None,
         xmin: t.Optional[int] = None,
         indices: t.Optional[t.List[str]] = None,
+        ts: t.Optional[float] = None,
     ):
-        self.tg_op: t.Optional[str] = tg_op
-        self.table: t.Optional[str] = table
-        self.schema: t.Optional[str] = schema
+        # interned so that the few distinct names are shared across payloads
+        self.tg_op: t.Optional[str] = tg_op and sys.intern(tg_op)
+        self.table: t.Optional[str] = table and sys.intern(table)
+        self.schema: t.Optional[str] = schema and sys.intern(schema)
         self.old: t.Dict[str, t.Any] = old or {}
         self.new: t.Dict[str, t.Any] = new or {}
         self.xmin: t.Optional[int] = xmin
         self.indices: t.List[str] = indices
+        self.ts: t.Optional[float] = ts
+
+    @classmethod
+    def from_dict(cls, item: dict) -> "Payload":
+        """
+        Create a payload from a decoded queue item.
+
+        This bypasses __init__ and reuses the old/new dicts of the item
+        without copying them.
+        """
+        payload: Payload = cls.__new__(cls)
+        get: t.Callable = item.get
+        tg_op: t.Optional[str] = get("tg_op")
+        table: t.Optional[str] = get("table")
+        schema: t.Optional[str] = get("schema")
+        payload.tg_op = tg_op and sys.intern(tg_op)
+        payload.table = table and sys.intern(table)
+        payload.schema = schema and sys.intern(schema)
+        payload.old = get("old") or {}
+        payload.new = get("new") or {}
+        payload.xmin = get("xmin")
+        payload.indices = get("indices")
+        payload.ts = get("ts")
+        return payload
 
     @property
     def data(self) -> dict:
@@ -199,6 +260,12 @@ class Base(object):
         "uuid",
         "varchar",
     )
+    # type to converter of logical decoding values
+    CONVERTERS: t.Dict[str, t.Callable] = {
+        **{type_: int for type_ in INT_TYPES},
+        **{type_: float for type_ in FLOAT_TYPES},
+        "boolean": lambda value: value == "true",
+    }
 
     def __init__(
         self, database: str, verbose: bool = False, *args, **kwargs
@@ -236,9 +303,12 @@ class Base(object):
         self.__materialized_views: dict = {}
         self.__tables: dict = {}
         self.__columns: dict = {}
+        self.__advisory_keys: dict = {}
         self.verbose: bool = verbose
         self._conn = None
         self._session = None
+        # created on first use from within the event loop
+        self.__async_engine = None
 
     def connect(self) -> None:
         """Connect to database."""
@@ -262,6 +332,23 @@ class Base(object):
         except (TypeError, IndexError):
             return None
 
+    def pg_settings_many(
+        self, columns: t.List[str]
+    ) -> t.List[t.Optional[str]]:
+        """Get several pg_settings values in a single round trip."""
+        return [
+            row[0] if row else None
+            for row in self.fetchone_many(
+                [
+                    sa.select(sa.text("setting"))
+                    .select_from(sa.text("pg_settings"))
+                    .where(sa.column("name") == column)
+                    for column in columns
+                ],
+                label="pg_settings",
+            )
+        ]
+
     @property
     def is_mysql_compat(self) -> bool:
         """
@@ -368,6 +455,13 @@ class Base(object):
             return self.__engine_ro
         return self.__engine
 
+    @property
+    def async_engine(self):
+        """Get the asyncio database engine used when USE_ASYNC is enabled."""
+        if self.__async_engine is None:
+            self.__async_engine = _pg_async_engine(self.engine.url)
+        return self.__async_engine
+
     @property
     def schemas(self) -> dict:
         """Get the database schema names."""
@@ -479,7 +573,7 @@ class Base(object):
     def replication_slots(
         self,
         slot_name: str,
-        plugin: str = PLUGIN,
+        plugin: str = LOGICAL_DECODING_PLUGIN,
         slot_type: str = "logical",
     ) -> t.List[str]:
         """List replication slots.
@@ -519,7 +613,7 @@ class Base(object):
                     sa.select("*").select_from(
                         sa.func.PG_CREATE_LOGICAL_REPLICATION_SLOT(
                             slot_name,
-                            PLUGIN,
+                            LOGICAL_DECODING_PLUGIN,
                         )
                     )
                 )
@@ -548,6 +642,11 @@ class Base(object):
 
     def advisory_key(self, slot_name: str) -> int:
         """Compute a stable bigint advisory key from slot name."""
+        if slot_name not in self.__advisory_keys:
+            self.__advisory_keys[slot_name] = self._advisory_key(slot_name)
+        return self.__advisory_keys[slot_name]
+
+    def _advisory_key(self, slot_name: str) -> t.Union[int, str]:
         if self.is_mysql_compat:
             # 'adv:' + 60 hex chars = 64 total; deterministic and safe for GET_LOCK
             row = self.fetchone(
@@ -686,6 +785,7 @@ class Base(object):
         upto_nchanges: t.Optional[int] = None,
         limit: t.Optional[int] = None,
         offset: t.Optional[int] = None,
+        options: t.Optional[t.List[str]] = None,
     ) -> sa.sql.Select:
         """
         Returns a SQLAlchemy Select statement that selects changes from a logical replication slot.
@@ -699,6 +799,7 @@ class Base(object):
             upto_nchanges (Optional[int], optional): The maximum number of changes to read. Defaults to None.
             limit (Optional[int], optional): The maximum number of rows to return. Defaults to None.
             offset (Optional[int], optional): The number of rows to skip before returning. Defaults to None.
+            options (Optional[List[str]], optional): Output plugin options as name/value pairs. Defaults to None.
 
         Returns:
             sa.sql.Select: A SQLAlchemy Select statement that selects changes from the logical replication slot.
@@ -712,6 +813,7 @@ class Base(object):
                 slot_name,
                 upto_lsn,
                 upto_nchanges,
+                *(options or []),
             )
         )
         if txmin is not None:
@@ -738,6 +840,26 @@ class Base(object):
             statement = statement.offset(offset)
         return statement
 
+    def retained_wal(self, slot_name: str) -> t.Optional[int]:
+        """Get the WAL bytes retained by a replication slot.
+
+        SELECT PG_WAL_LSN_DIFF(PG_CURRENT_WAL_LSN(), restart_lsn)
+        FROM PG_REPLICATION_SLOTS WHERE slot_name = :slot_name
+        """
+        row: t.Optional[sa.engine.Row] = self.fetchone(
+            sa.select(
+                sa.func.PG_WAL_LSN_DIFF(
+                    sa.func.PG_CURRENT_WAL_LSN(), sa.column("restart_lsn")
+                )
+            )
+            .select_from(sa.text("PG_REPLICATION_SLOTS"))
+            .where(sa.column("slot_name") == slot_name),
+            label="retained_wal",
+        )
+        if row is None or row[0] is None:
+            return None
+        return int(row[0])
+
     @property
     def current_wal_lsn(self) -> str:
         return self.fetchone(
@@ -755,6 +877,7 @@ class Base(object):
         upto_nchanges: t.Optional[int] = None,
         limit: t.Optional[int] = None,
         offset: t.Optional[int] = None,
+        options: t.Optional[t.List[str]] = None,
     ) -> None:
         """Get/Consume changes from a logical replication slot.
 
@@ -776,6 +899,7 @@ class Base(object):
                 upto_nchanges=upto_nchanges,
                 limit=limit,
                 offset=offset,
+                options=options,
             )
             self.execute(
                 statement, options=dict(stream_results=STREAM_RESULTS)
@@ -790,6 +914,7 @@ class Base(object):
         upto_nchanges: t.Optional[int] = None,
         limit: t.Optional[int] = None,
         offset: t.Optional[int] = None,
+        options: t.Optional[t.List[str]] = None,
     ) -> t.List[sa.engine.row.Row]:
         """Peek a logical replication slot without consuming changes.
 
@@ -807,9 +932,51 @@ class Base(object):
                 upto_nchanges=upto_nchanges,
                 limit=limit,
                 offset=offset,
+                options=options,
             )
             return self.fetchall(statement)
 
+    def logical_slot_stream_changes(
+        self,
+        slot_name: str,
+        txmin: t.Optional[int] = None,
+        txmax: t.Optional[int] = None,
+        upto_lsn: t.Optional[str] = None,
+        upto_nchanges: t.Optional[int] = None,
+        limit: t.Optional[int] = None,
+        offset: t.Optional[int] = None,
+        chunk_size: t.Optional[int] = None,
+        options: t.Optional[t.List[str]] = None,
+    ) -> t.Iterator[sa.engine.row.Row]:
+        """Peek a logical replication slot streaming rows from the server.
+
+        Unlike logical_slot_peek_changes, rows are fetched from a server side
+        cursor in chunks so the page is never fully materialized client side.
+        """
+        with self.advisory_lock(
+            slot_name, max_retries=None, retry_interval=0.1
+        ):
+            statement: sa.sql.Select = self._logical_slot_changes(
+                slot_name,
+                sa.func.PG_LOGICAL_SLOT_PEEK_CHANGES,
+                txmin=txmin,
+                txmax=txmax,
+                upto_lsn=upto_lsn,
+                upto_nchanges=upto_nchanges,
+                limit=limit,
+                offset=offset,
+                options=options,
+            )
+            with self.engine.connect() as conn:
+                result = conn.execution_options(stream_results=True).execute(
+                    statement
+                )
+                for partition in result.partitions(
+                    chunk_size or QUERY_CHUNK_SIZE
+                ):
+                    yield from partition
+                result.close()
+
     def logical_slot_count_changes(
         self,
         slot_name: str,
@@ -817,6 +984,7 @@ class Base(object):
         txmax: t.Optional[int] = None,
         upto_lsn: t.Optional[str] = None,
         upto_nchanges: t.Optional[int] = None,
+        options: t.Optional[t.List[str]] = None,
     ) -> int:
         statement: sa.sql.Select = self._logical_slot_changes(
             slot_name,
@@ -825,6 +993,7 @@ class Base(object):
             txmax=txmax,
             upto_lsn=upto_lsn,
             upto_nchanges=upto_nchanges,
+            options=options,
         )
         with self.engine.connect() as conn:
             return conn.execute(
@@ -1040,6 +1209,75 @@ class Base(object):
             label="txid_current",
         )[0]
 
+    @property
+    def server_version_num(self) -> int:
+        """Get the server version number e.g 140005."""
+        return int(self.pg_settings("server_version_num") or 0)
+
+    @contextmanager
+    def export_snapshot(self) -> t.Iterator[str]:
+        """
+        Export the snapshot of a repeatable read transaction.
+
+        The transaction is held open until the context exits so that other
+        connections can import the snapshot and read the same data.
+
+        SELECT PG_EXPORT_SNAPSHOT()
+        """
+        with self.engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="REPEATABLE READ")
+            with conn.begin():
+                snapshot: str = conn.execute(
+                    sa.select(sa.func.PG_EXPORT_SNAPSHOT())
+                ).scalar()
+                logger.debug(f"Exported snapshot: {snapshot}")
+                yield snapshot
+
+    def _import_snapshot(self, conn: sa.engine.Connection) -> None:
+        """Start the transaction of conn in the snapshot of this thread."""
+        snapshot: t.Optional[str] = getattr(
+            self._thread_local, "snapshot", None
+        )
+        if snapshot is None:
+            return
+        conn.exec_driver_sql("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        conn.exec_driver_sql(f"SET TRANSACTION SNAPSHOT '{snapshot}'")
+
+    def relation_pages(self, schema: str, table: str) -> int:
+        """Get the number of heap pages of a table."""
+        return self.fetchone(
+            sa.select(
+                sa.func.PG_RELATION_SIZE(
+                    sa.cast(
+                        sa.literal(qname(self.engine, schema, table)),
+                        postgresql.REGCLASS,
+                    )
+                )
+                / sa.cast(sa.func.CURRENT_SETTING("block_size"), sa.BigInteger)
+            ),
+            label="relation_pages",
+        )[0]
+
+    def quantiles(self, column: sa.Column, count: int) -> t.List[t.Any]:
+        """
+        Get the values splitting a column into count equal sized ranges.
+
+        SELECT PERCENTILE_DISC(ARRAY[0.25, 0.5, 0.75])
+        WITHIN GROUP (ORDER BY id) FROM book
+        """
+        fractions: t.List[float] = [i / count for i in range(1, count)]
+        if not fractions:
+            return []
+        values: t.Optional[list] = self.fetchone(
+            sa.select(
+                sa.func.PERCENTILE_DISC(
+                    sa.literal(fractions, postgresql.ARRAY(sa.Float))
+                ).within_group(column)
+            ),
+            label="quantiles",
+        )[0]
+        return [value for value in values or [] if value is not None]
+
     def pg_visible_in_snapshot(
         self, literal_binds: bool = False
     ) -> t.Callable[[t.List[int]], dict]:
@@ -1071,95 +1309,100 @@ class Base(object):
 
         return _pg_visible_in_snapshot
 
-    def parse_value(self, type_: str, value: str) -> t.Optional[str]:
+    def parse_logical_slot(self, row: str) -> Payload:
         """
-        Parse datatypes from db.
+        Parse a test_decoding row in a single pass.
 
-        NB: All integers are long in python3 and call to convert is just int
+        e.g
+            table public."Book": UPDATE: old-key: id[integer]:1
+            new-tuple: id[integer]:2 title[text]:'it''s'
+            tags[text[]]:'{a,b}'
         """
-        if self.verbose:
-            logger.debug(f"type: {type_} value: {value}")
-        if value.lower() == "null":
-            return None
-        if type_.lower() in self.INT_TYPES:
-            try:
-                value = int(value)
-            except ValueError:
-                raise
-        if type_.lower() in self.CHAR_TYPES:
-            value = value.lstrip("'").rstrip("'")
-        if type_.lower() == "boolean":
-            value = bool(value)
-        if type_.lower() in self.FLOAT_TYPES:
-            try:
-                value = float(value)
-            except ValueError:
-                raise
-        return value
-
-    def parse_logical_slot(self, row: str) -> Payload:
-
-        def _parse_logical_slot(data: str) -> t.Iterator[t.Tuple[str, t.Any]]:
-            pos: int = 0
-            while True:
-                match = LOGICAL_SLOT_SUFFIX.search(data, pos)
-                if not match:
-                    break
-
-                key = (match.groupdict().get("key") or "").replace('"', "")
-                raw_value = match.groupdict().get("value") or ""
-                type_ = match.groupdict().get("type") or ""
-
-                parsed = self.parse_value(type_, raw_value)
-                yield key, parsed
-
-                start, end = match.span()
-                # advance safely even if the pattern can match zero-length
-                pos = end if end > start else end + 1
-
-        match = LOGICAL_SLOT_PREFIX.search(row)
-        if not match:
+        try:
+            if not row.startswith("table "):
+                raise ValueError
+            schema, pos = _identifier(row, 6, ".")
+            table, pos = _identifier(row, pos + 1, ":")
+            end: int = row.index(":", pos + 2)
+        except (IndexError, ValueError):
             raise LogicalSlotParseError(f"No match for row: {row}")
 
-        data: dict = {"old": None, "new": None}
-        data.update(**match.groupdict())
-        payload: Payload = Payload(**data)
-
-        span = match.span()
-        # including trailing space below is deliberate
-        suffix: str = f"{row[span[1]:]} "
-
-        if "old-key" in suffix and "new-tuple" in suffix:
-            # this can only be an UPDATE operation
-            if payload.tg_op != UPDATE:
-                msg = f"Unknown {payload.tg_op} operation for row: {row}"
-                raise LogicalSlotParseError(msg)
-
-            i: int = suffix.find("old-key:")
-            if i > -1:
-                j: int = suffix.find("new-tuple:")
-                if j > -1:
-                    s: str = suffix[i + len("old-key:") : j]
-                    for key, value in _parse_logical_slot(s):
-                        payload.old[key] = value
-
-            i = suffix.find("new-tuple:")
-            if i > -1:
-                s = suffix[i + len("new-tuple:") :]
-                for key, value in _parse_logical_slot(s):
-                    payload.new[key] = value
-        else:
-            # this can be an INSERT, DELETE, UPDATE or TRUNCATE operation
-            if payload.tg_op not in TG_OPS:
+        tg_op: str = row[pos + 2 : end]
+        if tg_op not in TG_OPS:
+            raise LogicalSlotParseError(
+                f"Unknown {tg_op} operation for row: {row}"
+            )
+        payload: Payload = Payload(tg_op=tg_op, table=table, schema=schema)
+        # columns before new-tuple: belong to the old-key of an UPDATE
+        values: dict = payload.new
+        if row.startswith(" old-key:", end + 1):
+            if tg_op != UPDATE:
                 raise LogicalSlotParseError(
-                    f"Unknown {payload.tg_op} operation for row: {row}"
+                    f"Unknown {tg_op} operation for row: {row}"
                 )
+            values = payload.old
 
-            for key, value in _parse_logical_slot(suffix):
-                payload.new[key] = value
+        converters: dict = self.CONVERTERS
+        for new_tuple, key, type_, value in COLUMN_RE.findall(row, end + 1):
+            if new_tuple:
+                values = payload.new
+                continue
+            if key[0] == '"':
+                key = key[1:-1].replace('""', '"')
+            if value[0] == "'":
+                value = value[1:-1]
+                if "''" in value:
+                    value = value.replace("''", "'")
+            elif value == "null":
+                value = None
+            elif value == "unchanged-toast-datum":
+                # the old value was not logged so we cannot know it
+                continue
+            elif type_ in converters:
+                value = converters[type_](value)
+            values[key] = value
+        return payload
+
+    def parse_wal2json(self, row: str) -> t.Optional[Payload]:
+        """
+        Parse a wal2json (format-version 2) row.
 
+        Transaction boundaries and logical messages return None.
+        """
+        try:
+            data: dict = json.loads(row)
+        except ValueError:
+            raise LogicalSlotParseError(f"No match for row: {row}")
+        tg_op: t.Optional[str] = WAL2JSON_ACTIONS.get(data.get("action"))
+        if tg_op is None:
+            # B(egin), C(ommit) and M(essage)
+            return None
+        payload: Payload = Payload(
+            tg_op=tg_op,
+            table=data["table"],
+            schema=data["schema"],
+        )
+        for column in data.get("identity", ()):
+            payload.old[column["name"]] = column["value"]
+        for column in data.get("columns", ()):
+            payload.new[column["name"]] = column["value"]
+        if tg_op == DELETE:
+            # keep the key tuple where test_decoding puts it
+            payload.new = payload.old
         return payload
 
+    def decode_logical_slot(self, row: str) -> t.Optional[Payload]:
+        """
+        Parse a logical decoding row of the configured output plugin.
+
+        Transaction boundaries (BEGIN/COMMIT) return None.
+        """
+        if LOGICAL_DECODING_PLUGIN == WAL2JSON:
+            return self.parse_wal2json(row)
+        if row.startswith("BEGIN") or row.startswith("COMMIT"):
+            return None
+        return self.parse_logical_slot(row)
+
     # Querying...
     def execute(
         self,
@@ -1183,6 +1426,35 @@ class Base(object):
         with self.engine.connect() as conn:
             return conn.execute(statement).fetchone()
 
+    def fetchone_many(
+        self,
+        statements: t.List[sa.sql.Select],
+        label: t.Optional[str] = None,
+    ) -> t.List[t.Optional[tuple]]:
+        """
+        Fetch the first row of each statement.
+
+        With psycopg (3) the statements are sent in pipeline mode so they
+        cost a single round trip instead of one each.
+        """
+        if self.verbose:
+            for statement in statements:
+                compiled_query(statement, label=label)
+
+        with self.engine.connect() as conn:
+            if PG_DRIVER != "psycopg":
+                return [
+                    conn.execute(statement).fetchone()
+                    for statement in statements
+                ]
+            driver_conn = conn.connection.driver_connection
+            with driver_conn.pipeline():
+                cursors: list = [
+                    driver_conn.execute(*_compile(conn, statement))
+                    for statement in statements
+                ]
+            return [cursor.fetchone() for cursor in cursors]
+
     def fetchall(
         self,
         statement: sa.sql.Select,
@@ -1196,6 +1468,24 @@ class Base(object):
         with self.engine.connect() as conn:
             return conn.execute(statement).fetchall()
 
+    def explain(self, statement: sa.sql.Select, analyze: bool = True) -> dict:
+        """
+        The EXPLAIN (FORMAT JSON) plan of a query statement.
+
+        With analyze the query is run and the plan has the actual times,
+        rows and buffers of every node.
+        """
+        options: str = "ANALYZE, BUFFERS, " if analyze else ""
+        with self.engine.connect() as conn:
+            sql, params = _compile(conn, statement)
+            plan: t.Any = conn.exec_driver_sql(
+                f"EXPLAIN ({options}FORMAT JSON) {sql}", params
+            ).scalar()
+            conn.rollback()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]
+
     def exists(
         self,
         statement: sa.sql.Select,
@@ -1218,7 +1508,11 @@ class Base(object):
     ):
         chunk_size = chunk_size or QUERY_CHUNK_SIZE
         stream_results = stream_results or STREAM_RESULTS
+        if PG_DRIVER == "psycopg" and stream_results:
+            yield from self._fetchmany_binary(statement, chunk_size)
+            return
         with self.engine.connect() as conn:
+            self._import_snapshot(conn)
             result = conn.execution_options(
                 stream_results=stream_results
             ).execute(statement.select())
@@ -1228,6 +1522,80 @@ class Base(object):
             result.close()
         self.engine.clear_compiled_cache()
 
+    def _fetchmany_binary(
+        self, statement: sa.sql.Select, chunk_size: int
+    ) -> t.Iterator[tuple]:
+        """
+        Stream rows from a psycopg (3) server side cursor in binary format.
+
+        The binary format avoids formatting the values as text on the server
+        and parsing them again in Python e.g numeric, timestamps and jsonb.
+        """
+        with self.engine.connect() as conn:
+            self._import_snapshot(conn)
+            driver_conn = conn.connection.driver_connection
+            with driver_conn.cursor(
+                name=f"pgsync_{id(self):x}_{threading.get_ident():x}",
+                binary=True,
+            ) as cursor:
+                cursor.itersize = chunk_size
+                cursor.execute(*_compile(conn, statement.select()))
+                while True:
+                    rows: list = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    for keys, row, *primary_keys in rows:
+                        yield keys, row, primary_keys
+        self.engine.clear_compiled_cache()
+
+    async def async_fetchmany(
+        self,
+        statement: sa.sql.Select,
+        chunk_size: t.Optional[int] = None,
+    ) -> t.AsyncGenerator:
+        """Async counterpart of fetchmany using a server side cursor."""
+        chunk_size = chunk_size or QUERY_CHUNK_SIZE
+        async with self.async_engine.connect() as conn:
+            result = await conn.stream(statement.select())
+            async for partition in result.partitions(chunk_size):
+                for keys, row, *primary_keys in partition:
+                    # asyncpg returns json as text
+                    if isinstance(keys, str):
+                        keys = json.loads(keys)
+                    if isinstance(row, str):
+                        row = json.loads(row)
+                    yield keys, row, primary_keys
+            await result.close()
+        self.async_engine.sync_engine.clear_compiled_cache()
+
+    def fetchcopy(
+        self, statement: sa.sql.Select
+    ) -> t.Iterator[t.List[t.Optional[str]]]:
+        """
+        Stream the rows of a query with COPY (...) TO STDOUT.
+
+        This avoids the per row protocol overhead of a cursor. Each row is
+        yielded as a list of the column values in text format e.g json
+        columns are the JSON text and NULL is None.
+        """
+        with self.engine.connect() as conn:
+            self._import_snapshot(conn)
+            sql, params = _compile(conn, statement.select())
+            driver_conn = conn.connection.driver_connection
+            if PG_DRIVER == "psycopg":
+                with driver_conn.cursor() as cursor:
+                    with cursor.copy(
+                        f"COPY ({sql}) TO STDOUT", params
+                    ) as copy:
+                        yield from _copy_rows(bytes(data) for data in copy)
+            else:
+                # COPY cannot take bind parameters so inline them
+                sql = driver_conn.cursor().mogrify(sql, params).decode()
+                yield from _copy_rows(
+                    _copy_expert(driver_conn, f"COPY ({sql}) TO STDOUT")
+                )
+        self.engine.clear_compiled_cache()
+
     def fetchcount(self, statement: sa.sql.Subquery) -> int:
         with self.engine.connect() as conn:
             return conn.execute(
@@ -1237,6 +1605,116 @@ class Base(object):
             ).scalar()
 
 
+def _identifier(data: str, pos: int, stop: str) -> t.Tuple[str, int]:
+    """
+    Read a possibly double quoted identifier starting at pos.
+
+    Returns the unquoted identifier and the position of the stop character.
+    """
+    if data[pos] != '"':
+        end: int = data.index(stop, pos)
+        return data[pos:end], end
+    end = data.index('"', pos + 1)
+    while data[end + 1] == '"':
+        end = data.index('"', end + 2)
+    return data[pos + 1 : end].replace('""', '"'), end + 1
+
+
+def _compile(
+    conn: sa.engine.Connection, statement: sa.sql.Select
+) -> t.Tuple[str, dict]:
+    """Compile a statement to SQL and parameters for the raw DBAPI conn."""
+    compiled = statement.compile(
+        dialect=conn.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    return str(compiled), compiled.params
+
+
+def _copy_unescape(value: str) -> t.Optional[str]:
+    """Decode a COPY text format column value."""
+    if value == "\\N":
+        return None
+    if "\\" not in value:
+        return value
+    return COPY_ESCAPE_RE.sub(
+        lambda match: COPY_ESCAPES.get(match.group(1), match.group(1)), value
+    )
+
+
+def _copy_rows(
+    chunks: t.Iterable[bytes],
+) -> t.Iterator[t.List[t.Optional[str]]]:
+    """Split a COPY text format stream into rows of column values."""
+    rest: bytes = b""
+    for chunk in chunks:
+        if rest:
+            chunk = rest + chunk
+        lines: t.List[bytes] = chunk.split(b"\n")
+        rest = lines.pop()
+        for line in lines:
+            # literal tabs and newlines are escaped within a value
+            yield list(map(_copy_unescape, line.decode().split("\t")))
+
+
+def _copy_expert(
+    conn: t.Any, sql: str, maxsize: int = 64, buffer_size: int = 1 << 16
+) -> t.Iterator[bytes]:
+    """
+    Stream the output of a psycopg2 copy_expert.
+
+    copy_expert writes the whole output to a file object before returning
+    so it runs in a thread writing to a bounded queue.
+    """
+    chunks: queue.Queue = queue.Queue(maxsize=maxsize)
+    done: object = object()
+
+    class Writer(object):
+        def __init__(self):
+            self.buffer: t.List[bytes] = []
+            self.size: int = 0
+
+        def write(self, data: t.Union[bytes, str]) -> None:
+            if isinstance(data, str):
+                data = data.encode()
+            self.buffer.append(data)
+            self.size += len(data)
+            if self.size >= buffer_size:
+                self.flush()
+
+        def flush(self) -> None:
+            if self.buffer:
+                chunks.put(b"".join(self.buffer))
+                self.buffer, self.size = [], 0
+
+    def copy() -> None:
+        writer: Writer = Writer()
+        try:
+            conn.cursor().copy_expert(sql, writer)
+            writer.flush()
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            chunks.put(done)
+
+    thread: threading.Thread = threading.Thread(target=copy, daemon=True)
+    thread.start()
+    try:
+        while True:
+            chunk: t.Any = chunks.get()
+            if chunk is done:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        if thread.is_alive():
+            # the consumer stopped early
+            conn.cancel()
+            while chunks.get() is not done:
+                pass
+        thread.join()
+
+
 # helper methods
 
 
@@ -1383,6 +1861,46 @@ def _pg_engine(
     )
 
 
+def _pg_async_engine(url: sa.engine.URL, echo: bool = False):
+    """
+    Return an asyncio engine for the database of a (sync) engine url.
+
+    The driver is PG_ASYNC_DRIVER, either asyncpg or psycopg (3).
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    connect_args: dict = {}
+    if PG_SSLMODE:
+        if PG_ASYNC_DRIVER == "asyncpg":
+            connect_args["ssl"] = PG_SSLMODE
+        else:
+            connect_args["sslmode"] = PG_SSLMODE
+            if PG_SSLROOTCERT:
+                connect_args["sslrootcert"] = PG_SSLROOTCERT
+
+    url = url.set(drivername=f"postgresql+{PG_ASYNC_DRIVER}")
+    if SQLALCHEMY_USE_NULLPOOL:
+        from sqlalchemy.pool import NullPool
+
+        return create_async_engine(
+            url,
+            echo=echo,
+            connect_args=connect_args,
+            poolclass=NullPool,
+        )
+
+    return create_async_engine(
+        url,
+        echo=echo,
+        connect_args=connect_args,
+        pool_size=SQLALCHEMY_POOL_SIZE,
+        max_overflow=SQLALCHEMY_MAX_OVERFLOW,
+        pool_pre_ping=SQLALCHEMY_POOL_PRE_PING,
+        pool_recycle=SQLALCHEMY_POOL_RECYCLE,
+        pool_timeout=SQLALCHEMY_POOL_TIMEOUT,
+    )
+
+
 def pg_execute(
     engine: sa.engine.Engine,
     statement: sa.sql.Select,
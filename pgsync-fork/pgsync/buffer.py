@@ -0,0 +1,149 @@
+"""PGSync PayloadBuffer."""
+
+import logging
+import pickle
+import sys
+import tempfile
+import typing as t
+from itertools import groupby
+
+from .base import Payload
+
+logger = logging.getLogger(__name__)
+
+
+def sizeof(payload: Payload) -> int:
+    """
+    Approximate the in-memory size of a payload in bytes.
+
+    This only looks one level deep into the old/new row values which is
+    where nearly all of the memory of a decoded change is held.
+    """
+    size: int = sys.getsizeof(payload)
+    for values in (payload.old, payload.new):
+        if values:
+            size += sys.getsizeof(values)
+            for key, value in values.items():
+                size += sys.getsizeof(key) + sys.getsizeof(value)
+    return size
+
+
+class PayloadBuffer(object):
+    """
+    Append-only buffer of payloads with a hard memory budget.
+
+    Payloads are held in memory until the budget is exhausted, after which
+    any further payloads are pickled to an anonymous temporary file.
+    Iterating over the buffer yields all payloads in insertion order.
+
+    e.g
+        with PayloadBuffer(budget=64 * 1024 * 1024) as buffer:
+            for payload in payloads:
+                buffer.append(payload)
+            for batch in buffer.batches(chunk_size=5000):
+                ...
+    """
+
+    def __init__(self, budget: int, dirpath: t.Optional[str] = None):
+        self.budget: int = budget
+        self.dirpath: t.Optional[str] = dirpath
+        # approximate size of the payloads currently held in memory
+        self.nbytes: int = 0
+        # high-water mark of self.nbytes over the lifetime of the buffer
+        self.peak: int = 0
+        self.spilled: int = 0
+        self._memory: t.List[t.Tuple[Payload, int]] = []
+        self._file: t.Optional[t.IO[bytes]] = None
+
+    def __len__(self) -> int:
+        return len(self._memory) + self.spilled
+
+    def __enter__(self) -> "PayloadBuffer":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def append(self, payload: Payload) -> None:
+        size: int = sizeof(payload)
+        if self._file is None and (
+            not self._memory or self.nbytes + size <= self.budget
+        ):
+            self._memory.append((payload, size))
+            self.nbytes += size
+            self.peak = max(self.peak, self.nbytes)
+            return
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(
+                prefix="pgsync-", suffix=".spill", dir=self.dirpath
+            )
+            logger.warning(
+                f"Memory budget of {self.budget} bytes exceeded after "
+                f"{len(self._memory)} payloads; spilling to disk"
+            )
+        pickle.dump(
+            (
+                payload.tg_op,
+                payload.table,
+                payload.schema,
+                payload.old,
+                payload.new,
+                payload.xmin,
+                payload.indices,
+            ),
+            self._file,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        self.spilled += 1
+
+    def __iter__(self) -> t.Iterator[t.Tuple[Payload, int]]:
+        yield from self._memory
+        if self._file is None:
+            return
+        self._file.flush()
+        self._file.seek(0)
+        for _ in range(self.spilled):
+            tg_op, table, schema, old, new, xmin, indices = pickle.load(
+                self._file
+            )
+            payload: Payload = Payload(
+                tg_op=tg_op,
+                table=table,
+                schema=schema,
+                old=old,
+                new=new,
+                xmin=xmin,
+                indices=indices,
+            )
+            yield payload, sizeof(payload)
+
+    def batches(self, chunk_size: int) -> t.Iterator[t.List[Payload]]:
+        """
+        Yield consecutive runs of the same (tg_op, table).
+
+        Each run is further split so that no batch holds more than
+        chunk_size payloads or more than the memory budget.
+        """
+        for _, run in groupby(
+            self, key=lambda item: (item[0].tg_op, item[0].table)
+        ):
+            batch: t.List[Payload] = []
+            nbytes: int = 0
+            for payload, size in run:
+                if batch and (
+                    len(batch) >= chunk_size or nbytes + size > self.budget
+                ):
+                    yield batch
+                    batch, nbytes = [], 0
+                batch.append(payload)
+                nbytes += size
+            if batch:
+                yield batch
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._memory = []
+        self.nbytes = 0
+        self.spilled = 0
@@ -186,6 +186,19 @@ META = "_meta"
 
 # Logical decoding output plugin
 PLUGIN = "test_decoding"
+WAL2JSON = "wal2json"
+LOGICAL_DECODING_PLUGINS = [
+    PLUGIN,
+    WAL2JSON,
+]
+
+# wal2json format-version 2 actions
+WAL2JSON_ACTIONS = {
+    "I": "INSERT",
+    "U": "UPDATE",
+    "D": "DELETE",
+    "T": "TRUNCATE",
+}
 
 # Trigger function
 TRIGGER_FUNC = "table_notify"
@@ -202,6 +215,25 @@ MATERIALIZED_VIEW_COLUMNS = [
     "columns",
 ]
 
+# Index settings applied while bulk loading an index
+BULK_LOAD_INDEX_SETTINGS = {
+    "index.refresh_interval": "-1",
+    "index.number_of_replicas": "0",
+    "index.translog.durability": "async",
+}
+
+# Search time units (in seconds) e.g the index.refresh_interval
+TIME_UNITS = {
+    "nanos": 1e-9,
+    "micros": 1e-6,
+    "ms": 1e-3,
+    "s": 1,
+    "m": 60,
+    "h": 3600,
+    "d": 86400,
+}
+TIME_VALUE = re.compile(r"(?P<value>-?\d+(?:\.\d+)?)(?P<unit>[a-z]+)?")
+
 # Primary key delimiter
 PRIMARY_KEY_DELIMITER = "|"
 
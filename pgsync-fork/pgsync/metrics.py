@@ -0,0 +1,440 @@
+"""
+PGSync Metrics.
+
+Counters, gauges and histograms labelled per index and an embedded HTTP
+endpoint exposing them in the Prometheus text format which Prometheus and
+any OpenMetrics scraper can read.
+
+The endpoint is started with METRICS_PORT. Without it (or REDIS_STATS which
+publishes the totals of each index for pgsync top) nothing is recorded and
+the instrumentation is a no-op.
+
+e.g
+    curl http://localhost:9100/metrics
+    # HELP pgsync_notifications_total Database notifications received.
+    # TYPE pgsync_notifications_total counter
+    pgsync_notifications_total{index="cmm-search-artifact"} 42.0
+"""
+
+import bisect
+import logging
+import threading
+import time
+import typing as t
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+# latencies from a millisecond to a few minutes
+DEFAULT_BUCKETS: t.Tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+)
+# the per doc transform and plugin time
+DOC_BUCKETS: t.Tuple[float, ...] = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+)
+
+REGISTRY: t.List["Metric"] = []
+
+
+def enabled() -> bool:
+    """Whether the metrics are recorded i.e METRICS_PORT or REDIS_STATS."""
+    return settings.METRICS_PORT is not None or settings.REDIS_STATS
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric(object):
+    """A metric family with a value per set of label values."""
+
+    kind: str = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: t.Sequence[str] = (),
+    ):
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labelnames: t.Tuple[str, ...] = tuple(labelnames)
+        self._values: t.Dict[t.Tuple[str, ...], t.Any] = {}
+        self._lock: threading.Lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> t.Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(
+        self, key: t.Tuple[str, ...], extra: t.Optional[dict] = None
+    ) -> str:
+        pairs: t.List[t.Tuple[str, str]] = list(zip(self.labelnames, key))
+        pairs.extend((extra or {}).items())
+        if not pairs:
+            return ""
+        return (
+            "{"
+            + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+            + "}"
+        )
+
+    def _samples(self) -> t.Iterator[str]:
+        with self._lock:
+            values: t.List[t.Tuple[t.Tuple[str, ...], t.Any]] = sorted(
+                self._values.items()
+            )
+        for key, value in values:
+            yield f"{self.name}{self._labels(key)} {_format(value)}"
+
+    def render(self) -> t.List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+
+class Counter(Metric):
+    """A value that only goes up e.g events received."""
+
+    kind: str = "counter"
+
+    def inc(self, amount: float = 1, **labels: t.Any) -> None:
+        if not enabled():
+            return
+        key: t.Tuple[str, ...] = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that goes up and down e.g the depth of a queue."""
+
+    kind: str = "gauge"
+
+    def set(self, value: float, **labels: t.Any) -> None:
+        if not enabled():
+            return
+        key: t.Tuple[str, ...] = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """The distribution of observed values e.g request latencies."""
+
+    kind: str = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: t.Sequence[str] = (),
+        buckets: t.Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets: t.Tuple[float, ...] = (*sorted(buckets), float("inf"))
+
+    def observe(self, value: float, **labels: t.Any) -> None:
+        if not enabled():
+            return
+        key: t.Tuple[str, ...] = self._key(labels)
+        i: int = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            # the count of each bucket, the sum and the count
+            state: t.Optional[list] = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels: t.Any) -> t.Iterator[None]:
+        """Observe the time spent in the block."""
+        since: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - since, **labels)
+
+    def timed(self, iterable: t.Iterable, **labels: t.Any) -> t.Iterator:
+        """Iterate and observe the total time spent waiting for items."""
+        if not enabled():
+            yield from iterable
+            return
+        iterator: t.Iterator = iter(iterable)
+        elapsed: float = 0
+        try:
+            while True:
+                since: float = time.perf_counter()
+                try:
+                    item: t.Any = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - since
+                yield item
+        finally:
+            self.observe(elapsed, **labels)
+
+    async def async_timed(
+        self, iterable: t.AsyncIterable, **labels: t.Any
+    ) -> t.AsyncIterator:
+        """Async counterpart of timed."""
+        if not enabled():
+            async for item in iterable:
+                yield item
+            return
+        iterator: t.AsyncIterator = iterable.__aiter__()
+        elapsed: float = 0
+        try:
+            while True:
+                since: float = time.perf_counter()
+                try:
+                    item: t.Any = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - since
+                yield item
+        finally:
+            self.observe(elapsed, **labels)
+
+    def _samples(self) -> t.Iterator[str]:
+        with self._lock:
+            values: t.List[t.Tuple[t.Tuple[str, ...], list]] = [
+                (key, [list(state[0]), state[1], state[2]])
+                for key, state in sorted(self._values.items())
+            ]
+        for key, (counts, total, count) in values:
+            cumulative: int = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield (
+                    f"{self.name}_bucket"
+                    f"{self._labels(key, {'le': _format(bound)})} "
+                    f"{_format(cumulative)}"
+                )
+            yield f"{self.name}_sum{self._labels(key)} {_format(total)}"
+            yield f"{self.name}_count{self._labels(key)} {_format(count)}"
+
+
+NOTIFICATIONS: Counter = Counter(
+    "pgsync_notifications_total",
+    "Database notifications received.",
+    ["index"],
+)
+QUEUE_DEPTH: Gauge = Gauge(
+    "pgsync_queue_depth",
+    "Changes waiting in the Redis/Valkey queue.",
+    ["index"],
+)
+EVENTS_RESOLVED: Counter = Counter(
+    "pgsync_events_resolved_total",
+    "Change events resolved to the root docs they affect.",
+    ["index", "table", "tg_op"],
+)
+RESOLVE_SECONDS: Histogram = Histogram(
+    "pgsync_resolve_duration_seconds",
+    "Time to resolve a batch of change events to their root docs.",
+    ["index"],
+)
+ROOTS_REBUILT: Counter = Counter(
+    "pgsync_roots_rebuilt_total",
+    "Root docs rebuilt from the database.",
+    ["index"],
+)
+FETCH_SECONDS: Histogram = Histogram(
+    "pgsync_fetch_duration_seconds",
+    "Time spent fetching the rows of a sync query.",
+    ["index"],
+)
+TRANSFORM_SECONDS: Histogram = Histogram(
+    "pgsync_transform_duration_seconds",
+    "Time to transform a row into a doc.",
+    ["index"],
+    buckets=DOC_BUCKETS,
+)
+PLUGIN_SECONDS: Histogram = Histogram(
+    "pgsync_plugin_duration_seconds",
+    "Time spent in the plugins per doc.",
+    ["index"],
+    buckets=DOC_BUCKETS,
+)
+BULK_SECONDS: Histogram = Histogram(
+    "pgsync_bulk_request_duration_seconds",
+    "Latency of the bulk requests.",
+    ["index"],
+)
+BULK_BYTES: Counter = Counter(
+    "pgsync_bulk_request_bytes_total",
+    "Size of the bulk request bodies.",
+    ["index"],
+)
+BULK_REJECTED: Counter = Counter(
+    "pgsync_bulk_rejected_total",
+    "Bulk requests and items rejected with 429 Too Many Requests.",
+    ["index"],
+)
+REPLICATION_LAG: Histogram = Histogram(
+    "pgsync_replication_lag_seconds",
+    "Time from a change in the database to its docs being acknowledged "
+    "by the bulk api.",
+    ["index", "table"],
+    buckets=(
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+        10.0,
+        30.0,
+        60.0,
+        300.0,
+        900.0,
+        3600.0,
+    ),
+)
+REFRESH_INTERVAL: Gauge = Gauge(
+    "pgsync_index_refresh_interval_seconds",
+    "Refresh interval of the index i.e the max time from a bulk "
+    "acknowledgement to the doc being searchable (-1 if disabled).",
+    ["index"],
+)
+SLOT_RETAINED_WAL: Gauge = Gauge(
+    "pgsync_replication_slot_retained_wal_bytes",
+    "WAL bytes retained by the replication slot.",
+    ["index", "slot"],
+)
+CHECKPOINT_AGE: Gauge = Gauge(
+    "pgsync_checkpoint_age_seconds",
+    "Seconds since the checkpoint last advanced with changes pending.",
+    ["index"],
+)
+WORKER_BUSY: Counter = Counter(
+    "pgsync_worker_busy_seconds_total",
+    "Time the consumer workers spent handling changes.",
+    ["index"],
+)
+
+
+def totals(index: str) -> t.Dict[str, t.Any]:
+    """
+    The totals of the metrics of an index over their other labels.
+
+    Counters and gauges are summed and histograms are [sum, count].
+    """
+    values: t.Dict[str, t.Any] = {}
+    for metric in REGISTRY:
+        if "index" not in metric.labelnames:
+            continue
+        i: int = metric.labelnames.index("index")
+        with metric._lock:
+            states: t.List[t.Any] = [
+                state
+                for key, state in metric._values.items()
+                if key[i] == index
+            ]
+            if not states:
+                continue
+            if isinstance(metric, Histogram):
+                values[metric.name] = [
+                    sum(state[1] for state in states),
+                    sum(state[2] for state in states),
+                ]
+            else:
+                values[metric.name] = sum(states)
+    return values
+
+
+def render() -> str:
+    """Render every metric in the Prometheus text format."""
+    lines: t.List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body: bytes = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: t.Any) -> None:
+        logger.debug(f"metrics: {format % args}")
+
+
+_server: t.Optional[ThreadingHTTPServer] = None
+_server_lock: threading.Lock = threading.Lock()
+
+
+def start_server() -> t.Optional[ThreadingHTTPServer]:
+    """Serve the metrics on METRICS_HOST:METRICS_PORT once per process."""
+    global _server
+    # REDIS_STATS alone records the metrics without serving them
+    if settings.METRICS_PORT is None:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(
+                (settings.METRICS_HOST, settings.METRICS_PORT), _Handler
+            )
+            _server.daemon_threads = True
+            threading.Thread(
+                target=_server.serve_forever, name="metrics", daemon=True
+            ).start()
+            logger.info(
+                f"Serving metrics on "
+                f"http://{settings.METRICS_HOST}:{settings.METRICS_PORT}"
+                f"/metrics"
+            )
+    return _server
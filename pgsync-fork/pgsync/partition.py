@@ -0,0 +1,187 @@
+"""PGSync Partition."""
+
+import json
+import logging
+import os
+import threading
+import typing as t
+
+import sqlalchemy as sa
+
+from .utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# pseudo column of the physical location of a row i.e (page, row)
+CTID: str = "ctid"
+
+
+class Partition(object):
+    """
+    A half open range [lower, upper) of the root table.
+
+    The range is either over the heap pages of the table (ctid) which PG14+
+    reads with a TID Range Scan or over a single primary key column which
+    uses the primary key index. A None bound is unbounded.
+
+    e.g
+        Partition("ctid", 0, 1024).clause(model)
+        ctid >= '(0,0)'::tid AND ctid < '(1024,0)'::tid
+        Partition("id", 1000, None).clause(model)
+        id >= 1000
+    """
+
+    def __init__(
+        self,
+        column: str,
+        lower: t.Optional[t.Any] = None,
+        upper: t.Optional[t.Any] = None,
+    ):
+        self.column: str = column
+        self.lower: t.Optional[t.Any] = lower
+        self.upper: t.Optional[t.Any] = upper
+
+    def __repr__(self) -> str:
+        return f"{self.column}[{self.lower}, {self.upper})"
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Partition) and (
+            self.to_list() == other.to_list()
+        )
+
+    def _bound(self, value: t.Any) -> sa.sql.ColumnElement:
+        if self.column == CTID:
+            return sa.literal_column(f"'({int(value)},0)'::tid")
+        return sa.literal(value)
+
+    def clause(self, model: sa.sql.Alias) -> t.Optional[sa.sql.ColumnElement]:
+        """The where clause of this range on the root model."""
+        column: sa.Column = model.c[self.column]
+        clauses: t.List[sa.sql.ColumnElement] = []
+        if self.lower is not None:
+            clauses.append(column >= self._bound(self.lower))
+        if self.upper is not None:
+            clauses.append(column < self._bound(self.upper))
+        if not clauses:
+            return None
+        return sa.and_(*clauses)
+
+    def to_list(self) -> list:
+        return [self.column, self.lower, self.upper]
+
+    @classmethod
+    def from_list(cls, value: list) -> "Partition":
+        return cls(*value)
+
+
+def tid_partitions(pages: int, count: int) -> t.List[Partition]:
+    """Split the heap pages of a table into count ranges."""
+    size: int = max(1, -(-pages // max(count, 1)))
+    bounds: t.List[int] = list(range(size, pages, size))
+    return _partitions(CTID, bounds)
+
+
+def key_partitions(column: str, bounds: t.List[t.Any]) -> t.List[Partition]:
+    """Split a primary key column at the given (sorted) bounds."""
+    return _partitions(column, sorted(set(bounds)))
+
+
+def _partitions(column: str, bounds: t.List[t.Any]) -> t.List[Partition]:
+    # the first and last ranges are open so rows beyond the bounds
+    # at the time of the split are still included
+    edges: t.List[t.Optional[t.Any]] = [None, *bounds, None]
+    return [
+        Partition(column, lower, upper)
+        for lower, upper in zip(edges, edges[1:])
+    ]
+
+
+class RangeCheckpoint(object):
+    """
+    Progress of a sync over ranges of the root table.
+
+    The ranges and the indices of those done are saved as one document,
+    either to Redis/Valkey or to a file that is replaced atomically, each
+    time a range is done. The progress is only resumed by a sync from the
+    same txmin as the ranges were split for.
+
+    e.g
+        progress = RangeCheckpoint(path)
+        if not progress.load(txmin):
+            progress.start(txmin, partitions)
+        for i in progress.pending:
+            # sync progress.partitions[i]
+            progress.mark(i)
+        progress.clear()
+    """
+
+    def __init__(self, path: str, redis: t.Optional[t.Any] = None):
+        self.path: str = path
+        # a RedisQueue when the checkpoint is kept in Redis/Valkey
+        self.redis: t.Optional[t.Any] = redis
+        self.txmin: t.Optional[int] = None
+        self.partitions: t.List[Partition] = []
+        self.done: t.Set[int] = set()
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def pending(self) -> t.List[int]:
+        """Indices of the ranges not done yet."""
+        return [i for i in range(len(self.partitions)) if i not in self.done]
+
+    def load(self, txmin: t.Optional[int]) -> bool:
+        """Load the progress of an interrupted sync from txmin if any."""
+        progress: t.Optional[dict] = self._read()
+        if progress is None or progress.get("txmin") != txmin:
+            return False
+        self.txmin = txmin
+        self.partitions = list(map(Partition.from_list, progress["ranges"]))
+        self.done = set(progress["done"])
+        logger.info(
+            f"Resuming sync from txmin {txmin}: "
+            f"{len(self.done)} of {len(self.partitions)} ranges done"
+        )
+        return True
+
+    def start(
+        self, txmin: t.Optional[int], partitions: t.List[Partition]
+    ) -> None:
+        """Save the ranges of a new sync from txmin."""
+        with self._lock:
+            self.txmin = txmin
+            self.partitions = partitions
+            self.done = set()
+            self._write()
+
+    def mark(self, i: int) -> None:
+        """Save range i as done."""
+        with self._lock:
+            self.done.add(i)
+            self._write()
+
+    def clear(self) -> None:
+        """Remove the progress once the sync has been checkpointed."""
+        with self._lock:
+            if self.redis is not None:
+                self.redis.set_state("ranges", None)
+            elif os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _read(self) -> t.Optional[dict]:
+        if self.redis is not None:
+            return self.redis.get_state("ranges")
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, encoding="utf-8") as fp:
+            return json.load(fp)
+
+    def _write(self) -> None:
+        progress: dict = {
+            "txmin": self.txmin,
+            "ranges": [partition.to_list() for partition in self.partitions],
+            "done": sorted(self.done),
+        }
+        if self.redis is not None:
+            self.redis.set_state("ranges", progress)
+        else:
+            atomic_write(self.path, json.dumps(progress))
@@ -0,0 +1,194 @@
+"""PGSync Pipeline."""
+
+import logging
+import queue
+import threading
+import time
+import typing as t
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# end of stream marker passed down the queues
+_DONE = object()
+
+
+class Pipeline(object):
+    """
+    Run batches through stages of worker threads joined by bounded queues.
+
+    The source runs in its own thread and each stage has its own number of
+    workers. Iterating over the pipeline yields the items of the batches
+    coming out of the last stage, so whatever consumes it (e.g the bulk
+    helper) is the final stage and runs in the calling thread.
+
+    The bounded queues let a stage run ahead of the next by at most maxsize
+    batches so e.g the database cursor keeps reading while the search
+    cluster is writing. As the workers are threads this overlaps the I/O
+    of the stages while the CPU bound work still shares the GIL.
+
+    e.g
+        pipeline = Pipeline(
+            ("fetch", lambda: chunks(rows, 1000)),
+            [("transform", transform, 2), ("encode", encode, 1)],
+            maxsize=8,
+        )
+        for doc in pipeline:
+            ...
+        pipeline.timings
+        {'fetch': 1.2, 'transform': 3.4, 'encode': 0.5, 'consume': 2.2}
+    """
+
+    def __init__(
+        self,
+        source: t.Tuple[str, t.Callable[[], t.Iterable[list]]],
+        stages: t.List[t.Tuple[str, t.Callable[[list], list], int]],
+        maxsize: int,
+    ):
+        self.source: t.Tuple[str, t.Callable[[], t.Iterable[list]]] = source
+        self.stages: t.List[t.Tuple[str, t.Callable[[list], list], int]] = (
+            stages
+        )
+        self.maxsize: int = maxsize
+        # seconds spent working in each stage summed over its workers
+        self.timings: t.Dict[str, float] = defaultdict(float)
+        # number of items leaving each stage
+        self.counts: t.Dict[str, int] = defaultdict(int)
+        self._lock: threading.Lock = threading.Lock()
+        self._stop: threading.Event = threading.Event()
+        self._error: t.Optional[BaseException] = None
+
+    def _put(self, q: queue.Queue, item: t.Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> t.Any:
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _record(self, name: str, since: float, batch: t.Any) -> None:
+        with self._lock:
+            self.timings[name] += time.perf_counter() - since
+            if batch is not _DONE:
+                self.counts[name] += len(batch)
+
+    def _fail(self, e: BaseException) -> None:
+        logger.exception(f"Exception {e}")
+        with self._lock:
+            if self._error is None:
+                self._error = e
+        self._stop.set()
+
+    def _produce(self, outq: queue.Queue, nworkers: int) -> None:
+        name, source = self.source
+        try:
+            iterator: t.Iterator[list] = iter(source())
+            while True:
+                since: float = time.perf_counter()
+                batch: t.Any = next(iterator, _DONE)
+                self._record(name, since, batch)
+                if batch is _DONE:
+                    break
+                if not self._put(outq, batch):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            for _ in range(nworkers):
+                self._put(outq, _DONE)
+
+    def _work(
+        self,
+        name: str,
+        func: t.Callable[[list], list],
+        inq: queue.Queue,
+        outq: queue.Queue,
+        remaining: t.List[int],
+        nworkers: int,
+    ) -> None:
+        try:
+            while True:
+                batch: t.Any = self._get(inq)
+                if batch is _DONE:
+                    break
+                since: float = time.perf_counter()
+                batch = func(batch)
+                self._record(name, since, batch)
+                if not self._put(outq, batch):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # the last worker of a stage ends the stream for the next one
+            with self._lock:
+                remaining[0] -= 1
+                last: bool = remaining[0] == 0
+            if last:
+                for _ in range(nworkers):
+                    self._put(outq, _DONE)
+
+    def __iter__(self) -> t.Iterator[t.Any]:
+        queues: t.List[queue.Queue] = [
+            queue.Queue(maxsize=self.maxsize)
+            for _ in range(len(self.stages) + 1)
+        ]
+        # the number of workers reading from each queue
+        readers: t.List[int] = [workers for _, _, workers in self.stages] + [1]
+        threads: t.List[threading.Thread] = [
+            threading.Thread(
+                target=self._produce,
+                args=(queues[0], readers[0]),
+                daemon=True,
+            )
+        ]
+        for i, (name, func, workers) in enumerate(self.stages):
+            remaining: t.List[int] = [workers]
+            for _ in range(workers):
+                threads.append(
+                    threading.Thread(
+                        target=self._work,
+                        args=(
+                            name,
+                            func,
+                            queues[i],
+                            queues[i + 1],
+                            remaining,
+                            readers[i + 1],
+                        ),
+                        daemon=True,
+                    )
+                )
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                batch: t.Any = self._get(queues[-1])
+                if batch is _DONE:
+                    break
+                since: float = time.perf_counter()
+                yield from batch
+                self._record("consume", since, batch)
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            logger.debug(
+                "Pipeline "
+                + " ".join(
+                    f"{name}: {self.timings[name]:.3f}s/"
+                    f"{self.counts[name]}"
+                    for name in self.timings
+                )
+            )
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,191 @@
+"""
+PGSync Profiler.
+
+Spans around the main stages of a sync (resolving changes, building and
+fetching the queries, transforms, plugins and bulk requests) and a sampling
+profiler of every thread. Both are enabled with --profile. Otherwise a span
+is a shared no-op context and nothing is sampled.
+
+The samples are written in the folded (collapsed) stack format read by
+flamegraph.pl, inferno and speedscope to PROFILE_PATH at exit and on
+SIGUSR2. Each stack starts with the thread name and the active spans e.g
+
+    MainThread;[bulk];[fetchmany];fetchmany (pgsync/base.py:1506) 42
+
+    kill -USR2 <pid>
+    flamegraph.pl pgsync.folded > pgsync.svg
+"""
+
+import atexit
+import contextlib
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import typing as t
+from collections import Counter, defaultdict
+
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+_enabled: bool = False
+_null: contextlib.nullcontext = contextlib.nullcontext()
+# reentrant as the signal handler dump can interrupt a span on the thread
+_lock: threading.RLock = threading.RLock()
+# the active span names of each thread by thread id
+_active: t.Dict[int, t.List[str]] = defaultdict(list)
+# the count and total seconds of each span
+_spans: t.Dict[str, t.List[float]] = defaultdict(lambda: [0, 0.0])
+_samples: t.Counter[str] = Counter()
+_root: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def enabled() -> bool:
+    """Whether --profile is on."""
+    return _enabled
+
+
+class _Span(object):
+    __slots__ = ("name", "stack", "since")
+
+    def __init__(self, name: str):
+        self.name: str = name
+
+    def __enter__(self) -> "_Span":
+        self.stack: t.List[str] = _active[threading.get_ident()]
+        self.stack.append(self.name)
+        self.since: float = time.perf_counter()
+        return self
+
+    def __exit__(self, *args) -> None:
+        elapsed: float = time.perf_counter() - self.since
+        # coroutines on the same thread can interleave their spans
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i] == self.name:
+                del self.stack[i]
+                break
+        with _lock:
+            stat: t.List[float] = _spans[self.name]
+            stat[0] += 1
+            stat[1] += elapsed
+
+
+def span(name: str) -> t.ContextManager:
+    """Time the block as the named stage."""
+    if not _enabled:
+        return _null
+    return _Span(name)
+
+
+def traced(iterable: t.Iterable, name: str) -> t.Iterable:
+    """Time the iteration of an iterable as the named stage."""
+    if not _enabled:
+        return iterable
+    return _traced(iterable, name)
+
+
+def _traced(iterable: t.Iterable, name: str) -> t.Iterator:
+    iterator: t.Iterator = iter(iterable)
+    while True:
+        with _Span(name):
+            try:
+                item: t.Any = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def async_traced(iterable: t.AsyncIterable, name: str) -> t.AsyncIterable:
+    """Async counterpart of traced."""
+    if not _enabled:
+        return iterable
+    return _async_traced(iterable, name)
+
+
+async def _async_traced(
+    iterable: t.AsyncIterable, name: str
+) -> t.AsyncIterator:
+    iterator: t.AsyncIterator = iterable.__aiter__()
+    while True:
+        with _Span(name):
+            try:
+                item: t.Any = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+        yield item
+
+
+def _frame(frame: t.Any) -> str:
+    code: t.Any = frame.f_code
+    filename: str = code.co_filename
+    if filename.startswith(_root):
+        filename = os.path.relpath(filename, _root)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class Sampler(threading.Thread):
+    """Sample the stack of every other thread at PROFILE_INTERVAL."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="profiler", daemon=True)
+        self.interval: float = interval
+
+    def run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            names: t.Dict[int, str] = {
+                thread.ident: thread.name for thread in threading.enumerate()
+            }
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident:
+                    continue
+                stack: t.List[str] = []
+                while frame is not None:
+                    stack.append(_frame(frame))
+                    frame = frame.f_back
+                spans: t.List[str] = [
+                    f"[{name}]" for name in tuple(_active.get(ident, ()))
+                ]
+                key: str = ";".join(
+                    [names.get(ident, str(ident)), *spans, *reversed(stack)]
+                )
+                with _lock:
+                    _samples[key] += 1
+
+
+def dump(path: t.Optional[str] = None) -> None:
+    """Write the samples so far in the folded format and log the spans."""
+    path = path or settings.PROFILE_PATH
+    with _lock:
+        samples: t.List[t.Tuple[str, int]] = sorted(_samples.items())
+        spans: t.List[t.Tuple[str, t.List[float]]] = sorted(
+            _spans.items(), key=lambda item: -item[1][1]
+        )
+    with open(path, "w") as fp:
+        for stack, count in samples:
+            fp.write(f"{stack} {count}\n")
+    logger.info(f"Wrote {len(samples)} profile stacks to {path}")
+    for name, (count, total) in spans:
+        logger.info(
+            f"{name:<16} {int(count):>10} calls {total:>12.3f} secs "
+            f"{total / count * 1000:>10.3f} ms/call"
+        )
+
+
+def start() -> None:
+    """Enable the spans and start sampling until the process exits."""
+    global _enabled
+    if _enabled:
+        return
+    _enabled = True
+    Sampler(settings.PROFILE_INTERVAL).start()
+    atexit.register(dump)
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR2, lambda signum, frame: dump())
+    logger.info(
+        f"Profiling every {settings.PROFILE_INTERVAL} secs to "
+        f"{settings.PROFILE_PATH} (kill -USR2 {os.getpid()} to dump)"
+    )
@@ -1,5 +1,6 @@
 """PGSync QueryBuilder."""
 
+import logging
 import threading
 import typing as t
 from collections import defaultdict
@@ -10,8 +11,11 @@ from .base import compiled_query, TupleIdentifierType
 from .constants import OBJECT, ONE_TO_MANY, ONE_TO_ONE, SCALAR
 from .exc import ForeignKeyError
 from .node import Node
+from .partition import Partition
 from .settings import IS_MYSQL_COMPAT
 
+logger = logging.getLogger(__name__)
+
 
 def JSON_OBJECT(*args: t.Any) -> sa.sql.functions.Function:
     """JSON object constructor."""
@@ -259,13 +263,17 @@ class QueryBuilder(threading.local):
             if not table.startswith(f"{schema}."):
                 table = f"{schema}.{table}"
             # FIX: Don't modify list while iterating - create new filtered list
-            print(f"[DEBUG _get_column_foreign_keys] table={table}, foreign_keys[table]={foreign_keys.get(table)}, columns={column_names}")
             # Check if table exists in foreign_keys dict
             if table not in foreign_keys:
-                print(f"[DEBUG _get_column_foreign_keys] table {table} not in FK dict, returning empty")
+                logger.debug(f"Table {table} has no foreign keys")
                 return []
-            filtered_keys = [value for value in foreign_keys[table] if value in column_names]
-            print(f"[DEBUG _get_column_foreign_keys] filtered_keys={filtered_keys}")
+            filtered_keys = [
+                value for value in foreign_keys[table] if value in column_names
+            ]
+            logger.debug(
+                f"Foreign keys of {table}: {foreign_keys[table]} "
+                f"in columns {column_names}: {filtered_keys}"
+            )
             return filtered_keys
 
     def _get_child_keys(
@@ -298,6 +306,7 @@ class QueryBuilder(threading.local):
         txmin: t.Optional[int] = None,
         txmax: t.Optional[int] = None,
         ctid: t.Optional[dict] = None,
+        partition: t.Optional[Partition] = None,
     ) -> None:
         columns = [
             JSON_ARRAY(
@@ -350,6 +359,11 @@ class QueryBuilder(threading.local):
                     )
                 )
 
+        if partition is not None:
+            clause = partition.clause(node.model)
+            if clause is not None:
+                node._filters.append(clause)
+
         if txmin:
             node._filters.append(
                 sa.cast(
@@ -384,9 +398,7 @@ class QueryBuilder(threading.local):
                 node._subquery = node._subquery.lateral()
 
     def _children(self, node: Node) -> None:
-        print(f"[DEBUG _children] Processing node: {node.table}, children count: {len(node.children)}")
         for child in node.children:
-            print(f"[DEBUG _children] Processing child: {child.table}, label: {child.label}, parent: {child.parent.table}")
             onclause: t.List = []
 
             if child.relationship.throughs:
@@ -428,12 +440,14 @@ class QueryBuilder(threading.local):
                 )
 
                 foreign_keys: dict = self.get_foreign_keys(node, child)
-                print(f"[DEBUG _children] FK lookup: {node.table} -> {child.table}, result: {foreign_keys}")
+                logger.debug(
+                    f"Foreign keys {node.table} -> {child.table}: "
+                    f"{foreign_keys}"
+                )
                 left_foreign_keys: list = self._get_column_foreign_keys(
                     child._subquery.columns,
                     foreign_keys,
                 )
-                print(f"[DEBUG _children] left_foreign_keys: {left_foreign_keys}")
 
                 if left_foreign_keys == child.table:
                     right_foreign_keys = left_foreign_keys
@@ -504,29 +518,26 @@ class QueryBuilder(threading.local):
             op = sa.and_
             if child.table == child.parent.table:
                 op = sa.or_
-            print(f"[DEBUG _children] Creating join for {child.table}, onclause count: {len(onclause)}")
             if len(onclause) == 0:
-                print(f"[DEBUG _children] WARNING: Empty onclause for {child.table}! This will create a CROSS JOIN!")
+                logger.debug(
+                    f"No join condition for {child.table}: a cross join"
+                )
             self.from_obj = self.from_obj.join(
                 child._subquery,
                 onclause=op(*onclause),
                 isouter=self.isouter,
             )
-            print(f"[DEBUG _children] Join created for {child.table}")
-            # Log the SQL query
-            try:
-                from sqlalchemy.dialects import postgresql
-                compiled = str(child._subquery.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
-                print(f"[DEBUG SQL] {child.table} subquery: {compiled[:500]}")
-            except:
-                pass
-            # Log the SQL query
-            try:
-                from sqlalchemy.dialects import postgresql
-                compiled = str(child._subquery.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
-                print(f"[DEBUG SQL] {child.table} subquery: {compiled[:500]}")
-            except:
-                pass
+            # compiling the subquery is costly so only when it is logged
+            if logger.isEnabledFor(logging.DEBUG):
+                try:
+                    compiled: str = str(
+                        child._subquery.compile(
+                            compile_kwargs={"literal_binds": True}
+                        )
+                    )
+                except Exception:
+                    compiled = str(child._subquery)
+                logger.debug(f"{child.table} subquery: {compiled[:500]}")
 
     def _through(self, node: Node) -> None:  # noqa: C901
         through: Node = node.relationship.throughs[0]
@@ -921,14 +932,18 @@ class QueryBuilder(threading.local):
             table=node.parent.table,
             schema=node.parent.schema,
         )
-        print(f"[DEBUG _non_through] Node: {node.table}, FK columns check")
-        print(f"[DEBUG _non_through] foreign_key_columns: {foreign_key_columns}, length: {len(foreign_key_columns)}")
-        print(f"[DEBUG _non_through] parent_foreign_key_columns: {parent_foreign_key_columns}, length: {len(parent_foreign_key_columns)}")
+        logger.debug(
+            f"Foreign key columns of {node.table}: {foreign_key_columns} "
+            f"parent: {parent_foreign_key_columns}"
+        )
 
         # Validate FK columns match in length
         if len(foreign_key_columns) != len(parent_foreign_key_columns):
-            print(f"[DEBUG _non_through] WARNING: FK column count mismatch for {node.table}! Skipping WHERE clause")
-            print(f"[DEBUG _non_through] This usually means auto-detection failed. Check schema.json foreign_key specification")
+            logger.debug(
+                f"Foreign key column count mismatch for {node.table}: "
+                f"{foreign_key_columns} != {parent_foreign_key_columns}. "
+                f"Check the foreign_key of the schema relationship"
+            )
             # Skip WHERE clause - will return all rows (not ideal but won't crash)
             where: list = []
         else:
@@ -938,13 +953,12 @@ class QueryBuilder(threading.local):
                     node.model.c[foreign_key_columns[i]]
                     == node.parent.model.c[parent_foreign_key_columns[i]]
                 )
-        print(f"[DEBUG _non_through] Node: {node.table}, WHERE clauses: {len(where)}")
-        print(f"[DEBUG _non_through] foreign_key_columns: {foreign_key_columns}")
-        print(f"[DEBUG _non_through] parent_foreign_key_columns: {parent_foreign_key_columns}")
         if where:
             node._subquery = node._subquery.where(sa.and_(*where))
         else:
-            print(f"[DEBUG _non_through] WARNING: No WHERE clause for {node.table}! This will return all rows!")
+            logger.debug(
+                f"No where clause for {node.table}: all rows are returned"
+            )
 
         # NB do not apply filters to the child node as they are applied to the parent
         # if node._filters:
@@ -967,6 +981,7 @@ class QueryBuilder(threading.local):
         txmin: t.Optional[int] = None,
         txmax: t.Optional[int] = None,
         ctid: t.Optional[dict] = None,
+        partition: t.Optional[Partition] = None,
     ) -> None:
         """Build node query."""
         self.from_obj = None
@@ -978,7 +993,13 @@ class QueryBuilder(threading.local):
         self._children(node)
 
         if node.is_root:
-            self._root(node, txmin=txmin, txmax=txmax, ctid=ctid)
+            self._root(
+                node,
+                txmin=txmin,
+                txmax=txmax,
+                ctid=ctid,
+                partition=partition,
+            )
         else:
             # 2) subquery: these are for children creating their own columns
             if node.relationship.throughs:
@@ -5,6 +5,7 @@ import logging
 import typing as t
 
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
 from redis.exceptions import ConnectionError
 
 from .settings import (
@@ -16,6 +17,9 @@ from .urls import get_redis_url
 
 logger = logging.getLogger(__name__)
 
+# names of the state values kept next to the queue e.g the sync progress
+STATE_KEYS: t.Tuple[str, ...] = ("ranges", "settings")
+
 
 class RedisQueue(object):
     """Simple Queue with Redis/Valkey Backend."""
@@ -26,12 +30,12 @@ class RedisQueue(object):
         self.key: str = f"{namespace}:{name}"
         self._meta_key: str = f"{self.key}:meta"
         try:
-            self.__db: Redis = Redis.from_url(
+            self._db: Redis = Redis.from_url(
                 url,
                 socket_timeout=REDIS_SOCKET_TIMEOUT,
                 retry_on_timeout=REDIS_RETRY_ON_TIMEOUT,
             )
-            self.__db.ping()
+            self._db.ping()
         except ConnectionError as e:
             logger.exception(f"Redis server is not running: {e}")
             raise
@@ -39,13 +43,13 @@ class RedisQueue(object):
     @property
     def qsize(self) -> int:
         """Return the approximate size of the queue."""
-        return self.__db.llen(self.key)
+        return self._db.llen(self.key)
 
     def pop(self, chunk_size: t.Optional[int] = None) -> t.List[dict]:
         """Remove and return multiple items from the queue."""
         chunk_size = chunk_size or REDIS_READ_CHUNK_SIZE
         if self.qsize > 0:
-            pipeline = self.__db.pipeline()
+            pipeline = self._db.pipeline()
             pipeline.lrange(self.key, 0, chunk_size - 1)
             pipeline.ltrim(self.key, chunk_size, -1)
             items: t.List = pipeline.execute()
@@ -64,7 +68,7 @@ class RedisQueue(object):
         that are visible in the current PostgreSQL snapshot.
         """
         chunk_size = chunk_size or REDIS_READ_CHUNK_SIZE
-        items: t.List = self.__db.lrange(self.key, 0, chunk_size - 1)
+        items: t.List = self._db.lrange(self.key, 0, chunk_size - 1)
         if not items:
             return []
         payloads = [json.loads(i) for i in items]
@@ -80,27 +84,312 @@ class RedisQueue(object):
                 continue
             if visible_map.get(payload["xmin"]):
                 # Claim atomically
-                removed = self.__db.lrem(self.key, 1, item)
+                removed = self._db.lrem(self.key, 1, item)
                 if removed:
                     visible.append(payload)
         return visible
 
     def push(self, items: t.Iterable[dict]) -> None:
         """Push multiple items onto the queue."""
-        self.__db.rpush(self.key, *map(json.dumps, items))
+        self._db.rpush(self.key, *map(json.dumps, items))
 
     def delete(self) -> None:
         """Delete all items from the named queue."""
         logger.info(f"Deleting redis key: {self.key}")
-        self.__db.delete(self.key)
-        self.__db.delete(self._meta_key)
+        self._db.delete(self.key)
+        self._db.delete(self._meta_key)
+        for name in STATE_KEYS:
+            self._db.delete(f"{self.key}:{name}")
         logger.info(f"Deleted redis key: {self.key}")
 
     def set_meta(self, value: t.Any) -> None:
         """Store an arbitrary JSON-serialisable value in a dedicated key."""
-        self.__db.set(self._meta_key, json.dumps(value))
+        self._db.set(self._meta_key, json.dumps(value))
 
     def get_meta(self, default: t.Any = None) -> t.Any:
         """Retrieve the stored value (or *default* if nothing is set)."""
-        raw: t.Optional[str] = self.__db.get(self._meta_key)
+        raw: t.Optional[str] = self._db.get(self._meta_key)
         return json.loads(raw) if raw is not None else default
+
+    def set_state(self, name: str, value: t.Optional[t.Any]) -> None:
+        """Store a named JSON-serialisable value (or delete it if None)."""
+        if value is None:
+            self._db.delete(f"{self.key}:{name}")
+        else:
+            self._db.set(f"{self.key}:{name}", json.dumps(value))
+
+    def get_state(self, name: str) -> t.Optional[t.Any]:
+        """Retrieve a named value stored with set_state if any."""
+        raw: t.Optional[str] = self._db.get(f"{self.key}:{name}")
+        return json.loads(raw) if raw is not None else None
+
+    def set_stats(self, name: str, value: dict, ttl: int) -> None:
+        """Publish the stats of a process (see pgsync top) for ttl secs."""
+        self._db.set(f"{self.key}:stats:{name}", json.dumps(value), ex=ttl)
+
+
+# KEYS: order list, items hash, rows hash, sequence counter
+# ARGV: groups of (row, tg_op, head, old, new, xmin)
+COALESCE_ENQUEUE_SCRIPT: str = """
+local function less(a, b)
+    if #a ~= #b then return #a < #b end
+    return a < b
+end
+local merged = 0
+for i = 1, #ARGV, 6 do
+    local row, tg_op = ARGV[i], ARGV[i + 1]
+    local head, old, new, xmin = ARGV[i + 2], ARGV[i + 3], ARGV[i + 4], ARGV[i + 5]
+    local id = false
+    if row ~= '' then
+        id = redis.call('HGET', KEYS[3], row)
+    end
+    local op = id and redis.call('HGET', KEYS[2], id .. ':op')
+    if op and (op == tg_op or (op == 'INSERT' and tg_op == 'UPDATE')) then
+        -- keep the earliest old values and head, take the latest new values
+        redis.call('HSET', KEYS[2], id .. ':new', new)
+        local lower = redis.call('HGET', KEYS[2], id .. ':xmin') or ''
+        if xmin ~= '' and (lower == '' or less(xmin, lower)) then
+            redis.call('HSET', KEYS[2], id .. ':xmin', xmin)
+        end
+        local upper = redis.call('HGET', KEYS[2], id .. ':xmax') or ''
+        if xmin ~= '' and (upper == '' or less(upper, xmin)) then
+            redis.call('HSET', KEYS[2], id .. ':xmax', xmin)
+        end
+        merged = merged + 1
+    else
+        id = tostring(redis.call('INCR', KEYS[4]))
+        redis.call('RPUSH', KEYS[1], id)
+        redis.call(
+            'HSET', KEYS[2], id, head, id .. ':op', tg_op, id .. ':old', old,
+            id .. ':new', new, id .. ':xmin', xmin, id .. ':xmax', xmin,
+            id .. ':row', row
+        )
+        if row ~= '' then
+            redis.call('HSET', KEYS[3], row, id)
+        end
+    end
+end
+return merged
+"""
+
+# KEYS: order list, items hash, rows hash
+# ARGV: a count to pop from the head of the list or (id, xmax) pairs to
+# claim, each only if no later item was merged into it since xmax was read
+COALESCE_DRAIN_SCRIPT: str = """
+local ids
+if ARGV[1] == 'count' then
+    ids = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[2]) - 1)
+    if #ids > 0 then
+        redis.call('LTRIM', KEYS[1], #ids, -1)
+    end
+else
+    ids = {}
+    for i = 2, #ARGV, 2 do
+        local id, xmax = ARGV[i], ARGV[i + 1]
+        if redis.call('HGET', KEYS[2], id .. ':xmax') == xmax
+            and redis.call('LREM', KEYS[1], 1, id) > 0 then
+            table.insert(ids, id)
+        end
+    end
+end
+local items = {}
+for _, id in ipairs(ids) do
+    local fields = {
+        id, id .. ':op', id .. ':old', id .. ':new', id .. ':xmin',
+        id .. ':xmax', id .. ':row'
+    }
+    local values = redis.call('HMGET', KEYS[2], unpack(fields))
+    redis.call('HDEL', KEYS[2], unpack(fields))
+    local row = values[7]
+    if row and row ~= '' and redis.call('HGET', KEYS[3], row) == id then
+        redis.call('HDEL', KEYS[3], row)
+    end
+    table.insert(items, values[1] or '{}')
+    table.insert(items, values[3] or 'null')
+    table.insert(items, values[4] or 'null')
+    table.insert(items, values[5] or '')
+end
+return items
+"""
+
+
+class CoalescingRedisQueue(RedisQueue):
+    """
+    Redis/Valkey queue that coalesces pending items per row.
+
+    Each item is stored once in a hash and referenced by id from an ordered
+    list. A second hash maps the row identity (schema, table, primary key)
+    of an item to its pending entry so that a later item for the same row
+    updates the entry instead of appending a new one:
+
+        - same tg_op: keep the earliest old, take the latest new values.
+        - INSERT followed by UPDATE: stays an INSERT with the latest values.
+        - anything else: append a new entry which later items merge into.
+
+    The xmin of a merged entry is the minimum of its items so the
+    checkpoint derived from it never skips an unprocessed transaction.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        row_key: t.Callable[[dict], str],
+        namespace: str = "queue",
+        **kwargs,
+    ):
+        super().__init__(name, namespace=namespace, **kwargs)
+        self.row_key: t.Callable[[dict], str] = row_key
+        self._items_key: str = f"{self.key}:items"
+        self._rows_key: str = f"{self.key}:rows"
+        self._seq_key: str = f"{self.key}:seq"
+        self._enqueue = self._db.register_script(COALESCE_ENQUEUE_SCRIPT)
+        self._drain = self._db.register_script(COALESCE_DRAIN_SCRIPT)
+
+    @property
+    def keys(self) -> t.List[str]:
+        return [self.key, self._items_key, self._rows_key, self._seq_key]
+
+    def _decode(self, values: t.List[bytes]) -> t.List[dict]:
+        items: t.List[dict] = []
+        for i in range(0, len(values), 4):
+            item: dict = json.loads(values[i])
+            item["old"] = json.loads(values[i + 1])
+            item["new"] = json.loads(values[i + 2])
+            item["xmin"] = int(values[i + 3]) if values[i + 3] else None
+            items.append(item)
+        return items
+
+    def pop(self, chunk_size: t.Optional[int] = None) -> t.List[dict]:
+        """Remove and return multiple coalesced items from the queue."""
+        chunk_size = chunk_size or REDIS_READ_CHUNK_SIZE
+        values: t.List = self._drain(
+            keys=self.keys[:3], args=["count", chunk_size]
+        )
+        logger.debug(f"pop size: {len(values) // 4}")
+        return self._decode(values)
+
+    def pop_visible_in_snapshot(
+        self,
+        pg_visible_in_snapshot: t.Callable[[t.List[int]], dict],
+        chunk_size: t.Optional[int] = None,
+    ) -> t.List[dict]:
+        """
+        Pop coalesced items that are visible in the current snapshot.
+
+        An entry is only visible once the latest transaction merged into
+        it is visible. An entry merged into after its xmax was checked is
+        left in the queue.
+        """
+        chunk_size = chunk_size or REDIS_READ_CHUNK_SIZE
+        ids: t.List[bytes] = self._db.lrange(self.key, 0, chunk_size - 1)
+        if not ids:
+            return []
+        xmaxs: t.List = self._db.hmget(
+            self._items_key, [f"{id.decode()}:xmax" for id in ids]
+        )
+        visible_map: dict = pg_visible_in_snapshot()(
+            [int(xmax) for xmax in xmaxs if xmax]
+        )
+        claim: t.List[bytes] = []
+        for id, xmax in zip(ids, xmaxs):
+            if not xmax:
+                logger.warning(f"Skipping item without 'xmin' key: {id}")
+                continue
+            if visible_map.get(int(xmax)):
+                claim.extend([id, xmax])
+        if not claim:
+            return []
+        return self._decode(
+            self._drain(keys=self.keys[:3], args=["ids", *claim])
+        )
+
+    def _args(self, items: t.Iterable[dict]) -> list:
+        """Flatten items into the ARGV of the enqueue script."""
+        args: list = []
+        for item in items:
+            head: dict = {
+                key: value
+                for key, value in item.items()
+                if key not in ("old", "new", "xmin")
+            }
+            xmin: t.Optional[int] = item.get("xmin")
+            args.extend(
+                [
+                    self.row_key(item),
+                    item.get("tg_op") or "",
+                    json.dumps(head),
+                    json.dumps(item.get("old")),
+                    json.dumps(item.get("new")),
+                    "" if xmin is None else str(xmin),
+                ]
+            )
+        return args
+
+    def push(self, items: t.Iterable[dict]) -> None:
+        """Push multiple items onto the queue coalescing pending rows."""
+        args: list = self._args(items)
+        if args:
+            merged: int = self._enqueue(keys=self.keys, args=args)
+            logger.debug(f"push size: {len(args) // 6} merged: {merged}")
+
+    def delete(self) -> None:
+        """Delete all items from the named queue."""
+        super().delete()
+        self._db.delete(self._items_key, self._rows_key, self._seq_key)
+
+
+class AsyncRedisQueue(object):
+    """
+    asyncio view of a RedisQueue or CoalescingRedisQueue.
+
+    This shares the keys and encoding of the queue it wraps so both can be
+    used against the same named queue, e.g the checkpoint and meta data
+    stay with the sync queue while the hot pop/push path is awaited.
+    """
+
+    def __init__(self, queue: RedisQueue, **kwargs):
+        self.queue: RedisQueue = queue
+        self.key: str = queue.key
+        self._db: AsyncRedis = AsyncRedis.from_url(
+            get_redis_url(**kwargs),
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+            retry_on_timeout=REDIS_RETRY_ON_TIMEOUT,
+        )
+        self._enqueue = self._drain = None
+        if isinstance(queue, CoalescingRedisQueue):
+            self._enqueue = self._db.register_script(COALESCE_ENQUEUE_SCRIPT)
+            self._drain = self._db.register_script(COALESCE_DRAIN_SCRIPT)
+
+    async def qsize(self) -> int:
+        """Return the approximate size of the queue."""
+        return await self._db.llen(self.key)
+
+    async def pop(self, chunk_size: t.Optional[int] = None) -> t.List[dict]:
+        """Remove and return multiple items from the queue."""
+        chunk_size = chunk_size or REDIS_READ_CHUNK_SIZE
+        if self._drain is not None:
+            values: t.List = await self._drain(
+                keys=self.queue.keys[:3], args=["count", chunk_size]
+            )
+            logger.debug(f"pop size: {len(values) // 4}")
+            return self.queue._decode(values)
+        async with self._db.pipeline() as pipeline:
+            pipeline.lrange(self.key, 0, chunk_size - 1)
+            pipeline.ltrim(self.key, chunk_size, -1)
+            items: t.List = await pipeline.execute()
+        logger.debug(f"pop size: {len(items[0])}")
+        return list(map(lambda value: json.loads(value), items[0]))
+
+    async def push(self, items: t.Iterable[dict]) -> None:
+        """Push multiple items onto the queue in a single round trip."""
+        if self._enqueue is not None:
+            args: list = self.queue._args(items)
+            if args:
+                await self._enqueue(keys=self.queue.keys, args=args)
+            return
+        values: t.List[str] = list(map(json.dumps, items))
+        if values:
+            await self._db.rpush(self.key, *values)
+
+    async def close(self) -> None:
+        await self._db.aclose()
@@ -0,0 +1,87 @@
+"""PGSync DirtyRoots scheduler."""
+
+import logging
+import threading
+import typing as t
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class DirtyRoots(object):
+    """
+    Set of root documents pending a rebuild.
+
+    Resolving a change to its root documents and rebuilding those documents
+    are separated into two phases. Consumers mark root filters dirty and a
+    builder drains them in batches once per debounce window so that each
+    document is rebuilt once however many of its tables changed.
+
+    The xmin of every batch of events is tracked from the moment a consumer
+    starts resolving it until the roots it marked have been rebuilt. The
+    checkpoint must never move past the lowest of these.
+
+    e.g
+        roots.hold(xmin)
+        roots.add([{'id': 1}, {'id': 2}])
+        roots.release(xmin)
+        ...
+        filters, xmins = roots.drain()
+        # rebuild filters
+        checkpoint = roots.done(xmins) - 1
+    """
+
+    def __init__(self):
+        self._lock: threading.Lock = threading.Lock()
+        self._roots: t.Dict[tuple, dict] = {}
+        # xmins of batches being resolved by a consumer
+        self._held: Counter = Counter()
+        # xmins of resolved batches waiting for the next drain
+        self._xmins: t.List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._roots)
+
+    def hold(self, xmin: int) -> None:
+        """A consumer started resolving a batch with this xmin."""
+        with self._lock:
+            self._held[xmin] += 1
+
+    def release(self, xmin: int) -> None:
+        """A consumer finished resolving a batch with this xmin."""
+        with self._lock:
+            self._held[xmin] -= 1
+            if self._held[xmin] <= 0:
+                del self._held[xmin]
+            self._xmins.append(xmin)
+
+    def add(self, roots: t.List[dict]) -> None:
+        """Mark root filters e.g [{'id': 1}] dirty."""
+        with self._lock:
+            for root in roots:
+                self._roots.setdefault(tuple(sorted(root.items())), root)
+
+    def drain(self) -> t.Tuple[t.List[dict], t.List[int]]:
+        """Take all dirty roots and the xmins they were resolved from."""
+        with self._lock:
+            roots: t.List[dict] = list(self._roots.values())
+            xmins: t.List[int] = self._xmins
+            self._roots = {}
+            self._xmins = []
+        if roots:
+            logger.debug(f"Draining {len(roots)} dirty roots")
+        return roots, xmins
+
+    def done(self, xmins: t.List[int]) -> t.Optional[int]:
+        """
+        Roots drained with xmins have been rebuilt.
+
+        Returns the lowest xmin still outstanding including xmins, or None
+        if there was nothing to checkpoint.
+        """
+        if not xmins:
+            return None
+        with self._lock:
+            return min(
+                [*xmins, *self._xmins, *self._held.keys()],
+            )
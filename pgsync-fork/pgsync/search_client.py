@@ -1,6 +1,8 @@
 """PGSync SearchClient helper."""
 
+import asyncio
 import logging
+import time
 import typing as t
 from collections import defaultdict
 
@@ -12,11 +14,13 @@ import opensearch_dsl
 import opensearchpy
 from requests_aws4auth import AWS4Auth
 
-from . import settings
+from . import metrics, profiler, settings
 from .constants import (
     ELASTICSEARCH_MAPPING_PARAMETERS,
     ELASTICSEARCH_TYPES,
     META,
+    TIME_UNITS,
+    TIME_VALUE,
 )
 from .node import Tree
 from .urls import get_search_url
@@ -24,6 +28,86 @@ from .urls import get_search_url
 logger = logging.getLogger(__name__)
 
 
+class MeteredClient(object):
+    """
+    Proxy a search client to record the metrics of its bulk requests.
+
+    The bulk helpers only yield the result of each doc so the requests
+    they send are timed and measured here (and traced with --profile).
+    """
+
+    def __init__(self, client: t.Any, index: str):
+        self._client: t.Any = client
+        self._index: str = index
+
+    def __getattr__(self, name: str) -> t.Any:
+        return getattr(self._client, name)
+
+    def options(self, *args, **kwargs) -> "MeteredClient":
+        return type(self)(self._client.options(*args, **kwargs), self._index)
+
+    def bulk(self, *args, **kwargs) -> t.Any:
+        since: float = time.perf_counter()
+        try:
+            with profiler.span("bulk"):
+                response: t.Any = self._client.bulk(*args, **kwargs)
+        except Exception as e:
+            self._record(since, args, kwargs, error=e)
+            raise
+        self._record(since, args, kwargs, response=response)
+        return response
+
+    def _record(
+        self,
+        since: float,
+        args: tuple,
+        kwargs: dict,
+        response: t.Any = None,
+        error: t.Optional[Exception] = None,
+    ) -> None:
+        metrics.BULK_SECONDS.observe(
+            time.perf_counter() - since, index=self._index
+        )
+        # Elasticsearch sends the serialized lines as operations and
+        # OpenSearch the joined body
+        operations: t.Any = kwargs.get("operations")
+        if operations is None:
+            operations = [kwargs.get("body", args[0] if args else "")]
+        metrics.BULK_BYTES.inc(
+            sum(len(operation) + 1 for operation in operations),
+            index=self._index,
+        )
+        rejected: int = 0
+        if error is not None:
+            rejected = int(getattr(error, "status_code", None) == 429)
+        else:
+            body: t.Any = getattr(response, "body", response)
+            if body.get("errors"):
+                rejected = sum(
+                    1
+                    for item in body.get("items", [])
+                    for result in item.values()
+                    if result.get("status") == 429
+                )
+        if rejected:
+            metrics.BULK_REJECTED.inc(rejected, index=self._index)
+
+
+class AsyncMeteredClient(MeteredClient):
+    """Async counterpart of MeteredClient."""
+
+    async def bulk(self, *args, **kwargs) -> t.Any:
+        since: float = time.perf_counter()
+        try:
+            with profiler.span("bulk"):
+                response: t.Any = await self._client.bulk(*args, **kwargs)
+        except Exception as e:
+            self._record(since, args, kwargs, error=e)
+            raise
+        self._record(since, args, kwargs, response=response)
+        return response
+
+
 class SearchClient(object):
     """SearchClient."""
 
@@ -35,8 +119,10 @@ class SearchClient(object):
         host = 'localhost', port = 9200
         """
         url: str = get_search_url()
+        self.__async_client = None
         self.is_opensearch: bool = False
         self.major_version: int = 0
+        self.minor_version: int = 0
         if settings.ELASTICSEARCH:
             self.name = "Elasticsearch"
             self.__client: elasticsearch.Elasticsearch = get_search_client(
@@ -45,14 +131,19 @@ class SearchClient(object):
                 node_class=elastic_transport.RequestsHttpNode,
             )
             try:
-                self.major_version: int = int(
-                    self.__client.info()["version"]["number"].split(".")[0]
-                )
+                version: t.List[str] = self.__client.info()["version"][
+                    "number"
+                ].split(".")
+                self.major_version: int = int(version[0])
+                self.minor_version: int = int(version[1])
             except (IndexError, KeyError, ValueError):
                 pass
             self.streaming_bulk: t.Callable = (
                 elasticsearch.helpers.streaming_bulk
             )
+            self.async_streaming_bulk: t.Callable = (
+                elasticsearch.helpers.async_streaming_bulk
+            )
             self.parallel_bulk: t.Callable = (
                 elasticsearch.helpers.parallel_bulk
             )
@@ -71,6 +162,9 @@ class SearchClient(object):
             self.streaming_bulk: t.Callable = (
                 opensearchpy.helpers.streaming_bulk
             )
+            self.async_streaming_bulk: t.Callable = (
+                opensearchpy.helpers.async_streaming_bulk
+            )
             self.parallel_bulk: t.Callable = opensearchpy.helpers.parallel_bulk
             self.Search: t.Callable = opensearch_dsl.Search
             self.Bool: t.Callable = opensearch_dsl.query.Bool
@@ -79,11 +173,47 @@ class SearchClient(object):
             raise RuntimeError("Unknown search client")
 
         self.doc_count: int = 0
+        # (index, table, column) => the _meta fields to match the column on
+        self._lookup_fields: t.Dict[t.Tuple[str, str, str], t.List[str]] = {}
+        self.__serializer = (
+            self.__client.transport.serializer
+            if self.is_opensearch
+            else self.__client.transport.serializers.get_serializer(
+                "application/json"
+            )
+        )
 
     def close(self) -> None:
         """Close transport connection."""
         self.__client.transport.close()
 
+    @property
+    def async_client(self) -> t.Any:
+        """
+        Return the asyncio client (requires aiohttp).
+
+        This is created on first use so that it binds to the running loop.
+        """
+        if self.__async_client is None:
+            url: str = get_search_url()
+            if self.is_opensearch:
+                from opensearchpy import AsyncOpenSearch
+
+                self.__async_client = get_search_client(
+                    url, client=AsyncOpenSearch
+                )
+            else:
+                self.__async_client = get_search_client(
+                    url, client=elasticsearch.AsyncElasticsearch
+                )
+        return self.__async_client
+
+    async def async_close(self) -> None:
+        """Close the asyncio transport connection."""
+        if self.__async_client is not None:
+            await self.__async_client.close()
+            self.__async_client = None
+
     def teardown(self, index: str) -> None:
         """
         Teardown the Elasticsearch/OpenSearch index.
@@ -173,9 +303,12 @@ class SearchClient(object):
         ignore_status: t.Tuple[int],
     ):
         """Bulk index, update, delete docs to Elasticsearch/OpenSearch."""
+        client: t.Any = self.__client
+        if metrics.enabled() or profiler.enabled():
+            client = MeteredClient(client, index)
         if settings.ELASTICSEARCH_STREAMING_BULK:
             for ok, info in self.streaming_bulk(
-                self.__client,
+                client,
                 actions,
                 index=index,
                 chunk_size=chunk_size,
@@ -195,7 +328,7 @@ class SearchClient(object):
             # parallel bulk consumes more memory and is also more likely
             # to result in 429 errors.
             for ok, info in self.parallel_bulk(
-                self.__client,
+                client,
                 actions,
                 thread_count=thread_count,
                 chunk_size=chunk_size,
@@ -211,10 +344,253 @@ class SearchClient(object):
                 else:
                     logger.error(f"Document failed to index: {info}")
 
+    async def async_bulk(
+        self,
+        index: str,
+        actions: t.Union[t.AsyncIterable[dict], t.Iterable[dict]],
+        chunk_size: t.Optional[int] = None,
+        max_chunk_bytes: t.Optional[int] = None,
+        refresh: bool = False,
+        max_retries: t.Optional[int] = None,
+        initial_backoff: t.Optional[float] = None,
+        max_backoff: t.Optional[float] = None,
+        raise_on_exception: t.Optional[bool] = None,
+        raise_on_error: t.Optional[bool] = None,
+    ) -> None:
+        """
+        Pull sync data from an async generator to Elasticsearch/OpenSearch.
+
+        Many of these can be in flight at once on the same event loop.
+        The AWS request signer is not available to the asyncio transports
+        so AWS hosted clusters go through the threaded bulk instead.
+        """
+        if settings.OPENSEARCH_AWS_HOSTED or settings.ELASTICSEARCH_AWS_HOSTED:
+            if hasattr(actions, "__aiter__"):
+                actions = [action async for action in actions]
+            await asyncio.to_thread(
+                self.bulk,
+                index,
+                actions,
+                chunk_size=chunk_size,
+                max_chunk_bytes=max_chunk_bytes,
+                refresh=refresh,
+                max_retries=max_retries,
+                initial_backoff=initial_backoff,
+                max_backoff=max_backoff,
+                raise_on_exception=raise_on_exception,
+                raise_on_error=raise_on_error,
+            )
+            return
+
+        chunk_size = chunk_size or settings.ELASTICSEARCH_CHUNK_SIZE
+        max_chunk_bytes = (
+            max_chunk_bytes or settings.ELASTICSEARCH_MAX_CHUNK_BYTES
+        )
+        max_retries = max_retries or settings.ELASTICSEARCH_MAX_RETRIES
+        initial_backoff = (
+            initial_backoff or settings.ELASTICSEARCH_INITIAL_BACKOFF
+        )
+        max_backoff = max_backoff or settings.ELASTICSEARCH_MAX_BACKOFF
+        raise_on_exception = (
+            raise_on_exception or settings.ELASTICSEARCH_RAISE_ON_EXCEPTION
+        )
+        raise_on_error = (
+            raise_on_error or settings.ELASTICSEARCH_RAISE_ON_ERROR
+        )
+
+        client: t.Any = self.async_client
+        if metrics.enabled() or profiler.enabled():
+            client = AsyncMeteredClient(client, index)
+
+        try:
+            async for ok, info in self.async_streaming_bulk(
+                client,
+                actions,
+                index=index,
+                chunk_size=chunk_size,
+                max_chunk_bytes=max_chunk_bytes,
+                max_retries=max_retries,
+                max_backoff=max_backoff,
+                initial_backoff=initial_backoff,
+                refresh=refresh,
+                raise_on_exception=raise_on_exception,
+                raise_on_error=raise_on_error,
+            ):
+                if ok:
+                    self.doc_count += 1
+                else:
+                    logger.error(f"Document failed to index: {info}")
+        except Exception as e:
+            logger.exception(f"Exception {e}")
+            if raise_on_exception or raise_on_error:
+                raise
+
+    def encode(self, doc: dict) -> dict:
+        """
+        Serialize the _source of an index action ahead of the bulk helper.
+
+        The bulk helpers pass an already serialized body through as is, so
+        this moves the JSON encoding out of the thread doing the bulk.
+        """
+        if doc.get("_op_type", "index") == "index" and isinstance(
+            doc.get("_source"), dict
+        ):
+            doc["_source"] = self.__serializer.dumps(doc["_source"])
+        return doc
+
     def refresh(self, indices: t.List[str]) -> None:
         """Refresh the Elasticsearch/OpenSearch index."""
         self.__client.indices.refresh(index=indices)
 
+    def aliases(self, index: str) -> t.Dict[str, t.List[str]]:
+        """
+        Get the concrete indices matching an index, alias or pattern.
+
+        Returns a dict of each index to the names of its aliases e.g
+        {'cmm-search-artifact-v2': ['cmm-search', 'cmm-search-artifact']}
+        """
+        response: t.Any = self.__client.indices.get_alias(
+            index=index, ignore_unavailable=True
+        )
+        return {
+            name: sorted(value.get("aliases", {}).keys())
+            for name, value in response.items()
+        }
+
+    def update_aliases(self, actions: t.List[dict]) -> None:
+        """Apply alias actions atomically."""
+        logger.debug(f"Updating aliases: {actions}")
+        self.__client.indices.update_aliases(body={"actions": actions})
+
+    def get_settings(self, index: str) -> t.Dict[str, dict]:
+        """
+        Get the (flat) index settings of an index by concrete index.
+
+        An alias has the settings of every index behind it.
+        """
+        response: t.Any = self.__client.indices.get_settings(
+            index=index, flat_settings=True
+        )
+        return {
+            name: value.get("settings", {}) for name, value in response.items()
+        }
+
+    def refresh_interval(self, index: str) -> t.Optional[float]:
+        """
+        Get the refresh interval of an index in seconds.
+
+        This bounds the time from a bulk acknowledgement to the docs being
+        searchable. Returns -1 if refresh is disabled and the longest
+        interval when the index is an alias of several indices.
+        """
+        response: t.Any = self.__client.indices.get_settings(
+            index=index,
+            name="index.refresh_interval",
+            include_defaults=True,
+            flat_settings=True,
+        )
+        intervals: t.List[float] = []
+        for value in response.values():
+            interval: t.Optional[str] = value.get("settings", {}).get(
+                "index.refresh_interval"
+            ) or value.get("defaults", {}).get("index.refresh_interval")
+            if interval is None:
+                continue
+            match: t.Optional[t.Match] = TIME_VALUE.fullmatch(interval)
+            if match is None or (match["unit"] or "s") not in TIME_UNITS:
+                logger.warning(f"Unknown refresh interval: {interval}")
+                continue
+            seconds: float = float(match["value"])
+            if seconds < 0:
+                return -1
+            intervals.append(seconds * TIME_UNITS[match["unit"] or "s"])
+        return max(intervals, default=None)
+
+    def put_settings(self, index: str, setting: dict) -> None:
+        """Update the dynamic index settings of an index."""
+        logger.debug(f"Updating index {index} settings: {setting}")
+        self.__client.indices.put_settings(index=index, body=setting)
+
+    def wait_for_status(
+        self, index: str, status: str, timeout: str = "10m"
+    ) -> str:
+        """Wait for the health of an index to reach status."""
+        response: t.Any = self.__client.cluster.health(
+            index=index, wait_for_status=status, timeout=timeout
+        )
+        if response.get("timed_out"):
+            logger.warning(
+                f"Index {index} health is {response['status']} "
+                f"after waiting {timeout} for {status}"
+            )
+        return response["status"]
+
+    @property
+    def supports_pit(self) -> bool:
+        """Whether point in time (PIT) searches are supported."""
+        # Elasticsearch 7.12+ which has the _shard_doc sort, OpenSearch has
+        # its own PIT api and keeps using a scroll
+        return not self.is_opensearch and (
+            self.major_version,
+            self.minor_version,
+        ) >= (7, 12)
+
+    def _lookup_field(
+        self, index: str, table: str, column: str
+    ) -> t.List[str]:
+        """
+        Get the field(s) of the private area to match a column on.
+
+        The private area is mapped dynamically so a string is a text field
+        with a keyword sub-field, which is the one exact matches need, and a
+        number is a long field. The fields are only looked up once per
+        column. An empty list means the column is not mapped yet so no doc
+        can match. Both fields are matched when the mapping differs between
+        the indices of an alias or pattern.
+        """
+        key: t.Tuple[str, str, str] = (index, table, column)
+        if key in self._lookup_fields:
+            return self._lookup_fields[key]
+        name: str = f"{META}.{table}.{column}"
+        if self.major_version < 7 and not self.is_opensearch:
+            # the field mappings are nested by doc_type
+            return [name, f"{name}.keyword"]
+        response: t.Any = self.__client.indices.get_field_mapping(
+            index=index, fields=[name, f"{name}.keyword"]
+        )
+        fields: t.Set[str] = set()
+        for value in response.values():
+            mappings: dict = value.get("mappings", {})
+            if f"{name}.keyword" in mappings:
+                fields.add(f"{name}.keyword")
+            elif name in mappings:
+                fields.add(name)
+        if fields:
+            self._lookup_fields[key] = sorted(fields)
+        return sorted(fields)
+
+    def _lookup(
+        self, index: str, table: str, fields: t.Optional[dict] = None
+    ) -> t.Optional[t.Any]:
+        """
+        Get the search of the docs matching fields in the private area.
+
+        Returns None when a field is not mapped so no doc can match.
+        """
+        fields: dict = fields or {}
+        search = self.Search(using=self.__client, index=index)
+        # explicitly exclude all fields since we only need the doc _id
+        search = search.source(excludes=["*"])
+        for key, values in fields.items():
+            names: t.List[str] = self._lookup_field(index, table, key)
+            if not names:
+                return None
+            query: t.Any = self.Q("terms", **{names[0]: values})
+            for name in names[1:]:
+                query |= self.Q("terms", **{name: values})
+            search = search.query(self.Bool(filter=[query]))
+        return search
+
     def _search(self, index: str, table: str, fields: t.Optional[dict] = None):
         """
         Search private area for matching docs in Elasticsearch/OpenSearch.
@@ -225,31 +601,110 @@ class SearchClient(object):
             'id': [1, 2],
             'uid': ['a002', 'a009'],
         }
+
+        Most lookups match a few docs so a single search of up to
+        ELASTICSEARCH_LOOKUP_SIZE hits is tried first. When that is full the
+        docs are paged through a point in time (PIT) with search_after
+        instead, rather than keeping a scroll context open per lookup.
         """
-        fields: dict = fields or {}
-        search = self.Search(using=self.__client, index=index)
-        # explicitly exclude all fields since we only need the doc _id
-        search = search.source(excludes=["*"])
-        for key, values in fields.items():
-            search = search.query(
-                self.Bool(
-                    filter=[
-                        self.Q("terms", **{f"{META}.{table}.{key}": values})
-                        | self.Q(
-                            "terms",
-                            **{f"{META}.{table}.{key}.keyword": values},
-                        )
-                    ]
-                )
-            )
+        search: t.Optional[t.Any] = self._lookup(index, table, fields)
+        if search is None:
+            return
+        size: int = settings.ELASTICSEARCH_LOOKUP_SIZE
         try:
-            for hit in search.scan():
-                yield hit.meta.id
+            response: t.Any = search.extra(
+                size=size, track_total_hits=False
+            ).execute()
+            if len(response.hits) < size:
+                for hit in response.hits:
+                    yield hit.meta.id
+                return
+            if self.supports_pit:
+                yield from self._search_after(index, search, size)
+            else:
+                for hit in search.scan():
+                    yield hit.meta.id
         except elasticsearch.exceptions.RequestError as e:
             logger.warning(f"RequestError: {e}")
             if "is out of range for a long" not in str(e):
                 raise
 
+    def _search_after(self, index: str, search: t.Any, size: int):
+        """Page through the _id of all the docs of a search with a PIT."""
+        keep_alive: str = settings.ELASTICSEARCH_PIT_KEEP_ALIVE
+        pit_id: str = self.__client.open_point_in_time(
+            index=index, keep_alive=keep_alive
+        )["id"]
+        try:
+            # a PIT search has no index and pages in _shard_doc order
+            body: dict = (
+                search.sort("_shard_doc")
+                .extra(size=size, track_total_hits=False)
+                .to_dict()
+            )
+            search_after: t.Optional[list] = None
+            while True:
+                body["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+                if search_after is not None:
+                    body["search_after"] = search_after
+                response: t.Any = self.__client.search(body=body)
+                hits: t.List[dict] = response["hits"]["hits"]
+                for hit in hits:
+                    yield hit["_id"]
+                if len(hits) < size:
+                    return
+                # the PIT id can change between pages
+                pit_id = response.get("pit_id", pit_id)
+                search_after = hits[-1]["sort"]
+        finally:
+            self.__client.close_point_in_time(body={"id": pit_id})
+
+    def _msearch(
+        self, index: str, lookups: t.List[t.Tuple[str, dict]]
+    ) -> t.List[t.List[str]]:
+        """
+        Search private area for many lookups in a single multi search.
+
+        lookups is a list of (table, fields) as for _search and the _id of
+        the docs matching each lookup is returned in the same order.
+
+        lookups = [
+            ('book', {'isbn': ['001', '002']}),
+            ('author', {'id': [1, 2]}),
+        ]
+
+        A lookup matching more than ELASTICSEARCH_LOOKUP_SIZE docs or that
+        fails is repeated on its own with _search.
+        """
+        size: int = settings.ELASTICSEARCH_LOOKUP_SIZE
+        searches: t.List[t.Optional[t.Any]] = [
+            self._lookup(index, table, fields) for table, fields in lookups
+        ]
+        body: t.List[dict] = []
+        for search in searches:
+            if search is not None:
+                body.append({})
+                body.append(
+                    search.extra(size=size, track_total_hits=False).to_dict()
+                )
+        responses: t.Iterator[dict] = iter(
+            self.__client.msearch(index=index, body=body)["responses"]
+            if body
+            else []
+        )
+        results: t.List[t.List[str]] = []
+        for (table, fields), search in zip(lookups, searches):
+            if search is None:
+                results.append([])
+                continue
+            response: dict = next(responses)
+            hits: t.List[dict] = response.get("hits", {}).get("hits", [])
+            if "error" in response or len(hits) >= size:
+                results.append(list(self._search(index, table, fields)))
+            else:
+                results.append([hit["_id"] for hit in hits])
+        return results
+
     def search(self, index: str, body: dict) -> t.Any:
         """
         Search in Elasticsearch/OpenSearch.
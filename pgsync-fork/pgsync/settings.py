@@ -25,18 +25,70 @@ REDIS_CHECKPOINT = env.bool("REDIS_CHECKPOINT", default=False)
 JOIN_QUERIES = env.bool("JOIN_QUERIES", default=False)
 # batch size for LOGICAL_SLOT_CHANGES for minimizing tmp file disk usage
 LOGICAL_SLOT_CHUNK_SIZE = env.int("LOGICAL_SLOT_CHUNK_SIZE", default=5000)
+# logical decoding output plugin for the replication slot: test_decoding or wal2json
+LOGICAL_DECODING_PLUGIN = env.str(
+    "LOGICAL_DECODING_PLUGIN", default="test_decoding"
+)
+# memory budget (in bytes) for pending WAL/binlog changes before spilling to disk
+WAL_MEMORY_BUDGET = env.int("WAL_MEMORY_BUDGET", default=64 * 1024 * 1024)
+# directory for spilled WAL changes (defaults to the system temp directory)
+WAL_SPILL_PATH = env.str("WAL_SPILL_PATH", default=None)
 # stdout log interval (in secs)
 LOG_INTERVAL = env.float("LOG_INTERVAL", default=0.5)
+# serve Prometheus/OpenMetrics metrics on this port (disabled if unset)
+METRICS_PORT = env.int("METRICS_PORT", default=None)
+METRICS_HOST = env.str("METRICS_HOST", default="0.0.0.0")
+# secs between reads of the index refresh interval and slot retained WAL
+METRICS_REFRESH_INTERVAL = env.float("METRICS_REFRESH_INTERVAL", default=30)
+# with --profile, the stack sampling interval (in secs) and output file
+PROFILE_INTERVAL = env.float("PROFILE_INTERVAL", default=0.01)
+PROFILE_PATH = env.str("PROFILE_PATH", default="pgsync.folded")
+# record the docs slower to build (in ms) or larger serialized (in bytes)
+SLOW_DOC_MS = env.float("SLOW_DOC_MS", default=None)
+SLOW_DOC_BYTES = env.int("SLOW_DOC_BYTES", default=None)
+# JSON lines file of the slow docs and the max plans explained per minute
+SLOW_DOC_PATH = env.str("SLOW_DOC_PATH", default="slow_docs.jsonl")
+SLOW_DOC_EXPLAIN_LIMIT = env.int("SLOW_DOC_EXPLAIN_LIMIT", default=10)
 # number of workers to spawn for handling events
 NUM_WORKERS = env.int("NUM_WORKERS", default=2)
-# database driver psycopg2 or pymysql
+# database driver psycopg2, psycopg (3) or pymysql
 PG_DRIVER = env.str("PG_DRIVER", default="psycopg2")
 # poll db interval (consider reducing this duration to increase throughput)
 POLL_TIMEOUT = env.float("POLL_TIMEOUT", default=0.1)
 QUERY_LITERAL_BINDS = env.bool("QUERY_LITERAL_BINDS", default=False)
 # db query chunk size (how many records to fetch at a time)
 QUERY_CHUNK_SIZE = env.int("QUERY_CHUNK_SIZE", default=10000)
+# rows sampled by --analyze to EXPLAIN (ANALYZE) the sync queries with
+ANALYZE_SAMPLE_SIZE = env.int("ANALYZE_SAMPLE_SIZE", default=100)
 FILTER_CHUNK_SIZE = env.int("FILTER_CHUNK_SIZE", default=5000)
+# stream full syncs with COPY (query) TO STDOUT instead of a cursor
+COPY_EXPORT = env.bool("COPY_EXPORT", default=False)
+# number of threads syncing ranges of the root table in a full sync
+SYNC_WORKERS = env.int("SYNC_WORKERS", default=1)
+# number of ranges the root table is split into for a parallel full sync
+SYNC_PARTITIONS = env.int("SYNC_PARTITIONS", default=32)
+# apply the bulk load index settings during a full sync or large WAL replay
+BULK_LOAD_SETTINGS = env.bool("BULK_LOAD_SETTINGS", default=True)
+# min number of WAL changes for a replay to apply the bulk load settings
+BULK_LOAD_MIN_CHANGES = env.int("BULK_LOAD_MIN_CHANGES", default=100000)
+# cluster health to wait for once the index settings are restored
+BULK_LOAD_WAIT_FOR_STATUS = env.str(
+    "BULK_LOAD_WAIT_FOR_STATUS", default="yellow"
+)
+# run sync queries as concurrent fetch, transform and encode stages
+SYNC_PIPELINE = env.bool("SYNC_PIPELINE", default=False)
+# number of rows per batch passed between the pipeline stages
+PIPELINE_BATCH_SIZE = env.int("PIPELINE_BATCH_SIZE", default=1000)
+# max number of batches waiting between two pipeline stages
+PIPELINE_QUEUE_SIZE = env.int("PIPELINE_QUEUE_SIZE", default=8)
+PIPELINE_TRANSFORM_WORKERS = env.int("PIPELINE_TRANSFORM_WORKERS", default=2)
+PIPELINE_ENCODE_WORKERS = env.int("PIPELINE_ENCODE_WORKERS", default=1)
+# debounce window (in secs) for rebuilding dirty root docs (0 to rebuild inline)
+DIRTY_ROOT_DEBOUNCE = env.float("DIRTY_ROOT_DEBOUNCE", default=0)
+# number of dirty root docs to rebuild per query
+DIRTY_ROOT_BATCH_SIZE = env.int("DIRTY_ROOT_BATCH_SIZE", default=5000)
+# number of threads rebuilding dirty root docs
+DIRTY_ROOT_WORKERS = env.int("DIRTY_ROOT_WORKERS", default=1)
 # replication slot cleanup interval (in secs)
 REPLICATION_SLOT_CLEANUP_INTERVAL = env.float(
     "REPLICATION_SLOT_CLEANUP_INTERVAL",
@@ -47,6 +99,11 @@ SCHEMA = env.str("SCHEMA", default=None)
 S3_SCHEMA_URL = env.str("S3_SCHEMA_URL", default=None)
 SCHEMA_URL = env.str("SCHEMA_URL", default=None)
 USE_ASYNC = env.bool("USE_ASYNC", default=False)
+# asyncio database driver used when USE_ASYNC is enabled: asyncpg or psycopg
+PG_ASYNC_DRIVER = env.str(
+    "PG_ASYNC_DRIVER",
+    default="psycopg" if PG_DRIVER == "psycopg" else "asyncpg",
+)
 STREAM_RESULTS = env.bool("STREAM_RESULTS", default=True)
 # db polling interval
 POLL_INTERVAL = env.float("POLL_INTERVAL", default=0.1)
@@ -94,6 +151,9 @@ ELASTICSEARCH_HTTP_COMPRESS = env.bool(
 ELASTICSEARCH_INITIAL_BACKOFF = env.float(
     "ELASTICSEARCH_INITIAL_BACKOFF", default=2
 )
+# root lookups matching up to this many docs are a single search,
+# larger ones page through a point in time (PIT) with search_after
+ELASTICSEARCH_LOOKUP_SIZE = env.int("ELASTICSEARCH_LOOKUP_SIZE", default=1000)
 # maximum number of seconds a retry will wait
 ELASTICSEARCH_MAX_BACKOFF = env.float("ELASTICSEARCH_MAX_BACKOFF", default=600)
 # the maximum size of the request in bytes (default: 100MB)
@@ -106,6 +166,10 @@ ELASTICSEARCH_MAX_CHUNK_BYTES = env.int(
 ELASTICSEARCH_MAX_RETRIES = env.int("ELASTICSEARCH_MAX_RETRIES", default=0)
 ELASTICSEARCH_OPAQUE_ID = env.str("ELASTICSEARCH_OPAQUE_ID", default=None)
 ELASTICSEARCH_PASSWORD = env.str("ELASTICSEARCH_PASSWORD", default=None)
+# how long a point in time (PIT) is kept open between pages of a lookup
+ELASTICSEARCH_PIT_KEEP_ALIVE = env.str(
+    "ELASTICSEARCH_PIT_KEEP_ALIVE", default="1m"
+)
 ELASTICSEARCH_PORT = env.int("ELASTICSEARCH_PORT", default=9200)
 # the size of the task queue between the main thread
 # (producing chunks to send) and the processing threads.
@@ -247,6 +311,12 @@ REDIS_SOCKET_TIMEOUT = env.int("REDIS_SOCKET_TIMEOUT", default=5)
 # number of items to write to Redis/Valkey at a time
 REDIS_WRITE_CHUNK_SIZE = env.int("REDIS_WRITE_CHUNK_SIZE", default=500)
 REDIS_URL = env.str("REDIS_URL", default=None)
+# coalesce pending events per row (schema, table, primary key) in the queue
+REDIS_COALESCE = env.bool("REDIS_COALESCE", default=False)
+# publish the rolling stats of each process for pgsync top
+REDIS_STATS = env.bool("REDIS_STATS", default=False)
+# secs before the stats of a process that stopped publishing expire
+REDIS_STATS_TTL = env.int("REDIS_STATS_TTL", default=30)
 REDIS_RETRY_ON_TIMEOUT = env.bool(
     "REDIS_RETRY_ON_TIMEOUT",
     default=False,
@@ -0,0 +1,87 @@
+"""
+PGSync slow doc recorder.
+
+Opt-in with SLOW_DOC_MS and/or SLOW_DOC_BYTES. Every doc that takes longer
+to build (transform and plugins) or is larger serialized than these is
+appended to SLOW_DOC_PATH as a JSON line with:
+
+    index, _id  the doc
+    root        the primary keys of its root row
+    ms, bytes   its build time and serialized size
+    children    the number of rows of each child table in the doc
+    plan        the EXPLAIN (ANALYZE, BUFFERS) plan of the fetch of the doc
+                alone i.e its cost in the database
+
+The fetch is run again to explain it so at most SLOW_DOC_EXPLAIN_LIMIT plans
+are explained per minute and the docs over the limit are recorded without.
+The serialized size is only measured (by encoding every doc once more) when
+SLOW_DOC_BYTES is set.
+"""
+
+import json
+import logging
+import threading
+import time
+import typing as t
+from collections import deque
+
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+_lock: threading.Lock = threading.Lock()
+# the monotonic time of the plans explained within the last minute
+_explained: t.Deque[float] = deque()
+
+
+def enabled() -> bool:
+    """Whether docs are recorded i.e SLOW_DOC_MS or SLOW_DOC_BYTES is set."""
+    return (
+        settings.SLOW_DOC_MS is not None or settings.SLOW_DOC_BYTES is not None
+    )
+
+
+def size(source: t.Any) -> t.Optional[int]:
+    """The serialized size of a _source if SLOW_DOC_BYTES is set."""
+    if settings.SLOW_DOC_BYTES is None:
+        return None
+    return len(json.dumps(source, default=str, ensure_ascii=False).encode())
+
+
+def is_slow(ms: float, nbytes: t.Optional[int]) -> bool:
+    """Whether a doc is over either threshold."""
+    return (
+        settings.SLOW_DOC_MS is not None and ms > settings.SLOW_DOC_MS
+    ) or (nbytes is not None and nbytes > settings.SLOW_DOC_BYTES)
+
+
+def explain_allowed() -> bool:
+    """Whether another plan is within SLOW_DOC_EXPLAIN_LIMIT per minute."""
+    now: float = time.monotonic()
+    with _lock:
+        while _explained and now - _explained[0] > 60:
+            _explained.popleft()
+        if len(_explained) >= settings.SLOW_DOC_EXPLAIN_LIMIT:
+            return False
+        _explained.append(now)
+        return True
+
+
+def children(meta: t.Dict[str, dict]) -> t.Dict[str, int]:
+    """The number of rows of each table from the _meta of a doc."""
+    return {
+        table: max((len(values) for values in keys.values()), default=0)
+        for table, keys in meta.items()
+    }
+
+
+def record(value: dict) -> None:
+    """Append a slow doc to SLOW_DOC_PATH."""
+    logger.warning(
+        f"Slow doc {value['_id']} of {value['index']}: "
+        f"{value['ms']:.1f} ms, {value['bytes'] or '-'} bytes"
+    )
+    line: str = json.dumps(value, default=str, ensure_ascii=False)
+    with _lock:
+        with open(settings.SLOW_DOC_PATH, "a", encoding="utf-8") as fp:
+            fp.write(line + "\n")
@@ -7,11 +7,14 @@ import os
 import pprint
 import re
 import select
+import socket
 import sys
 import threading
 import time
 import typing as t
 from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from itertools import groupby
 from pathlib import Path
 
@@ -19,8 +22,6 @@ import click
 import pymysql
 import sqlalchemy as sa
 import sqlparse
-from psycopg2 import OperationalError
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from pymysqlreplication import BinLogStreamReader
 from pymysqlreplication.event import FormatDescriptionEvent, RotateEvent
 from pymysqlreplication.row_event import (
@@ -29,21 +30,33 @@ from pymysqlreplication.row_event import (
     WriteRowsEvent,
 )
 
-from pgsync.settings import IS_MYSQL_COMPAT
+from pgsync.settings import IS_MYSQL_COMPAT, PG_DRIVER
 
-from . import __version__, settings
+if PG_DRIVER == "psycopg":
+    from psycopg import OperationalError
+else:
+    from psycopg2 import OperationalError
+    from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from . import __version__, advisor, metrics, profiler, settings, slowdoc
 from .base import Base, Payload
+from .buffer import PayloadBuffer, sizeof
 from .constants import (
+    BULK_LOAD_INDEX_SETTINGS,
     DELETE,
     INSERT,
+    CONCAT_TRANSFORM,
     JSONB_OPERATORS,
+    LOGICAL_DECODING_PLUGINS,
     MATERIALIZED_VIEW,
     MATERIALIZED_VIEW_COLUMNS,
     META,
     PRIMARY_KEY_DELIMITER,
+    RENAME_TRANSFORM,
     TG_OPS,
     TRUNCATE,
     UPDATE,
+    WAL2JSON,
 )
 from .exc import (
     ForeignKeyError,
@@ -52,21 +65,33 @@ from .exc import (
     PrimaryKeyNotFoundError,
     RDSError,
     SchemaError,
+    TableNotFoundError,
 )
 from .node import Node, Tree
+from .partition import (
+    CTID,
+    key_partitions,
+    Partition,
+    RangeCheckpoint,
+    tid_partitions,
+)
+from .pipeline import Pipeline
 from .plugin import Plugins
 from .querybuilder import QueryBuilder
-from .redisqueue import RedisQueue
+from .redisqueue import AsyncRedisQueue, CoalescingRedisQueue, RedisQueue
+from .scheduler import DirtyRoots
 from .search_client import SearchClient
 from .singleton import Singleton
 from .transform import Transform
 from .utils import (
+    atomic_write,
     chunks,
     compiled_query,
     config_loader,
     exception,
     format_number,
     MutuallyExclusiveOption,
+    peak_rss,
     remap_unknown,
     show_settings,
     threaded,
@@ -74,10 +99,19 @@ from .utils import (
     validate_config,
 )
 
-TX_BOUNDARY_RE = re.compile(r"^(BEGIN|COMMIT)\s+(\d+)", re.IGNORECASE)
+logger = logging.getLogger(__name__)
 
 
-logger = logging.getLogger(__name__)
+def _wal2json_escape(name: str) -> str:
+    """Escape the special characters of a wal2json add-tables name."""
+    return re.sub(r"([\\,.*])", r"\\\1", name)
+
+
+def _splice_meta(row: str, meta: dict) -> str:
+    """Add the _meta key to the JSON text of an object without decoding it."""
+    body: str = row.rstrip()[:-1].rstrip()
+    separator: str = "" if body.endswith("{") else ","
+    return f'{body}{separator}"{META}":{json.dumps(meta)}}}'
 
 
 class Sync(Base, metaclass=Singleton):
@@ -95,6 +129,7 @@ class Sync(Base, metaclass=Singleton):
         producer: bool = True,
         consumer: bool = True,
         bootstrap: bool = False,
+        sync_workers: int = 1,
         **kwargs,
     ) -> None:
         """Constructor."""
@@ -114,15 +149,35 @@ class Sync(Base, metaclass=Singleton):
             "[^0-9a-zA-Z_]+", "", f"{self.database.lower()}_{self.index}"
         )
         self._checkpoint: t.Optional[t.Union[str, int]] = None
+        # when the checkpoint last advanced (or nothing was pending)
+        self._checkpoint_at: float = time.time()
+        # when the gauges read from the search cluster and db were last set
+        self._gauges_at: float = 0
+        self._logical_slot_options: t.Optional[t.List[str]] = None
         self._plugins: Plugins = None
         self._truncate: bool = False
         self.producer: bool = producer
         self.consumer: bool = consumer
         self.num_workers: int = num_workers
-        self.redis: RedisQueue = RedisQueue(self.__name)
+        self.sync_workers: int = sync_workers
+        self._bulk_loading: bool = False
+        self.redis: RedisQueue = (
+            CoalescingRedisQueue(self.__name, row_key=self._row_key)
+            if settings.REDIS_COALESCE
+            else RedisQueue(self.__name)
+        )
+        self.async_redis: t.Optional[AsyncRedisQueue] = (
+            AsyncRedisQueue(self.redis) if settings.USE_ASYNC else None
+        )
         self.tree: Tree = Tree(
             self.models, nodes=self.nodes, database=doc["database"]
         )
+        # map of base table to the node (view) table used in _on_publish
+        # i.e the first node in breadth first order with that base table
+        self._base_tables: t.Dict[str, str] = {}
+        for node in self.tree.traverse_breadth_first():
+            for table in node.base_tables:
+                self._base_tables.setdefault(table, node.table)
         if bootstrap:
             self.setup()
 
@@ -135,7 +190,12 @@ class Sync(Base, metaclass=Singleton):
 
         self.query_builder: QueryBuilder = QueryBuilder(verbose=verbose)
         self.count: dict = dict(xlog=0, db=0, redis=0)
+        self._dirty_roots: t.Optional[DirtyRoots] = (
+            DirtyRoots() if settings.DIRTY_ROOT_DEBOUNCE > 0 else None
+        )
         self.tasks: t.List[asyncio.Task] = []
+        # notifications waiting to be pushed to Redis/Valkey in async mode
+        self._notifications: t.Optional[asyncio.Queue] = None
         self.lock: threading.Lock = threading.Lock()
 
     @property
@@ -143,10 +203,47 @@ class Sync(Base, metaclass=Singleton):
         """Return the replication slot name."""
         return self.__name
 
+    @property
+    def logical_slot_options(self) -> t.List[str]:
+        """
+        Output plugin options for reading the replication slot.
+
+        For wal2json we restrict decoding to the tables in the tree
+        (including through and base tables) with add-tables.
+        """
+        if settings.LOGICAL_DECODING_PLUGIN != WAL2JSON:
+            return []
+        if self._logical_slot_options is None:
+            tables: t.Set[t.Tuple[str, str]] = set()
+            for node in self.tree.traverse_breadth_first():
+                tables.add((node.schema, node.table))
+                for through in node.relationship.throughs:
+                    tables.add((through.schema, through.table))
+                for table in node.base_tables:
+                    tables.add((node.schema, table))
+            self._logical_slot_options = [
+                "format-version",
+                "2",
+                "add-tables",
+                ",".join(
+                    f"{_wal2json_escape(schema)}.{_wal2json_escape(table)}"
+                    for schema, table in sorted(tables)
+                ),
+            ]
+        return self._logical_slot_options
+
     @property
     def checkpoint_file(self) -> str:
         return os.path.join(settings.CHECKPOINT_PATH, f".{self.__name}")
 
+    @property
+    def range_checkpoint(self) -> RangeCheckpoint:
+        """Progress of the current sync over ranges of the root table."""
+        return RangeCheckpoint(
+            f"{self.checkpoint_file}.ranges",
+            redis=self.redis if settings.REDIS_CHECKPOINT else None,
+        )
+
     def validate(self, repl_slots: bool = True, polling: bool = False) -> None:
         """Perform all validation right away."""
 
@@ -163,8 +260,16 @@ class Sync(Base, metaclass=Singleton):
 
         if not self.is_mysql_compat:
             if not polling:
-                max_replication_slots: t.Optional[str] = self.pg_settings(
-                    "max_replication_slots"
+                (
+                    max_replication_slots,
+                    wal_level,
+                    rds_logical_replication,
+                ) = self.pg_settings_many(
+                    [
+                        "max_replication_slots",
+                        "wal_level",
+                        "rds.logical_replication",
+                    ]
                 )
                 try:
                     if int(max_replication_slots) < 1:
@@ -175,17 +280,23 @@ class Sync(Base, metaclass=Singleton):
                         "by setting max_replication_slots = 1"
                     )
 
-                wal_level: t.Optional[str] = self.pg_settings("wal_level")
                 if not wal_level or wal_level.lower() != "logical":
                     raise RuntimeError(
                         "Enable logical decoding by setting wal_level = logical"
                     )
 
+                if (
+                    settings.LOGICAL_DECODING_PLUGIN
+                    not in LOGICAL_DECODING_PLUGINS
+                ):
+                    raise RuntimeError(
+                        f"Unsupported LOGICAL_DECODING_PLUGIN "
+                        f"{settings.LOGICAL_DECODING_PLUGIN}, use one of "
+                        f"{', '.join(LOGICAL_DECODING_PLUGINS)}"
+                    )
+
                 self._can_create_replication_slot("_tmp_")
 
-                rds_logical_replication: t.Optional[str] = self.pg_settings(
-                    "rds.logical_replication"
-                )
                 if (
                     rds_logical_replication
                     and rds_logical_replication.lower() == "off"
@@ -239,6 +350,22 @@ class Sync(Base, metaclass=Singleton):
                         f"No primary key(s) for base table: {table}"
                     )
 
+    def _join_columns(self, node: Node) -> t.List[str]:
+        """The foreign key columns a child node is joined to its parent by."""
+        foreign_keys: dict
+        if node.relationship.throughs:
+            through: Node = node.relationship.throughs[0]
+            foreign_keys = self.query_builder.get_foreign_keys(
+                node,
+                through,
+            )
+        else:
+            foreign_keys = self.query_builder.get_foreign_keys(
+                node.parent,
+                node,
+            )
+        return foreign_keys.get(node.name, [])
+
     def analyze(self) -> None:
         for node in self.tree.traverse_breadth_first():
             if node.is_root:
@@ -248,22 +375,9 @@ class Sync(Base, metaclass=Singleton):
                 str(primary_key.name) for primary_key in node.primary_keys
             ]
 
-            foreign_keys: dict
-            if node.relationship.throughs:
-                through: Node = node.relationship.throughs[0]
-                foreign_keys = self.query_builder.get_foreign_keys(
-                    node,
-                    through,
-                )
-            else:
-                foreign_keys = self.query_builder.get_foreign_keys(
-                    node.parent,
-                    node,
-                )
-
             columns: list
             for index in self.indices(node.table, node.schema):
-                columns = foreign_keys.get(node.name, [])
+                columns = self._join_columns(node)
                 if set(columns).issubset(index.get("column_names", [])) or set(
                     columns
                 ).issubset(primary_keys):
@@ -273,7 +387,7 @@ class Sync(Base, metaclass=Singleton):
                     )
                     break
             else:
-                columns = foreign_keys.get(node.name, [])
+                columns = self._join_columns(node)
                 sys.stdout.write(
                     f'Missing index on table "{node.table}" for columns: '
                     f"{columns}\n"
@@ -289,6 +403,100 @@ class Sync(Base, metaclass=Singleton):
                 sys.stdout.write("\n")
                 sys.stdout.flush()
 
+        if not self.is_mysql_compat:
+            self.advise()
+
+    def _sample(self, node: Node, columns: t.List[str]) -> t.List[dict]:
+        """Sample the values of columns of a node to filter by."""
+        return [
+            dict(zip(columns, row))
+            for row in self.fetchall(
+                sa.select(*[node.model.c[column] for column in columns])
+                .where(
+                    sa.and_(
+                        *[
+                            node.model.c[column].isnot(None)
+                            for column in columns
+                        ]
+                    )
+                )
+                .distinct()
+                .limit(settings.ANALYZE_SAMPLE_SIZE)
+            )
+        ]
+
+    def advise(self) -> None:
+        """
+        EXPLAIN (ANALYZE, BUFFERS) the sync queries of representative
+        changes and report the scans an index would avoid.
+
+        The shapes are the root docs of a sample of root primary keys, of a
+        sample of the join columns of each child and a sync from the
+        checkpoint filtered by xmin. Each is limited to ANALYZE_SAMPLE_SIZE
+        docs so only a sample is read.
+        """
+        root: Node = self.tree.root
+        primary_keys: t.List[str] = [
+            str(primary_key.name) for primary_key in root.primary_keys
+        ]
+        # the columns each table is looked up by
+        columns: t.Dict[str, t.List[str]] = {root.table: primary_keys}
+        shapes: t.List[t.Tuple[str, dict]] = [
+            (
+                f'root "{root.table}" by {", ".join(primary_keys)}',
+                {"filters": {root.table: self._sample(root, primary_keys)}},
+            )
+        ]
+        for node in self.tree.traverse_breadth_first():
+            if node.is_root or node.table in columns:
+                continue
+            columns[node.table] = self._join_columns(node)
+            if columns[node.table]:
+                shapes.append(
+                    (
+                        f'child "{node.table}" by '
+                        f'{", ".join(columns[node.table])}',
+                        {
+                            "filters": {
+                                node.table: self._sample(
+                                    node, columns[node.table]
+                                )
+                            }
+                        },
+                    )
+                )
+        shapes.append(
+            (
+                "full scan with xmin",
+                {"txmin": self.checkpoint or self.txid_current},
+            )
+        )
+
+        for label, kwargs in shapes:
+            node: Node = self._build_query(**kwargs)
+            plan: dict = self.explain(
+                node._subquery.select().limit(settings.ANALYZE_SAMPLE_SIZE)
+            )
+            sys.stdout.write(
+                f"EXPLAIN {label}: {plan['Execution Time']:.1f} ms, "
+                f"{advisor.buffers(plan['Plan']):,} buffers\n"
+            )
+            for finding in advisor.findings(plan, columns):
+                gain: str = (
+                    f" (est. -{finding.gain:.1f} ms)" if finding.gain else ""
+                )
+                sys.stdout.write(
+                    f'  {finding.kind} on "{finding.table}": '
+                    f"{finding.time:.1f} ms, {finding.buffers:,} buffers "
+                    f"in {finding.loops:,} loops\n"
+                    f"    {finding.detail}\n"
+                    f"    Suggest: \033[4m{finding.suggestion}\033[0m"
+                    f"{gain}\n"
+                )
+            sys.stdout.write("-" * 80)
+            sys.stdout.write("\n")
+            sys.stdout.flush()
+
     def create_setting(self) -> None:
         """Create Elasticsearch/OpenSearch setting and mapping if required."""
         self.search_client._create_setting(
@@ -404,6 +612,8 @@ class Sync(Base, metaclass=Singleton):
                 logger.warning(
                     f"Checkpoint file not found: {self.checkpoint_file}"
                 )
+            self.range_checkpoint.clear()
+            self._save_index_settings(None)
 
             self.redis.delete()
 
@@ -438,6 +648,32 @@ class Sync(Base, metaclass=Singleton):
             )
         return f"{PRIMARY_KEY_DELIMITER}".join(map(str, primary_keys))
 
+    def _row_key(self, payload: dict) -> str:
+        """
+        Identity of the row a queue item refers to for coalescing.
+
+        e.g public.book:[1]
+        Items without a primary key (e.g TRUNCATE) return an empty string
+        and are never coalesced.
+        """
+        if payload.get("tg_op") not in (INSERT, UPDATE, DELETE):
+            return ""
+        data: t.Optional[dict] = payload.get(
+            "old" if payload["tg_op"] == DELETE else "new"
+        )
+        try:
+            model: sa.sql.Alias = self.models(
+                payload["table"], payload["schema"]
+            )
+        except TableNotFoundError:
+            return ""
+        if not data or not model.primary_keys:
+            return ""
+        values: list = [data.get(key) for key in model.primary_keys]
+        if None in values:
+            return ""
+        return f"{payload['schema']}.{payload['table']}:{json.dumps(values)}"
+
     def log_xlog_progress(
         self, current: int, total: int, bar_length: int = 100
     ) -> None:
@@ -486,56 +722,27 @@ class Sync(Base, metaclass=Singleton):
         TODO: We can also process all INSERTS together and rearrange
         them as done below
         """
-        offset: int = 0
         limit: int = (
             logical_slot_chunk_size or settings.LOGICAL_SLOT_CHUNK_SIZE
         )
-        current: int = 0
         total: int = self.logical_slot_count_changes(
             self.__name,
             txmin=txmin,
             txmax=txmax,
             upto_lsn=upto_lsn,
+            options=self.logical_slot_options,
         )
-        while True:
-            # peek one page of up to limit rows
-            raw: t.List[sa.engine.row.Row] = self.logical_slot_peek_changes(
-                slot_name=self.__name,
-                txmin=txmin,
-                txmax=txmax,
-                upto_lsn=upto_lsn,
-                limit=limit,
-                offset=offset,
+        with self.bulk_load(enabled=total >= settings.BULK_LOAD_MIN_CHANGES):
+            peak, spilled, current = self._logical_slot_changes(
+                txmin, txmax, upto_lsn, limit, total
             )
-            if not raw:
-                break
-            offset += limit
-
-            # parse and filter out BEGIN/COMMIT and unwanted schemas
-            payloads: t.List[Payload] = []
-            for row in raw:
-                if TX_BOUNDARY_RE.match(row.data):
-                    continue
-                try:
-                    payload: Payload = self.parse_logical_slot(row.data)
-                except Exception:
-                    logger.exception(f"Error parsing row: {row.data}")
-                    raise
-                if payload.schema in self.tree.schemas:
-                    payloads.append(payload)
 
-            if payloads:
-                # bulk-index each consecutive run of (tg_op, table)
-                for (op, tbl), run in groupby(
-                    payloads,
-                    key=lambda payload: (payload.tg_op, payload.table),
-                ):
-                    batch: list = list(run)
-                    logger.debug(f"op: {op} tbl {tbl} - {len(batch)}")
-                    current += len(batch)
-                    self.log_xlog_progress(current, total, bar_length=30)
-                    self.search_client.bulk(self.index, self._payloads(batch))
-                    self.count["xlog"] += len(batch)
+        if current:
+            logger.info(
+                f"WAL replay high-water mark: {format_number(peak)} bytes "
+                f"buffered, {format_number(spilled)} changes spilled to disk, "
+                f"peak RSS {format_number(peak_rss())} bytes"
+            )
 
         # mark those rows consumed
         self.logical_slot_get_changes(
@@ -543,9 +750,75 @@ class Sync(Base, metaclass=Singleton):
             txmin=txmin,
             txmax=txmax,
             upto_lsn=upto_lsn,
+            options=self.logical_slot_options,
         )
         self.checkpoint = txmax or self.txid_current
 
+    def _logical_slot_changes(
+        self,
+        txmin: t.Optional[int],
+        txmax: t.Optional[int],
+        upto_lsn: t.Optional[str],
+        limit: int,
+        total: int,
+    ) -> t.Tuple[int, int, int]:
+        """
+        Replay the slot changes and return the high-water marks.
+
+        i.e the peak bytes buffered, the number of changes spilled to disk
+        and the number of changes replayed.
+        """
+        offset: int = 0
+        current: int = 0
+        peak: int = 0
+        spilled: int = 0
+        while True:
+            # stream one page of up to limit rows into a bounded buffer so
+            # that the cursor and advisory lock are released before indexing
+            with PayloadBuffer(
+                settings.WAL_MEMORY_BUDGET, dirpath=settings.WAL_SPILL_PATH
+            ) as buffer:
+                nrows: int = 0
+                for row in self.logical_slot_stream_changes(
+                    slot_name=self.__name,
+                    txmin=txmin,
+                    txmax=txmax,
+                    upto_lsn=upto_lsn,
+                    limit=limit,
+                    offset=offset,
+                    options=self.logical_slot_options,
+                ):
+                    nrows += 1
+                    # filter out BEGIN/COMMIT and unwanted schemas
+                    try:
+                        payload: t.Optional[Payload] = (
+                            self.decode_logical_slot(row.data)
+                        )
+                    except Exception:
+                        logger.exception(f"Error parsing row: {row.data}")
+                        raise
+                    if payload and payload.schema in self.tree.schemas:
+                        buffer.append(payload)
+
+                if not nrows:
+                    break
+                offset += limit
+                peak = max(peak, buffer.peak)
+                spilled += buffer.spilled
+
+                # bulk-index each consecutive run of (tg_op, table)
+                for batch in buffer.batches(limit):
+                    logger.debug(
+                        f"op: {batch[0].tg_op} tbl {batch[0].table} - "
+                        f"{len(batch)}"
+                    )
+                    current += len(batch)
+                    self.log_xlog_progress(current, total, bar_length=30)
+                    self.search_client.bulk(self.index, self._payloads(batch))
+                    self.count["xlog"] += len(batch)
+
+        return peak, spilled, current
+
     def _xlog_progress(self, current: int, total: t.Optional[int]) -> None:
         try:
             self.log_xlog_progress(current, total, bar_length=30)
@@ -612,6 +885,8 @@ class Sync(Base, metaclass=Singleton):
         batch: list = []
         last_key: t.Optional[tuple[str, str]] = None
         batch_limit = limit
+        batch_bytes: int = 0
+        peak: int = 0
 
         # Single-save checkpoint snapshot
         save_file: t.Optional[str] = start_log
@@ -655,9 +930,12 @@ class Sync(Base, metaclass=Singleton):
                         key = (payload.tg_op, payload.table)
                         if last_key is None or key == last_key:
                             batch.append(payload)
+                            batch_bytes += sizeof(payload)
                         else:
                             self._flush_batch(last_key, batch)
                             batch = [payload]
+                            batch_bytes = sizeof(payload)
+                        peak = max(peak, batch_bytes)
                         last_key = key
                         current += 1
                         self._xlog_progress(current, total)
@@ -684,9 +962,12 @@ class Sync(Base, metaclass=Singleton):
                         key = (payload.tg_op, payload.table)
                         if last_key is None or key == last_key:
                             batch.append(payload)
+                            batch_bytes += sizeof(payload)
                         else:
                             self._flush_batch(last_key, batch)
                             batch = [payload]
+                            batch_bytes = sizeof(payload)
+                        peak = max(peak, batch_bytes)
                         last_key = key
                         current += 1
                         self._xlog_progress(current, total)
@@ -704,16 +985,24 @@ class Sync(Base, metaclass=Singleton):
                         key = (payload.tg_op, payload.table)
                         if last_key is None or key == last_key:
                             batch.append(payload)
+                            batch_bytes += sizeof(payload)
                         else:
                             self._flush_batch(last_key, batch)
                             batch = [payload]
+                            batch_bytes = sizeof(payload)
+                        peak = max(peak, batch_bytes)
                         last_key = key
                         current += 1
                         self._xlog_progress(current, total)
 
-                if batch_limit and last_key and len(batch) >= batch_limit:
+                # flush on either the row limit or the memory budget
+                if last_key and (
+                    (batch_limit and len(batch) >= batch_limit)
+                    or batch_bytes >= settings.WAL_MEMORY_BUDGET
+                ):
                     self._flush_batch(last_key, batch)
                     batch = []
+                    batch_bytes = 0
                     last_key = None
 
         finally:
@@ -727,6 +1016,12 @@ class Sync(Base, metaclass=Singleton):
             stream.close()
             if save_file:
                 self.checkpoint = f"{save_file},{save_pos}"
+            if current:
+                logger.info(
+                    f"Binlog replay high-water mark: {format_number(peak)} "
+                    f"bytes buffered, peak RSS {format_number(peak_rss())} "
+                    f"bytes"
+                )
 
     def _flush_batch(self, last_key: tuple[str, str], batch: list) -> None:
         if not batch:
@@ -739,13 +1034,15 @@ class Sync(Base, metaclass=Singleton):
         node: Node,
         payloads: t.Sequence[Payload],
         filters: list,
+        lookups: t.Optional[list] = None,
     ) -> list:
         """
         Batched resolver for rows identifiable by the node's primary key(s).
 
         - Accumulates distinct PK values across payloads
         - Greedily chunks so no per-field 'terms' list exceeds max_terms_count
-        - Issues one search per chunk and de-dupes doc_ids
+        - Queues one lookup per chunk to lookups (see _resolve_roots) or
+          runs them right away in a single multi search without lookups
         """
         if not payloads:
             return filters
@@ -768,34 +1065,18 @@ class Sync(Base, metaclass=Singleton):
         # Current chunk state: ordered unique values per PK
         current_vals = {pk: [] for pk in pk_names}
         current_seen = {pk: set() for pk in pk_names}
-        seen_docs = set()
+        _lookups: list = [] if lookups is None else lookups
 
         def flush_chunk():
-            """Execute search for the current chunk and reset buffers."""
+            """Queue the lookup of the current chunk and reset buffers."""
             # Build fields only for PKs that have values in this chunk
-            fields = {pk: vals for pk, vals in current_vals.items() if vals}
+            fields = {
+                pk: list(vals) for pk, vals in current_vals.items() if vals
+            }
             if not fields:
                 return
 
-            for doc_id in self.search_client._search(
-                self.index, node.table, fields
-            ):
-                if doc_id in seen_docs:
-                    continue
-                seen_docs.add(doc_id)
-
-                parts = doc_id.split(PRIMARY_KEY_DELIMITER)
-                # Map root PKs in order
-                where = {}
-                if len(parts) == len(self.tree.root.model.primary_keys):
-                    for i, key in enumerate(self.tree.root.model.primary_keys):
-                        where[key] = parts[i]
-                    filters.append(where)
-                else:
-                    logger.warning(
-                        f"Skipping malformed doc_id: {doc_id}. "
-                        f"Expected {len(self.tree.root.model.primary_keys)} parts, got {len(parts)}"
-                    )
+            _lookups.append((node.table, fields, filters))
 
             # reset chunk
             for pk in pk_names:
@@ -835,6 +1116,9 @@ class Sync(Base, metaclass=Singleton):
         # Flush remaining
         flush_chunk()
 
+        if lookups is None:
+            self._resolve_roots(_lookups)
+
         return filters
 
     def _root_foreign_key_resolver(
@@ -843,11 +1127,15 @@ class Sync(Base, metaclass=Singleton):
         payloads: t.Sequence[Payload],
         foreign_keys: dict,
         filters: list,
+        lookups: t.Optional[list] = None,
     ) -> list:
         """
         Batched FK resolver with chunking to respect ES/OpenSearch terms limits.
         Splits large value sets into chunks so that each field's terms list
         is <= max_terms_count (defaults to 65536).
+
+        The lookup of each chunk is queued to lookups (see _resolve_roots)
+        or run right away in a single multi search without lookups.
         """
         if not payloads:
             return filters
@@ -881,36 +1169,55 @@ class Sync(Base, metaclass=Singleton):
         if max_terms <= 0:
             max_terms = 65536  # sane fallback
 
-        seen_docs = set()
+        _lookups: list = [] if lookups is None else lookups
 
         # For each chunk, build a fields dict mapping *each* PK name -> chunked values,
         # mirroring your original semantics.
         pk_names = [k.name for k in node.primary_keys]
         for chunk in chunks(foreign_values, max_terms):
             fields = {pk: list(chunk) for pk in pk_names}
+            _lookups.append((node.parent.table, fields, filters))
 
-            for doc_id in self.search_client._search(
-                self.index, node.parent.table, fields
-            ):
-                if doc_id in seen_docs:
+        if lookups is None:
+            self._resolve_roots(_lookups)
+
+        return filters
+
+    def _resolve_roots(
+        self, lookups: t.List[t.Tuple[str, dict, list]]
+    ) -> None:
+        """
+        Run the queued private area lookups in a single multi search.
+
+        Each lookup is a (table, fields, filters) tuple. The root primary
+        keys of each doc a lookup matches are appended to its filters,
+        once per doc even when several lookups share the same filters.
+        """
+        if not lookups:
+            return
+        primary_keys: t.List[str] = self.tree.root.model.primary_keys
+        seen: t.Dict[int, t.Set[str]] = defaultdict(set)
+        for (_, _, filters), doc_ids in zip(
+            lookups,
+            self.search_client._msearch(
+                self.index, [(table, fields) for table, fields, _ in lookups]
+            ),
+        ):
+            for doc_id in doc_ids:
+                if doc_id in seen[id(filters)]:
                     continue
-                seen_docs.add(doc_id)
+                seen[id(filters)].add(doc_id)
 
-                parts = doc_id.split(PRIMARY_KEY_DELIMITER)
+                parts: t.List[str] = doc_id.split(PRIMARY_KEY_DELIMITER)
                 # skip malformed doc_ids that don't match root PK arity
-                if len(parts) != len(self.tree.root.model.primary_keys):
+                if len(parts) != len(primary_keys):
                     logger.warning(
                         f"Skipping malformed doc_id: {doc_id}. "
-                        f"Expected {len(self.tree.root.model.primary_keys)} parts, got {len(parts)}"
+                        f"Expected {len(primary_keys)} parts, "
+                        f"got {len(parts)}"
                     )
                     continue
-
-                where: dict = {}
-                for i, key in enumerate(self.tree.root.model.primary_keys):
-                    where[key] = parts[i]
-                filters.append(where)
-
-        return filters
+                filters.append(dict(zip(primary_keys, parts)))
 
     def _through_node_resolver(
         self,
@@ -954,7 +1261,11 @@ class Sync(Base, metaclass=Singleton):
         return filters
 
     def _insert_op(
-        self, node: Node, filters: dict, payloads: t.List[Payload]
+        self,
+        node: Node,
+        filters: dict,
+        payloads: t.List[Payload],
+        lookups: t.Optional[list] = None,
     ) -> dict:
         if node.is_through:
 
@@ -997,16 +1308,16 @@ class Sync(Base, metaclass=Singleton):
             ThroughTable represents the relationship between NodeA and NodeB
 
             """
-            _filters: list = []
-            _filters = self._root_primary_key_resolver(
-                node.parent, payloads, _filters
+            self._root_primary_key_resolver(
+                node.parent, payloads, filters[self.tree.root.table], lookups
             )
             if node.parent.parent:
-                _filters = self._root_primary_key_resolver(
-                    node.parent.parent, payloads, _filters
+                self._root_primary_key_resolver(
+                    node.parent.parent,
+                    payloads,
+                    filters[self.tree.root.table],
+                    lookups,
                 )
-            if _filters:
-                filters[self.tree.root.table].extend(_filters)
 
         elif node.table in self.tree.tables:
             if node.is_root:
@@ -1048,19 +1359,19 @@ class Sync(Base, metaclass=Singleton):
                                     {parent_key: payload.data[node_key]}
                                 )
 
-                _filters: list = []
-                _filters = self._root_foreign_key_resolver(
-                    node, payloads, foreign_keys, _filters
+                self._root_foreign_key_resolver(
+                    node,
+                    payloads,
+                    foreign_keys,
+                    filters[self.tree.root.table],
+                    lookups,
                 )
 
                 # also check through table with a direct references to root
-                _filters = self._through_node_resolver(
-                    node, payloads, _filters
+                self._through_node_resolver(
+                    node, payloads, filters[self.tree.root.table]
                 )
 
-                if _filters:
-                    filters[self.tree.root.table].extend(_filters)
-
         return filters
 
     def _update_op(
@@ -1068,6 +1379,7 @@ class Sync(Base, metaclass=Singleton):
         node: Node,
         filters: dict,
         payloads: t.List[dict],
+        lookups: t.Optional[list] = None,
     ) -> dict:
         if node.is_root:
             # Here, we are performing two operations:
@@ -1123,9 +1435,8 @@ class Sync(Base, metaclass=Singleton):
 
         else:
             # update the child tables
-            _filters: list = []
-            _filters = self._root_primary_key_resolver(
-                node, payloads, _filters
+            self._root_primary_key_resolver(
+                node, payloads, filters[self.tree.root.table], lookups
             )
             foreign_keys = []
             if node.parent:
@@ -1140,20 +1451,29 @@ class Sync(Base, metaclass=Singleton):
                         node,
                     )
 
-            _filters = self._root_foreign_key_resolver(
-                node, payloads, foreign_keys, _filters
+            self._root_foreign_key_resolver(
+                node,
+                payloads,
+                foreign_keys,
+                filters[self.tree.root.table],
+                lookups,
             )
-            if _filters:
-                filters[self.tree.root.table].extend(_filters)
 
         return filters
 
     def _delete_op(
-        self, node: Node, filters: dict, payloads: t.List[dict]
+        self,
+        node: Node,
+        filters: dict,
+        payloads: t.List[dict],
+        lookups: t.Optional[list] = None,
     ) -> dict:
         # ByteX Technology: Debug logging for DELETE operations
-        print(f"[ByteX DELETE] _delete_op called: table={node.table}, is_root={node.is_root}, payloads={len(payloads)}")
-        
+        logger.debug(
+            f"Delete op: table={node.table}, is_root={node.is_root}, "
+            f"payloads={len(payloads)}"
+        )
+
         # when deleting a root node, just delete the doc in
         # Elasticsearch/OpenSearch
         if node.is_root:
@@ -1179,14 +1499,17 @@ class Sync(Base, metaclass=Singleton):
                     doc["_type"] = "_doc"
                 docs.append(doc)
             # ByteX Technology: Log before plugin processing
-            print(f"[ByteX DELETE] Processing {len(docs)} docs for deletion, has_plugins={self._plugins is not None}")
-            
+            logger.debug(
+                f"Deleting {len(docs)} docs, "
+                f"has_plugins={self._plugins is not None}"
+            )
+
             if docs:
                 # Pass DELETE operations through plugins (ByteX Technology modification)
                 if self._plugins:
                     processed_docs: list = []
                     for doc, payload in zip(docs, payloads):
-                        print(f"[ByteX DELETE] Processing doc {doc['_id']} through plugin")
+                        logger.debug(f"Delete doc {doc['_id']} plugins")
                         # Add source data for plugin access
                         plugin_doc = {
                             "_id": doc["_id"],
@@ -1195,25 +1518,31 @@ class Sync(Base, metaclass=Singleton):
                         }
                         
                         try:
-                            result = next(self._plugins.transform(
-                                [plugin_doc],
-                                operation="delete"
-                            ))
-                            
-                            print(f"[ByteX DELETE] Plugin returned result for {doc['_id']}: {result is not None}")
+                            with profiler.span("plugins"):
+                                result = next(
+                                    self._plugins.transform(
+                                        [plugin_doc], operation="delete"
+                                    )
+                                )
+
+                            logger.debug(
+                                f"Delete doc {doc['_id']} plugin result: "
+                                f"{result is not None}"
+                            )
                             # Plugin can block delete by returning None
                             if result and result.get("_source") is not None:
                                 processed_docs.append(doc)
                         except StopIteration:
                             # Plugin returned None, skip this document
-                            print(f"[ByteX DELETE] Plugin blocked deletion of {doc['_id']}")
+                            logger.debug(
+                                f"Plugin blocked delete of {doc['_id']}"
+                            )
                             pass
                     
                     docs = processed_docs
-                    print(f"[ByteX DELETE] After plugin processing: {len(docs)} docs remain")
-                
+                    logger.debug(f"{len(docs)} docs to delete after plugins")
+
                 if docs:
-                    print(f"[ByteX DELETE] Executing bulk delete for {len(docs)} docs")
                     raise_on_exception: t.Optional[bool] = (
                         False if settings.USE_ASYNC else None
                     )
@@ -1231,12 +1560,9 @@ class Sync(Base, metaclass=Singleton):
             # when deleting the child node, find the doc _id where
             # the child keys match in private, then get the root doc_id and
             # re-sync the child tables
-            _filters: list = []
-            _filters = self._root_primary_key_resolver(
-                node, payloads, _filters
+            self._root_primary_key_resolver(
+                node, payloads, filters[self.tree.root.table], lookups
             )
-            if _filters:
-                filters[self.tree.root.table].extend(_filters)
 
         return filters
 
@@ -1277,13 +1603,18 @@ class Sync(Base, metaclass=Singleton):
 
         return filters
 
-    def _payloads(self, payloads: t.List[Payload]) -> t.Generator:
+    def _payloads(
+        self, payloads: t.List[Payload], defer: bool = False
+    ) -> t.Generator:
         """
         The "payloads" is a list of payload operations to process together.
 
         The basic assumption is that all payloads in the list have the
         same tg_op and table name.
 
+        With defer, the resolved root docs are marked dirty for the
+        dirty root builder instead of being rebuilt here.
+
         e.g:
         [
             Payload(
@@ -1307,6 +1638,67 @@ class Sync(Base, metaclass=Singleton):
             ...
         ]
 
+        """
+        with metrics.RESOLVE_SECONDS.time(index=self.index):
+            with profiler.span("payloads"):
+                resolved: t.Optional[t.Tuple[Node, dict]] = self._resolve(
+                    payloads
+                )
+        if resolved is None:
+            return
+        yield from self._resolved(*resolved, defer=defer)
+
+    def _resolved(
+        self, node: Node, filters: dict, defer: bool = False
+    ) -> t.Generator:
+        """Sync (or with defer mark dirty) the docs of a resolved batch."""
+        if defer:
+            self._dirty_roots.add(filters[self.tree.root.table])
+            return
+
+        for _filters in self._chunk_filters(node, filters):
+            yield from self.sync(filters=_filters)
+
+    async def _async_resolved(
+        self, node: Node, filters: dict, defer: bool = False
+    ) -> t.AsyncGenerator:
+        """Async counterpart of _resolved."""
+        if defer:
+            self._dirty_roots.add(filters[self.tree.root.table])
+            return
+
+        for _filters in self._chunk_filters(node, filters):
+            async for doc in self.async_sync(filters=_filters):
+                yield doc
+
+    def _resolve_batches(
+        self, batches: t.Iterable[t.List[Payload]]
+    ) -> t.List[t.Tuple[Node, dict]]:
+        """
+        Resolve batches of payloads to the node and filters of their docs.
+
+        The private area lookups of all the batches are queued and run
+        together so a mixed batch of child table changes costs a single
+        multi search round trip.
+        """
+        with metrics.RESOLVE_SECONDS.time(index=self.index):
+            with profiler.span("payloads"):
+                lookups: list = []
+                resolved: t.List[t.Optional[t.Tuple[Node, dict]]] = [
+                    self._resolve(batch, lookups) for batch in batches
+                ]
+                self._resolve_roots(lookups)
+        return [value for value in resolved if value is not None]
+
+    def _resolve(
+        self, payloads: t.List[Payload], lookups: t.Optional[list] = None
+    ) -> t.Optional[t.Tuple[Node, dict]]:
+        """
+        Resolve payloads to the node and filters of the affected docs.
+
+        With lookups, the private area lookups are queued there for the
+        caller to run with _resolve_roots. Otherwise they are run together
+        before returning.
         """
         payload: Payload = payloads[0]
         if payload.tg_op not in TG_OPS:
@@ -1322,7 +1714,7 @@ class Sync(Base, metaclass=Singleton):
             payload.table not in self.tree.tables
             or payload.schema not in self.tree.schemas
         ):
-            return
+            return None
 
         node: Node = self.tree.get_node(payload.table, payload.schema)
 
@@ -1340,6 +1732,12 @@ class Sync(Base, metaclass=Singleton):
                     raise
 
         logger.debug(f"tg_op: {payload.tg_op} table: {node.name}")
+        metrics.EVENTS_RESOLVED.inc(
+            len(payloads),
+            index=self.index,
+            table=node.table,
+            tg_op=payload.tg_op,
+        )
 
         filters: dict = {
             node.table: [],
@@ -1348,11 +1746,14 @@ class Sync(Base, metaclass=Singleton):
         if not node.is_root:
             filters[node.parent.table] = []
 
+        _lookups: list = [] if lookups is None else lookups
+
         if payload.tg_op == INSERT:
             filters = self._insert_op(
                 node,
                 filters,
                 payloads,
+                _lookups,
             )
 
         if payload.tg_op == UPDATE:
@@ -1360,6 +1761,7 @@ class Sync(Base, metaclass=Singleton):
                 node,
                 filters,
                 payloads,
+                _lookups,
             )
 
         if payload.tg_op == DELETE:
@@ -1367,65 +1769,70 @@ class Sync(Base, metaclass=Singleton):
                 node,
                 filters,
                 payloads,
+                _lookups,
             )
 
         if payload.tg_op == TRUNCATE:
             filters = self._truncate_op(node, filters)
 
+        if lookups is None:
+            self._resolve_roots(_lookups)
+
+        return node, filters
+
+    def _chunk_filters(self, node: Node, filters: dict) -> t.Iterator[dict]:
+        """
+        Split the filters of a resolved batch into sync query filters.
+
+        Filters are applied when an insert, update or delete operation
+        occurs. For a large table update, this normally results
+        in a large SQL query with multiple OR clauses.
+
+        Filters is a dict of tables where each key is a list of id's
+        {
+            'city': [
+                {'id': '1'},
+                {'id': '4'},
+                {'id': '5'},
+            ],
+            'book': [
+                {'id': '1'},
+                {'id': '2'},
+                {'id': '7'},
+                ...
+            ]
+        }
+        """
         # If there are no filters, then don't execute the sync query
         # otherwise we would end up performing a full query
         # and sync the entire db!
-        if any(filters.values()):
-            """
-            Filters are applied when an insert, update or delete operation
-            occurs. For a large table update, this normally results
-            in a large SQL query with multiple OR clauses.
+        if not any(filters.values()):
+            return
 
-            Filters is a dict of tables where each key is a list of id's
-            {
-                'city': [
-                    {'id': '1'},
-                    {'id': '4'},
-                    {'id': '5'},
-                ],
-                'book': [
-                    {'id': '1'},
-                    {'id': '2'},
-                    {'id': '7'},
-                    ...
-                ]
-            }
-            """
-            for l1 in chunks(
-                filters.get(self.tree.root.table), settings.FILTER_CHUNK_SIZE
-            ):
-                if filters.get(node.table):
-                    for l2 in chunks(
-                        filters.get(node.table), settings.FILTER_CHUNK_SIZE
-                    ):
-                        if not node.is_root and filters.get(node.parent.table):
-                            for l3 in chunks(
-                                filters.get(node.parent.table),
-                                settings.FILTER_CHUNK_SIZE,
-                            ):
-                                yield from self.sync(
-                                    filters={
-                                        self.tree.root.table: l1,
-                                        node.table: l2,
-                                        node.parent.table: l3,
-                                    },
-                                )
-                        else:
-                            yield from self.sync(
-                                filters={
-                                    self.tree.root.table: l1,
-                                    node.table: l2,
-                                },
-                            )
-                else:
-                    yield from self.sync(
-                        filters={self.tree.root.table: l1},
-                    )
+        for l1 in chunks(
+            filters.get(self.tree.root.table), settings.FILTER_CHUNK_SIZE
+        ):
+            if filters.get(node.table):
+                for l2 in chunks(
+                    filters.get(node.table), settings.FILTER_CHUNK_SIZE
+                ):
+                    if not node.is_root and filters.get(node.parent.table):
+                        for l3 in chunks(
+                            filters.get(node.parent.table),
+                            settings.FILTER_CHUNK_SIZE,
+                        ):
+                            yield {
+                                self.tree.root.table: l1,
+                                node.table: l2,
+                                node.parent.table: l3,
+                            }
+                    else:
+                        yield {
+                            self.tree.root.table: l1,
+                            node.table: l2,
+                        }
+            else:
+                yield {self.tree.root.table: l1}
 
     def sync(
         self,
@@ -1433,6 +1840,7 @@ class Sync(Base, metaclass=Singleton):
         txmin: t.Optional[int] = None,
         txmax: t.Optional[int] = None,
         ctid: t.Optional[dict] = None,
+        partition: t.Optional[Partition] = None,
     ) -> t.Generator:
         """
         Synchronizes data from PostgreSQL/MySQL/MariaDB to Elasticsearch/OpenSearch.
@@ -1442,77 +1850,325 @@ class Sync(Base, metaclass=Singleton):
             txmin (Optional[int]): The minimum transaction ID to include in the synchronization.
             txmax (Optional[int]): The maximum transaction ID to include in the synchronization.
             ctid (Optional[dict]): A dictionary of ctid values to include in the synchronization.
+            partition (Optional[Partition]): A range of the root table to limit the synchronization to.
 
         Yields:
             dict: A dictionary representing a doc to be indexed in Elasticsearch/OpenSearch.
         """
-        self.query_builder.isouter = True
-        self.query_builder.from_obj = None
-
-        for node in self.tree.traverse_post_order():
-            node._subquery = None
-            node._filters = []
-            node.setup()
-
-            try:
-                self.query_builder.build_queries(
-                    node, filters=filters, txmin=txmin, txmax=txmax, ctid=ctid
-                )
-            except Exception as e:
-                logger.exception(f"Exception {e}")
-                raise
+        node: Node = self._build_query(
+            filters=filters,
+            txmin=txmin,
+            txmax=txmax,
+            ctid=ctid,
+            partition=partition,
+        )
+        if settings.COPY_EXPORT and not filters and not self.is_mysql_compat:
+            yield from self._copy_export(node)
+            return
 
-        if self.verbose:
-            compiled_query(node._subquery, "Query")
+        if settings.SYNC_PIPELINE:
+            yield from self._pipeline(node)
+            return
 
         for i, (keys, row, primary_keys) in enumerate(
-            self.fetchmany(node._subquery)
+            profiler.traced(
+                metrics.FETCH_SECONDS.timed(
+                    self.fetchmany(node._subquery), index=self.index
+                ),
+                "fetchmany",
+            )
         ):
-            row: dict = Transform.transform(row, self.nodes)
+            doc: t.Optional[dict] = self._build_doc(
+                node, keys, row, primary_keys, i
+            )
+            if doc:
+                yield doc
 
-            row[META] = Transform.get_primary_keys(keys)
+    async def async_sync(
+        self,
+        filters: t.Optional[dict] = None,
+        txmin: t.Optional[int] = None,
+        txmax: t.Optional[int] = None,
+        ctid: t.Optional[dict] = None,
+    ) -> t.AsyncGenerator:
+        """Async counterpart of sync streaming rows from the async engine."""
+        node: Node = self._build_query(
+            filters=filters, txmin=txmin, txmax=txmax, ctid=ctid
+        )
+        i: int = 0
+        rows: t.AsyncIterator = profiler.async_traced(
+            metrics.FETCH_SECONDS.async_timed(
+                self.async_fetchmany(node._subquery), index=self.index
+            ),
+            "fetchmany",
+        )
+        async for keys, row, primary_keys in rows:
+            doc: t.Optional[dict] = self._build_doc(
+                node, keys, row, primary_keys, i
+            )
+            i += 1
+            if doc:
+                yield doc
 
-            if node.is_root:
-                primary_key_values: t.List[str] = list(map(str, primary_keys))
-                primary_key_names: t.List[str] = [
-                    primary_key.name for primary_key in node.primary_keys
-                ]
-                # TODO: add support for composite pkeys
-                row[META][node.table] = {
-                    primary_key_names[0]: [primary_key_values[0]],
-                }
+    @property
+    def passthrough(self) -> bool:
+        """
+        True if the row JSON from the database is already the doc _source.
 
-            if self.verbose:
-                print(f"{(i + 1)})")
-                print(f"pkeys: {primary_keys}")
-                pprint.pprint(row)
-                print("-" * 10)
+        i.e there are no transforms, plugins or routing to apply to it.
+        """
+        return not (
+            self._plugins
+            or self.routing
+            or Transform.get(self.nodes, RENAME_TRANSFORM)
+            or Transform.get(self.nodes, CONCAT_TRANSFORM)
+        )
+
+    def _copy_export(self, node: Node) -> t.Iterator[dict]:
+        """
+        Stream the docs of a full sync from COPY (query) TO STDOUT.
+
+        When the row needs no transform its JSON text is passed through to
+        the bulk helper as the _source with only _meta spliced in.
+        """
+        passthrough: bool = self.passthrough
+        for i, (keys, row, *primary_keys) in enumerate(
+            profiler.traced(
+                metrics.FETCH_SECONDS.timed(
+                    self.fetchcopy(node._subquery), index=self.index
+                ),
+                "fetchcopy",
+            )
+        ):
+            if not passthrough:
+                doc: t.Optional[dict] = self._build_doc(
+                    node, json.loads(keys), json.loads(row), primary_keys, i
+                )
+                if doc:
+                    yield doc
+                continue
 
-            doc: dict = {
+            meta: dict = Transform.get_primary_keys(json.loads(keys))
+            if node.is_root:
+                # TODO: add support for composite pkeys
+                meta[node.table] = {
+                    node.primary_keys[0].name: [primary_keys[0]],
+                }
+            doc = {
                 "_id": self.get_doc_id(primary_keys, node.table),
                 "_index": self.index,
-                "_source": row,
+                "_source": _splice_meta(row, meta),
             }
-
-            if self.routing:
-                doc["_routing"] = row[self.routing]
-
             if (
                 self.search_client.major_version < 7
                 and not self.search_client.is_opensearch
             ):
                 doc["_type"] = "_doc"
-
-            if self._plugins:
-                doc = next(self._plugins.transform([doc]))
-                if not doc:
-                    continue
-
             if self.pipeline:
                 doc["pipeline"] = self.pipeline
-
+            metrics.ROOTS_REBUILT.inc(index=self.index)
             yield doc
 
+    def _pipeline(self, node: Node) -> Pipeline:
+        """
+        Pipeline the query of node into docs ready for the bulk helper.
+
+        The rows are fetched, transformed (incl. plugins) and encoded by
+        separate threads so that reading from the database overlaps with
+        building docs and writing to Elasticsearch/OpenSearch.
+        """
+        statement: sa.sql.Select = node._subquery
+        read_only: bool = getattr(self._thread_local, "read_only", False)
+        snapshot: t.Optional[str] = getattr(
+            self._thread_local, "snapshot", None
+        )
+
+        def fetch() -> t.Iterator[list]:
+            self._thread_local.read_only = read_only
+            self._thread_local.snapshot = snapshot
+            batch: list = []
+            for i, row in enumerate(
+                profiler.traced(
+                    metrics.FETCH_SECONDS.timed(
+                        self.fetchmany(statement), index=self.index
+                    ),
+                    "fetchmany",
+                )
+            ):
+                batch.append((i, *row))
+                if len(batch) >= settings.PIPELINE_BATCH_SIZE:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+        def transform(rows: list) -> list:
+            docs: list = []
+            for i, keys, row, primary_keys in rows:
+                doc: t.Optional[dict] = self._build_doc(
+                    node, keys, row, primary_keys, i
+                )
+                if doc:
+                    docs.append(doc)
+            return docs
+
+        def encode(docs: list) -> list:
+            return [self.search_client.encode(doc) for doc in docs]
+
+        return Pipeline(
+            ("fetch", fetch),
+            [
+                ("transform", transform, settings.PIPELINE_TRANSFORM_WORKERS),
+                ("encode", encode, settings.PIPELINE_ENCODE_WORKERS),
+            ],
+            maxsize=settings.PIPELINE_QUEUE_SIZE,
+        )
+
+    def _build_query(
+        self,
+        filters: t.Optional[dict] = None,
+        txmin: t.Optional[int] = None,
+        txmax: t.Optional[int] = None,
+        ctid: t.Optional[dict] = None,
+        partition: t.Optional[Partition] = None,
+    ) -> Node:
+        """Build the query of every node and return the root node."""
+        self.query_builder.isouter = True
+        self.query_builder.from_obj = None
+
+        with profiler.span("build_queries"):
+            for node in self.tree.traverse_post_order():
+                node._subquery = None
+                node._filters = []
+                node.setup()
+
+                try:
+                    self.query_builder.build_queries(
+                        node,
+                        filters=filters,
+                        txmin=txmin,
+                        txmax=txmax,
+                        ctid=ctid,
+                        partition=partition,
+                    )
+                except Exception as e:
+                    logger.exception(f"Exception {e}")
+                    raise
+
+        if self.verbose:
+            compiled_query(node._subquery, "Query")
+
+        return node
+
+    def _build_doc(
+        self,
+        node: Node,
+        keys: dict,
+        row: dict,
+        primary_keys: list,
+        i: int,
+    ) -> t.Optional[dict]:
+        """Build the bulk action of a row or None if a plugin dropped it."""
+        since: float = time.perf_counter()
+        with profiler.span("transform"):
+            row: dict = Transform.transform(row, self.nodes)
+
+        row[META] = meta = Transform.get_primary_keys(keys)
+
+        if node.is_root:
+            primary_key_values: t.List[str] = list(map(str, primary_keys))
+            primary_key_names: t.List[str] = [
+                primary_key.name for primary_key in node.primary_keys
+            ]
+            # TODO: add support for composite pkeys
+            row[META][node.table] = {
+                primary_key_names[0]: [primary_key_values[0]],
+            }
+
+        if self.verbose:
+            print(f"{(i + 1)})")
+            print(f"pkeys: {primary_keys}")
+            pprint.pprint(row)
+            print("-" * 10)
+
+        doc: dict = {
+            "_id": self.get_doc_id(primary_keys, node.table),
+            "_index": self.index,
+            "_source": row,
+        }
+
+        if self.routing:
+            doc["_routing"] = row[self.routing]
+
+        if (
+            self.search_client.major_version < 7
+            and not self.search_client.is_opensearch
+        ):
+            doc["_type"] = "_doc"
+
+        metrics.TRANSFORM_SECONDS.observe(
+            time.perf_counter() - since, index=self.index
+        )
+
+        if self._plugins:
+            with metrics.PLUGIN_SECONDS.time(index=self.index):
+                with profiler.span("plugins"):
+                    doc = next(self._plugins.transform([doc]))
+            if not doc:
+                return None
+
+        if self.pipeline:
+            doc["pipeline"] = self.pipeline
+
+        if slowdoc.enabled():
+            self._observe_slow_doc(node, doc, meta, primary_keys, since)
+
+        metrics.ROOTS_REBUILT.inc(index=self.index)
+        return doc
+
+    def _observe_slow_doc(
+        self,
+        node: Node,
+        doc: dict,
+        meta: dict,
+        primary_keys: list,
+        since: float,
+    ) -> None:
+        """Record a doc over the SLOW_DOC_MS or SLOW_DOC_BYTES threshold."""
+        ms: float = (time.perf_counter() - since) * 1000
+        nbytes: t.Optional[int] = slowdoc.size(doc["_source"])
+        if not slowdoc.is_slow(ms, nbytes):
+            return
+        root: dict = dict(
+            zip(
+                [primary_key.name for primary_key in node.primary_keys],
+                primary_keys,
+            )
+        )
+        plan: t.Optional[dict] = None
+        if not self.is_mysql_compat and slowdoc.explain_allowed():
+            try:
+                # the fetch of this doc alone
+                plan = self.explain(
+                    self._build_query(
+                        filters={node.table: [root]}
+                    )._subquery.select()
+                )
+            except Exception as e:
+                logger.warning(f"Could not explain doc {doc['_id']}: {e}")
+        slowdoc.record(
+            {
+                "ts": time.time(),
+                "index": self.index,
+                "_id": doc["_id"],
+                "root": root,
+                "ms": ms,
+                "bytes": nbytes,
+                "children": slowdoc.children(meta),
+                "plan": plan,
+            }
+        )
+
     @property
     def checkpoint(self) -> t.Union[str, int]:
         """
@@ -1589,6 +2245,7 @@ class Sync(Base, metaclass=Singleton):
 
         # Update in-memory cache last
         self._checkpoint = value
+        self._checkpoint_at = time.time()
 
     @property
     def txid_current(self) -> int:
@@ -1618,9 +2275,13 @@ class Sync(Base, metaclass=Singleton):
             logger.debug(f"_poll_redis: {payloads}")
             with self.lock:
                 self.count["redis"] += len(payloads)
+            since: float = time.perf_counter()
             self.refresh_views()
             self.on_publish(
-                list(map(lambda payload: Payload(**payload), payloads))
+                [Payload.from_dict(payload) for payload in payloads]
+            )
+            metrics.WORKER_BUSY.inc(
+                time.perf_counter() - since, index=self.index
             )
         time.sleep(settings.REDIS_POLL_INTERVAL)
 
@@ -1636,13 +2297,17 @@ class Sync(Base, metaclass=Singleton):
             self._poll_redis()
 
     async def _async_poll_redis(self) -> None:
-        payloads: list = self.redis.pop()
+        payloads: list = await self.async_redis.pop()
         if payloads:
             logger.debug(f"_async_poll_redis: {payloads}")
             self.count["redis"] += len(payloads)
+            since: float = time.perf_counter()
             await self.async_refresh_views()
             await self.async_on_publish(
-                list(map(lambda payload: Payload(**payload), payloads))
+                [Payload.from_dict(payload) for payload in payloads]
+            )
+            metrics.WORKER_BUSY.inc(
+                time.perf_counter() - since, index=self.index
             )
         await asyncio.sleep(settings.REDIS_POLL_INTERVAL)
 
@@ -1652,6 +2317,51 @@ class Sync(Base, metaclass=Singleton):
         while True:
             await self._async_poll_redis()
 
+    def _listen(self) -> t.Any:
+        """Return a new autocommit DBAPI connection listening for events."""
+        conn = self.engine.connect().connection.driver_connection
+        if PG_DRIVER == "psycopg":
+            conn.autocommit = True
+            conn.execute(f'LISTEN "{self.database}"')
+        else:
+            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            conn.cursor().execute(f'LISTEN "{self.database}"')
+        logger.debug(
+            f'Listening to notifications on channel "{self.database}"'
+        )
+        return conn
+
+    def _notifies(self, conn: t.Any) -> t.Iterator[t.Tuple[str, str]]:
+        """Yield the (channel, payload) already received without blocking."""
+        if PG_DRIVER == "psycopg":
+            conn.pgconn.consume_input()
+            while (notify := conn.pgconn.notifies()) is not None:
+                yield notify.relname.decode(), notify.extra.decode()
+        else:
+            conn.poll()
+            while conn.notifies:
+                notification: t.Any = conn.notifies.pop(0)
+                yield notification.channel, notification.payload
+
+    def _notification(self, channel: str, data: str) -> t.Optional[dict]:
+        """Decode a notification or None if it is not for this index."""
+        if channel != self.database:
+            return None
+        try:
+            payload: dict = json.loads(data)
+        except json.JSONDecodeError as e:
+            logger.exception(
+                f"Error decoding JSON payload: {e}\nPayload: {data}"
+            )
+            return None
+        if (
+            payload.get("indices")
+            and self.index in payload.get("indices", [])
+            and payload.get("schema") in self.tree.schemas
+        ):
+            return payload
+        return None
+
     @threaded
     @exception
     def poll_db(self) -> None:
@@ -1660,18 +2370,21 @@ class Sync(Base, metaclass=Singleton):
 
         Receive a notification message from the channel we are listening on
         """
-        conn = self.engine.connect().connection
-        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-        cursor = conn.cursor()
-        cursor.execute(f'LISTEN "{self.database}"')
-        logger.debug(
-            f'Listening to notifications on channel "{self.database}"'
-        )
+        conn = self._listen()
         payloads: list = []
 
         while True:
+            if PG_DRIVER == "psycopg":
+                # wait for up to POLL_TIMEOUT for a burst of notifications
+                notifies: t.Iterator[t.Tuple[str, str]] = (
+                    (notify.channel, notify.payload)
+                    for notify in conn.notifies(
+                        timeout=settings.POLL_TIMEOUT,
+                        stop_after=settings.REDIS_WRITE_CHUNK_SIZE,
+                    )
+                )
             # NB: consider reducing POLL_TIMEOUT to increase throughput
-            if select.select([conn], [], [], settings.POLL_TIMEOUT) == (
+            elif select.select([conn], [], [], settings.POLL_TIMEOUT) == (
                 [],
                 [],
                 [],
@@ -1681,70 +2394,65 @@ class Sync(Base, metaclass=Singleton):
                     self.redis.push(payloads)
                     payloads = []
                 continue
+            else:
+                notifies = self._notifies(conn)
 
             try:
-                conn.poll()
-            except OperationalError as e:
-                logger.fatal(f"OperationalError: {e}")
-                os._exit(-1)
-
-            while conn.notifies:
-                if len(payloads) >= settings.REDIS_WRITE_CHUNK_SIZE:
-                    self.redis.push(payloads)
-                    payloads = []
-                notification: t.AnyStr = conn.notifies.pop(0)
-                if notification.channel == self.database:
-
-                    try:
-                        payload = json.loads(notification.payload)
-                    except json.JSONDecodeError as e:
-                        logger.exception(
-                            f"Error decoding JSON payload: {e}\n"
-                            f"Payload: {notification.payload}"
-                        )
-                        continue
-                    if (
-                        payload.get("indices")
-                        and self.index in payload.get("indices", [])
-                        and payload.get("schema") in self.tree.schemas
-                    ):
+                for channel, data in notifies:
+                    if len(payloads) >= settings.REDIS_WRITE_CHUNK_SIZE:
+                        self.redis.push(payloads)
+                        payloads = []
+                    payload: t.Optional[dict] = self._notification(
+                        channel, data
+                    )
+                    if payload is not None:
                         payloads.append(payload)
                         logger.debug(f"poll_db: {payload}")
                         with self.lock:
                             self.count["db"] += 1
+                        metrics.NOTIFICATIONS.inc(index=self.index)
+            except OperationalError as e:
+                logger.fatal(f"OperationalError: {e}")
+                os._exit(-1)
+
+            if PG_DRIVER == "psycopg" and payloads:
+                self.redis.push(payloads)
+                payloads = []
 
     @exception
     def async_poll_db(self) -> None:
         """
         Producer which polls Postgres continuously.
 
-        Receive a notification message from the channel we are listening on
+        Receive a notification message from the channel we are listening on.
+        This is an event loop reader callback so it only queues the payloads
+        for async_push_redis to write in batches.
         """
         try:
-            self.conn.poll()
+            for channel, data in self._notifies(self.conn):
+                payload: t.Optional[dict] = self._notification(channel, data)
+                if payload is not None:
+                    self._notifications.put_nowait(payload)
+                    logger.debug(f"async_poll: {payload}")
+                    self.count["db"] += 1
+                    metrics.NOTIFICATIONS.inc(index=self.index)
         except OperationalError as e:
             logger.fatal(f"OperationalError: {e}")
             os._exit(-1)
 
-        while self.conn.notifies:
-            notification: t.AnyStr = self.conn.notifies.pop(0)
-            if notification.channel == self.database:
-                try:
-                    payload = json.loads(notification.payload)
-                except json.JSONDecodeError as e:
-                    logger.exception(
-                        f"Error decoding JSON payload: {e}\n"
-                        f"Payload: {notification.payload}"
-                    )
-                    continue
-                if (
-                    payload.get("indices")
-                    and self.index in payload.get("indices", [])
-                    and payload.get("schema") in self.tree.schemas
-                ):
-                    self.redis.push([payload])
-                    logger.debug(f"async_poll: {payload}")
-                    self.count["db"] += 1
+    @exception
+    async def async_push_redis(self) -> None:
+        """Push queued notifications to Redis/Valkey in batches."""
+        while True:
+            payloads: list = [await self._notifications.get()]
+            # give the reader a chance to queue the rest of the burst
+            await asyncio.sleep(settings.POLL_TIMEOUT)
+            while (
+                not self._notifications.empty()
+                and len(payloads) < settings.REDIS_WRITE_CHUNK_SIZE
+            ):
+                payloads.append(self._notifications.get_nowait())
+            await self.async_redis.push(payloads)
 
     def refresh_views(self) -> None:
         if not self.is_mysql_compat:
@@ -1752,7 +2460,7 @@ class Sync(Base, metaclass=Singleton):
 
     async def async_refresh_views(self) -> None:
         if not self.is_mysql_compat:
-            self._refresh_views()
+            await asyncio.to_thread(self._refresh_views)
 
     def _refresh_views(self) -> None:
         for node in self.tree.traverse_breadth_first():
@@ -1764,7 +2472,25 @@ class Sync(Base, metaclass=Singleton):
         self._on_publish(payloads)
 
     async def async_on_publish(self, payloads: t.List[Payload]) -> None:
-        self._on_publish(payloads)
+        """
+        Async counterpart of _on_publish.
+
+        Each batch is streamed to the async bulk helper so other consumers
+        and indices on the same event loop progress while it is in flight.
+        """
+        xmins: t.List[int] = self._begin_publish(payloads)
+        defer: bool = self._dirty_roots is not None
+        # resolving the root docs is blocking so it runs in a worker thread
+        resolved: t.List[t.Tuple[Node, dict]] = await asyncio.to_thread(
+            self._resolve_batches, self._batches(payloads)
+        )
+        for node, filters in resolved:
+            await self.search_client.async_bulk(
+                self.index, self._async_resolved(node, filters, defer=defer)
+            )
+        if not defer:
+            self._observe_lag(payloads)
+        await asyncio.to_thread(self._end_publish, xmins)
 
     def _on_publish(self, payloads: t.List[Payload]) -> None:
         """
@@ -1774,14 +2500,38 @@ class Sync(Base, metaclass=Singleton):
         It is called when an event is received from Redis/Valkey.
         Deserialize the payload from Redis/Valkey and sync to Elasticsearch/OpenSearch
         """
+        xmins: t.List[int] = self._begin_publish(payloads)
+        defer: bool = self._dirty_roots is not None
+        for node, filters in self._resolve_batches(self._batches(payloads)):
+            self.search_client.bulk(
+                self.index, self._resolved(node, filters, defer=defer)
+            )
+        if not defer:
+            self._observe_lag(payloads)
+        self._end_publish(xmins)
+
+    def _begin_publish(self, payloads: t.List[Payload]) -> t.List[int]:
+        """Map views to their base tables and return the payload xmins."""
         # this is used for the views.
         # we substitute the views for the base table here
-        for i, payload in enumerate(payloads):
-            for node in self.tree.traverse_breadth_first():
-                if payload.table in node.base_tables:
-                    payloads[i].table = node.table
+        for payload in payloads:
+            table: t.Optional[str] = self._base_tables.get(payload.table)
+            if table is not None:
+                payload.table = table
 
         logger.debug(f"on_publish len {len(payloads)}")
+        # for truncate, tg_op txids is None so skip setting the checkpoint
+        xmins: t.List[int] = [
+            payload.xmin for payload in payloads if payload.xmin is not None
+        ]
+        if self._dirty_roots is not None and xmins:
+            self._dirty_roots.hold(min(xmins))
+        return xmins
+
+    def _batches(
+        self, payloads: t.List[Payload]
+    ) -> t.Iterator[t.List[Payload]]:
+        """Split payloads into batches of the same tg_op and table."""
         # Safe inserts are insert operations that can be performed in any order
         # Optimize the safe INSERTS
         # TODO repeat this for the other place too
@@ -1792,35 +2542,69 @@ class Sync(Base, metaclass=Singleton):
             for payload in payloads:
                 _payloads[payload.table].append(payload)
 
-            for _payload in _payloads.values():
-                self.search_client.bulk(self.index, self._payloads(_payload))
+            yield from _payloads.values()
 
         else:
-            _payloads: t.List[Payload] = []
-            for i, payload in enumerate(payloads):
-                _payloads.append(payload)
-                j: int = i + 1
-                if j < len(payloads):
-                    payload2 = payloads[j]
-                    if (
-                        payload.tg_op != payload2.tg_op
-                        or payload.table != payload2.table
-                    ):
-                        self.search_client.bulk(
-                            self.index,
-                            self._payloads(_payloads),
-                        )
-                        _payloads = []
-                elif j == len(payloads):
-                    self.search_client.bulk(
-                        self.index, self._payloads(_payloads)
-                    )
-                    _payloads: list = []
+            for _, batch in groupby(
+                payloads, key=lambda x: (x.tg_op, x.table)
+            ):
+                yield list(batch)
 
-        txids: t.Set = set(map(lambda x: x.xmin, payloads))
-        # for truncate, tg_op txids is None so skip setting the checkpoint
-        if txids != set([None]):
-            self.checkpoint: int = min(min(txids), self.txid_current) - 1
+    def _observe_lag(self, payloads: t.List[Payload]) -> None:
+        """
+        Observe the replication lag of payloads whose docs were indexed.
+
+        This is the time from the change (stamped by the trigger) to the
+        bulk acknowledgement. The docs are searchable at most the refresh
+        interval of the index later.
+        """
+        if not metrics.enabled():
+            return
+        now: float = time.time()
+        for payload in payloads:
+            if payload.ts is not None:
+                metrics.REPLICATION_LAG.observe(
+                    max(now - float(payload.ts), 0),
+                    index=self.index,
+                    table=payload.table,
+                )
+
+    def _end_publish(self, xmins: t.List[int]) -> None:
+        if xmins:
+            if self._dirty_roots is not None:
+                # the dirty root builder sets the checkpoint once rebuilt
+                self._dirty_roots.release(min(xmins))
+            else:
+                self.checkpoint: int = min(min(xmins), self.txid_current) - 1
+
+    @threaded
+    @exception
+    def build_dirty_roots(self) -> None:
+        """Rebuild the dirty root docs once per debounce window."""
+        with ThreadPoolExecutor(
+            max_workers=settings.DIRTY_ROOT_WORKERS
+        ) as executor:
+            while True:
+                time.sleep(settings.DIRTY_ROOT_DEBOUNCE)
+                self._build_dirty_roots(executor)
+
+    def _build_dirty_roots(self, executor: ThreadPoolExecutor) -> None:
+        roots, xmins = self._dirty_roots.drain()
+        if roots:
+            logger.debug(f"Rebuilding {len(roots)} dirty root docs")
+            # consume the results to surface any exception
+            list(
+                executor.map(
+                    lambda filters: self.search_client.bulk(
+                        self.index,
+                        self.sync(filters={self.tree.root.table: filters}),
+                    ),
+                    chunks(roots, settings.DIRTY_ROOT_BATCH_SIZE),
+                )
+            )
+        xmin: t.Optional[int] = self._dirty_roots.done(xmins)
+        if xmin is not None:
+            self.checkpoint: int = min(xmin, self.txid_current) - 1
 
     def pull(self, polling: bool = False) -> None:
         """Pull data from db."""
@@ -1843,36 +2627,207 @@ class Sync(Base, metaclass=Singleton):
             txmax = self.txid_current
             logger.debug(f"pull txmin: {txmin} - txmax: {txmax}")
 
-        # forward pass sync
-        self.search_client.bulk(
-            self.index, self.sync(txmin=txmin, txmax=txmax)
+        # a full sync (or one with several workers) is split into ranges
+        # of the root table which are checkpointed as they are done
+        ranged: bool = not self.is_mysql_compat and (
+            txmin is None or self.sync_workers > 1
         )
 
-        if self.is_mysql_compat:
-            self.binlog_changes(
-                start_log=start_log,
-                start_pos=start_pos,
-                binlog_chunk_size=chunk_size,
+        # restore the index settings left by an interrupted bulk load
+        # unless this is resuming it
+        if txmin is not None:
+            self.restore_index_settings()
+
+        # a full sync and the WAL replay following it are bulk loaded
+        with self.bulk_load(enabled=txmin is None and not polling):
+            # forward pass sync
+            if ranged:
+                self.parallel_sync(txmin=txmin, txmax=txmax)
+            else:
+                self.search_client.bulk(
+                    self.index, self.sync(txmin=txmin, txmax=txmax)
+                )
+
+            if self.is_mysql_compat:
+                self.binlog_changes(
+                    start_log=start_log,
+                    start_pos=start_pos,
+                    binlog_chunk_size=chunk_size,
+                )
+            else:
+                # this is the max lsn we should go upto
+                upto_lsn: str = self.current_wal_lsn
+                try:
+                    # now sync up to txmax to capture everything we may
+                    # have missed
+                    self.logical_slot_changes(
+                        txmin=txmin,
+                        txmax=txmax,
+                        logical_slot_chunk_size=chunk_size,
+                        upto_lsn=upto_lsn,
+                    )
+                except Exception:
+                    # if we are polling, we can just continue
+                    if polling:
+                        return
+                    else:
+                        raise
+
+        # the slot changes are checkpointed so the ranges are done with
+        if ranged:
+            self.range_checkpoint.clear()
+
+        self._truncate = True
+
+    @property
+    def settings_file(self) -> str:
+        return f"{self.checkpoint_file}.settings"
+
+    def _saved_index_settings(self) -> t.Optional[dict]:
+        """Get the index settings saved before a bulk load if any."""
+        if settings.REDIS_CHECKPOINT:
+            return self.redis.get_state("settings")
+        path: Path = Path(self.settings_file)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _save_index_settings(self, value: t.Optional[dict]) -> None:
+        if settings.REDIS_CHECKPOINT:
+            self.redis.set_state("settings", value)
+        elif value is not None:
+            atomic_write(self.settings_file, json.dumps(value))
+        elif os.path.exists(self.settings_file):
+            os.remove(self.settings_file)
+
+    @contextmanager
+    def bulk_load(self, enabled: bool = True) -> t.Iterator[None]:
+        """
+        Apply the bulk load index settings for the duration of the context.
+
+        i.e no refresh, no replicas and async translog durability.
+        The settings they replace are saved first so that they are restored
+        by the next run if this one does not get to restore them.
+        """
+        if (
+            not enabled
+            or self._bulk_loading
+            or not settings.BULK_LOAD_SETTINGS
+        ):
+            yield
+            return
+
+        # keep the settings saved by an interrupted bulk load
+        if self._saved_index_settings() is None:
+            # by concrete index as the index can be an alias
+            self._save_index_settings(
+                {
+                    name: {
+                        key: current.get(key)
+                        for key in BULK_LOAD_INDEX_SETTINGS
+                    }
+                    for name, current in self.search_client.get_settings(
+                        self.index
+                    ).items()
+                }
             )
-        else:
-            # this is the max lsn we should go upto
-            upto_lsn: str = self.current_wal_lsn
+        logger.info(f"Applying bulk load settings to index {self.index}")
+        self.search_client.put_settings(self.index, BULK_LOAD_INDEX_SETTINGS)
+        self._bulk_loading = True
+        try:
+            yield
+        finally:
+            self._bulk_loading = False
+            self.restore_index_settings()
+
+    def restore_index_settings(self) -> None:
+        """Restore the index settings saved before a bulk load."""
+        saved: t.Optional[dict] = self._saved_index_settings()
+        if saved is None:
+            return
+        for name, setting in saved.items():
+            logger.info(f"Restoring settings of index {name}: {setting}")
+            self.search_client.put_settings(name, setting)
+        self.search_client.refresh([self.index])
+        self.search_client.wait_for_status(
+            self.index, settings.BULK_LOAD_WAIT_FOR_STATUS
+        )
+        self._save_index_settings(None)
+
+    def partitions(self, count: int) -> t.List[Partition]:
+        """
+        Split the root table into about count ranges.
+
+        PG14+ splits the heap pages of the table into TID ranges. Otherwise
+        a single column primary key is split at its quantiles. A root table
+        that can be split neither way is a single unbounded range.
+        """
+        node: Node = self.tree.root
+        if count > 1:
+            if self.server_version_num >= 140000:
+                pages: int = self.relation_pages(node.schema, node.table)
+                if pages > 1:
+                    return tid_partitions(pages, count)
+            if len(node.primary_keys) == 1:
+                column: sa.Column = node.primary_keys[0]
+                bounds: list = self.quantiles(column, count)
+                # the bounds are saved as JSON with the sync progress
+                if bounds and all(
+                    isinstance(bound, (int, str)) for bound in bounds
+                ):
+                    return key_partitions(column.name, bounds)
+        return [Partition(CTID)]
+
+    def parallel_sync(
+        self,
+        txmin: t.Optional[int] = None,
+        txmax: t.Optional[int] = None,
+    ) -> None:
+        """
+        Sync ranges of the root table concurrently.
+
+        All workers import the snapshot exported by this connection so the
+        ranges are read at the same point in time as a single query would.
+        Each finished range is checkpointed so that an interrupted sync
+        resumes with the ranges that are left.
+        """
+        progress: RangeCheckpoint = self.range_checkpoint
+        if not progress.load(txmin):
+            progress.start(txmin, self.partitions(settings.SYNC_PARTITIONS))
+        pending: t.List[int] = progress.pending
+        logger.info(
+            f"Syncing {len(pending)} of {len(progress.partitions)} ranges "
+            f"with {self.sync_workers} workers"
+        )
+
+        def sync_range(i: int, snapshot: str) -> None:
+            self._thread_local.snapshot = snapshot
             try:
-                # now sync up to txmax to capture everything we may have missed
-                self.logical_slot_changes(
-                    txmin=txmin,
-                    txmax=txmax,
-                    logical_slot_chunk_size=chunk_size,
-                    upto_lsn=upto_lsn,
+                self.search_client.bulk(
+                    self.index,
+                    self.sync(
+                        txmin=txmin,
+                        txmax=txmax,
+                        partition=progress.partitions[i],
+                    ),
                 )
-            except Exception:
-                # if we are polling, we can just continue
-                if polling:
-                    return
-                else:
-                    raise
+            finally:
+                self._thread_local.snapshot = None
+            progress.mark(i)
+            logger.debug(f"Synced range {progress.partitions[i]}")
 
-        self._truncate = True
+        if not pending:
+            return
+
+        with self.export_snapshot() as snapshot:
+            with ThreadPoolExecutor(max_workers=self.sync_workers) as executor:
+                # consume the results to surface any exception
+                list(
+                    executor.map(
+                        lambda i: sync_range(i, snapshot),
+                        pending,
+                    )
+                )
 
     @threaded
     @exception
@@ -1885,13 +2840,17 @@ class Sync(Base, metaclass=Singleton):
     @exception
     async def async_truncate_slots(self) -> None:
         while True:
-            self._truncate_slots()
+            await asyncio.to_thread(self._truncate_slots)
             await asyncio.sleep(settings.REPLICATION_SLOT_CLEANUP_INTERVAL)
 
     def _truncate_slots(self) -> None:
         if self._truncate:
             logger.debug(f"Truncating replication slot: {self.__name}")
-            self.logical_slot_get_changes(self.__name, upto_nchanges=None)
+            self.logical_slot_get_changes(
+                self.__name,
+                upto_nchanges=None,
+                options=self.logical_slot_options,
+            )
 
     @threaded
     @exception
@@ -1904,10 +2863,30 @@ class Sync(Base, metaclass=Singleton):
     @exception
     async def async_status(self) -> None:
         while True:
-            self._status(label="Async")
+            await asyncio.to_thread(self._status, "Async")
             await asyncio.sleep(settings.LOG_INTERVAL)
 
     def _status(self, label: str) -> None:
+        qsize: int = self.redis.qsize
+        if qsize == 0:
+            # an idle checkpoint is not lagging
+            self._checkpoint_at = time.time()
+        metrics.QUEUE_DEPTH.set(qsize, index=self.index)
+        metrics.CHECKPOINT_AGE.set(
+            time.time() - self._checkpoint_at, index=self.index
+        )
+        if (
+            metrics.enabled()
+            and time.monotonic() - self._gauges_at
+            >= settings.METRICS_REFRESH_INTERVAL
+        ):
+            self._gauges_at = time.monotonic()
+            self._set_remote_gauges()
+        if settings.REDIS_STATS:
+            try:
+                self._publish_stats(qsize)
+            except Exception as e:
+                logger.warning(f"Could not publish the stats: {e}")
         # TODO: indicate if we are processing logical logs or not
         if self.producer and not self.consumer:
             label = f"{label} (Producer)"
@@ -1917,12 +2896,61 @@ class Sync(Base, metaclass=Singleton):
             f"{label} {self.database}:{self.index} "
             f"Xlog: [{format_number(self.count['xlog'])}] => "
             f"Db: [{format_number(self.count['db'])}] => "
-            f"Redis: [{format_number(self.redis.qsize)}] => "
+            f"Redis: [{format_number(qsize)}] => "
             f"{self.search_client.name}: [{format_number(self.search_client.doc_count)}]"
             f"...\n"
         )
         sys.stdout.flush()
 
+    def _set_remote_gauges(self) -> None:
+        """
+        Set the gauges read from the search cluster and the database.
+
+        An error is logged rather than raised so that it does not stop the
+        status loop.
+        """
+        try:
+            # re-read as a full sync disables the refresh while bulk loading
+            interval: t.Optional[float] = self.search_client.refresh_interval(
+                self.index
+            )
+            if interval is not None:
+                metrics.REFRESH_INTERVAL.set(interval, index=self.index)
+        except Exception as e:
+            logger.warning(f"Could not read the refresh interval: {e}")
+        if not self.is_mysql_compat:
+            try:
+                retained: t.Optional[int] = self.retained_wal(self.__name)
+                if retained is not None:
+                    metrics.SLOT_RETAINED_WAL.set(
+                        retained, index=self.index, slot=self.__name
+                    )
+            except Exception as e:
+                logger.warning(f"Could not read the retained WAL: {e}")
+
+    def _publish_stats(self, qsize: int) -> None:
+        """Publish the totals of this process for pgsync top."""
+        host: str = socket.gethostname()
+        pid: int = os.getpid()
+        self.redis.set_stats(
+            f"{host}:{pid}",
+            {
+                "index": self.index,
+                "database": self.database,
+                "host": host,
+                "pid": pid,
+                "producer": self.producer,
+                "consumer": self.consumer,
+                "workers": self.num_workers if self.consumer else 0,
+                "ts": time.time(),
+                "queue": qsize,
+                "docs": self.search_client.doc_count,
+                "count": self.count,
+                "metrics": metrics.totals(self.index),
+            },
+            settings.REDIS_STATS_TTL,
+        )
+
     def receive(self) -> None:
         """
         Receive events from db.
@@ -1934,17 +2962,26 @@ class Sync(Base, metaclass=Singleton):
         3. Consume all changes from Redis/Valkey.
         """
         if settings.USE_ASYNC:
-            self._conn = self.engine.connect().connection
-            self._conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-            cursor = self.conn.cursor()
-            cursor.execute(f'LISTEN "{self.database}"')
+            self._conn = self._listen()
             event_loop = asyncio.get_event_loop()
-            event_loop.add_reader(self.conn, self.async_poll_db)
             self.tasks: t.List[asyncio.Task] = [
-                event_loop.create_task(self.async_poll_redis()),
                 event_loop.create_task(self.async_truncate_slots()),
                 event_loop.create_task(self.async_status()),
             ]
+            if self.producer:
+                self._notifications = asyncio.Queue()
+                event_loop.add_reader(self.conn, self.async_poll_db)
+                self.tasks.append(
+                    event_loop.create_task(self.async_push_redis())
+                )
+            # each consumer is a coroutine rather than a thread
+            if self.consumer:
+                for _ in range(self.num_workers):
+                    self.tasks.append(
+                        event_loop.create_task(self.async_poll_redis())
+                    )
+            if self._dirty_roots is not None:
+                self.build_dirty_roots()
 
         else:
             # sync up to and produce items in the Redis/Valkey cache
@@ -1958,6 +2995,8 @@ class Sync(Base, metaclass=Singleton):
             if self.consumer:
                 for _ in range(self.num_workers):
                     self.poll_redis()
+                if self._dirty_roots is not None:
+                    self.build_dirty_roots()
 
             # start a background worker thread to cleanup the replication slot
             self.truncate_slots()
@@ -2078,6 +3117,12 @@ class Sync(Base, metaclass=Singleton):
     type=int,
     default=settings.NUM_WORKERS,
 )
+@click.option(
+    "--sync_workers",
+    help="Number of workers syncing ranges of the root table in a full sync",
+    type=int,
+    default=settings.SYNC_WORKERS,
+)
 @click.option(
     "--bootstrap",
     "-b",
@@ -2085,6 +3130,12 @@ class Sync(Base, metaclass=Singleton):
     default=False,
     help="Bootstrap the database",
 )
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Trace the sync stages and sample a flamegraph into PROFILE_PATH",
+)
 def main(
     config: str,
     schema_url: str,
@@ -2100,10 +3151,12 @@ def main(
     version: bool,
     analyze: bool,
     num_workers: int,
+    sync_workers: int,
     polling: bool,
     producer: bool,
     consumer: bool,
     bootstrap: bool,
+    profile: bool,
 ) -> None:
     """Main application syncer."""
     if version:
@@ -2142,6 +3195,11 @@ def main(
         config=config, schema_url=schema_url, s3_schema_url=s3_schema_url
     )
 
+    metrics.start_server()
+
+    if profile:
+        profiler.start()
+
     # MySQL and MariaDB are only supported in polling mode
     if daemon and IS_MYSQL_COMPAT:
         polling = True
@@ -2189,6 +3247,7 @@ def main(
                     doc,
                     verbose=verbose,
                     num_workers=num_workers,
+                    sync_workers=sync_workers,
                     producer=producer,
                     consumer=consumer,
                     bootstrap=bootstrap,
@@ -0,0 +1,304 @@
+"""
+PGSync Top.
+
+A live view of every pgsync process publishing its stats with REDIS_STATS.
+Each process sets the totals of its metrics under
+queue:<name>:stats:<host>:<pid> every LOG_INTERVAL (expiring after
+REDIS_STATS_TTL) and pgsync top turns the change between two of them into a
+row per index and stage:
+
+    producer    notifications/s received by the producers
+    queue       growth/s of the Redis/Valkey queue and its depth
+    resolve     events/s resolved to root docs and the ms per batch
+    fetch       queries/s fetching the rows of the docs and the ms per query
+    transform   docs/s transformed and the ms per doc
+    plugins     docs/s through the plugins and the ms per doc
+    bulk        docs/s indexed and the ms per bulk request
+    lag         ms from a change to the bulk acknowledgement of its docs
+    workers     the consumer workers
+
+BUSY is the share of the time of the consumer workers spent in a stage and
+the busiest stage is marked as the bottleneck. The stages of SYNC_PIPELINE
+overlap so they can add up to more than 100%.
+
+    pgsync top
+    pgsync top --interval 5 --index cmm-search-artifact
+"""
+
+import json
+import time
+import typing as t
+
+import click
+
+from . import metrics, redisqueue, settings
+from .urls import get_redis_url
+
+# the stages timed in the consumer workers and the histogram of each
+TIMED: t.Dict[str, str] = {
+    "resolve": metrics.RESOLVE_SECONDS.name,
+    "fetch": metrics.FETCH_SECONDS.name,
+    "transform": metrics.TRANSFORM_SECONDS.name,
+    "plugins": metrics.PLUGIN_SECONDS.name,
+    "bulk": metrics.BULK_SECONDS.name,
+}
+
+
+def read(db: t.Any, namespace: str = "queue") -> t.Dict[bytes, dict]:
+    """The stats published by every process by key."""
+    keys: t.List[bytes] = sorted(
+        db.scan_iter(match=f"{namespace}:*:stats:*", count=1000)
+    )
+    if not keys:
+        return {}
+    return {
+        key: json.loads(value)
+        for key, value in zip(keys, db.mget(keys))
+        if value is not None
+    }
+
+
+def _value(stats: t.Optional[dict], name: str) -> t.Any:
+    if stats is None:
+        return 0
+    if name in ("docs", "queue"):
+        return stats[name]
+    return stats["metrics"].get(name, 0)
+
+
+class Stage(object):
+    """The rates of a stage of an index over the processes."""
+
+    def __init__(self, pairs: t.List[t.Tuple[dict, dict]], worker_secs: float):
+        # the (previous, latest) stats of each process with both
+        self.pairs: t.List[t.Tuple[dict, dict]] = pairs
+        self.worker_secs: float = worker_secs
+
+    def rate(self, name: str) -> t.Optional[float]:
+        """The sum of the rate of a counter over the processes."""
+        if not self.pairs:
+            return None
+        # a counter going down is a restarted process
+        return sum(
+            max(_value(latest, name) - _value(previous, name), 0)
+            / (latest["ts"] - previous["ts"])
+            for previous, latest in self.pairs
+        )
+
+    def histogram(self, name: str) -> t.Tuple[float, int, float]:
+        """The change of the sum and count of a histogram and its rate."""
+        total: float = 0
+        count: int = 0
+        rate: float = 0
+        for previous, latest in self.pairs:
+            before: t.List[float] = _value(previous, name) or [0, 0]
+            after: t.List[float] = _value(latest, name) or [0, 0]
+            if after[1] >= before[1]:
+                total += after[0] - before[0]
+                count += after[1] - before[1]
+                rate += (after[1] - before[1]) / (
+                    latest["ts"] - previous["ts"]
+                )
+        return total, count, rate
+
+    def busy(self, secs: float) -> t.Optional[float]:
+        """The share of the time of the consumer workers of secs."""
+        if not self.worker_secs:
+            return None
+        return secs / self.worker_secs
+
+
+def rows(history: t.Dict[bytes, t.List[dict]], index: str) -> t.List[dict]:
+    """The row of every stage of an index."""
+    processes: t.List[t.List[dict]] = [
+        snapshots
+        for snapshots in history.values()
+        if snapshots[-1]["index"] == index
+    ]
+    latest: t.List[dict] = [snapshots[-1] for snapshots in processes]
+    pairs: t.List[t.Tuple[dict, dict]] = [
+        (snapshots[0], snapshots[-1])
+        for snapshots in processes
+        if len(snapshots) == 2
+    ]
+    stage: Stage = Stage(
+        pairs,
+        sum(
+            (after["ts"] - before["ts"]) * after["workers"]
+            for before, after in pairs
+        ),
+    )
+    consumers: int = sum(1 for stats in latest if stats["consumer"])
+    newest: dict = max(latest, key=lambda stats: stats["ts"])
+    newest_pair: t.List[t.Tuple[dict, dict]] = [
+        pair for pair in pairs if pair[1] is newest
+    ]
+
+    values: t.List[dict] = [
+        {
+            "stage": "producer",
+            "procs": sum(1 for stats in latest if stats["producer"]),
+            "rate": stage.rate(metrics.NOTIFICATIONS.name),
+        },
+        {
+            "stage": "queue",
+            "procs": len(latest),
+            "rate": (
+                (newest_pair[0][1]["queue"] - newest_pair[0][0]["queue"])
+                / (newest_pair[0][1]["ts"] - newest_pair[0][0]["ts"])
+                if newest_pair
+                else None
+            ),
+            "note": f"depth {newest['queue']:,}",
+        },
+    ]
+    for name, histogram in TIMED.items():
+        secs, count, rate = stage.histogram(histogram)
+        row: dict = {
+            "stage": name,
+            "procs": consumers,
+            "rate": rate if pairs else None,
+            "ms": secs / count * 1000 if count else None,
+            "busy": stage.busy(secs),
+        }
+        if name == "resolve":
+            row["rate"] = stage.rate(metrics.EVENTS_RESOLVED.name)
+        elif name == "bulk":
+            row["rate"] = stage.rate("docs")
+            rejected: t.Optional[float] = stage.rate(
+                metrics.BULK_REJECTED.name
+            )
+            if rejected:
+                row["note"] = f"{rejected:.1f} rejected/s"
+        values.append(row)
+
+    secs, count, _ = stage.histogram(metrics.REPLICATION_LAG.name)
+    age: float = max(
+        _value(stats, metrics.CHECKPOINT_AGE.name) for stats in latest
+    )
+    values.append(
+        {
+            "stage": "lag",
+            "procs": consumers,
+            "ms": secs / count * 1000 if count else None,
+            "note": f"checkpoint age {age:.0f}s",
+        }
+    )
+    values.append(
+        {
+            "stage": "workers",
+            "procs": consumers,
+            "busy": stage.busy(
+                sum(
+                    _value(after, metrics.WORKER_BUSY.name)
+                    - _value(before, metrics.WORKER_BUSY.name)
+                    for before, after in pairs
+                )
+            ),
+            "note": f"{sum(stats['workers'] for stats in latest)} workers",
+        }
+    )
+
+    busiest: t.List[dict] = [
+        row for row in values if row["stage"] in TIMED and row.get("busy")
+    ]
+    if busiest:
+        row = max(busiest, key=lambda row: row["busy"])
+        row["note"] = " ".join(
+            filter(None, [row.get("note"), "<- bottleneck"])
+        )
+    return values
+
+
+def _format(value: t.Optional[float], spec: str, width: int) -> str:
+    return f"{'-' if value is None else format(value, spec):>{width}}"
+
+
+def render(history: t.Dict[bytes, t.List[dict]]) -> str:
+    """The table of every index."""
+    lines: t.List[str] = [
+        f"pgsync top - {time.strftime('%H:%M:%S')} - "
+        f"{len(history)} processes"
+    ]
+    indices: t.Dict[str, str] = {
+        snapshots[-1]["index"]: snapshots[-1]["database"]
+        for snapshots in history.values()
+    }
+    for index in sorted(indices):
+        lines.append("")
+        lines.append(f"{indices[index]}:{index}")
+        lines.append(
+            f"  {'STAGE':<10}{'PROCS':>6}{'RATE/s':>11}{'AVG ms':>10}"
+            f"{'BUSY %':>8}  NOTE"
+        )
+        for row in rows(history, index):
+            busy: t.Optional[float] = row.get("busy")
+            lines.append(
+                f"  {row['stage']:<10}{row['procs']:>6}"
+                f"{_format(row.get('rate'), ',.1f', 11)}"
+                f"{_format(row.get('ms'), ',.1f', 10)}"
+                f"{_format(None if busy is None else busy * 100, '.0f', 8)}"
+                f"  {row.get('note', '')}".rstrip()
+            )
+    if not indices:
+        lines.append("")
+        lines.append("No stats published (is REDIS_STATS set?)")
+    return "\n".join(lines)
+
+
+def update(
+    history: t.Dict[bytes, t.List[dict]], stats: t.Dict[bytes, dict]
+) -> None:
+    """Keep the previous and latest distinct stats of every process."""
+    for key in set(history) - set(stats):
+        del history[key]
+    for key, value in stats.items():
+        snapshots: t.List[dict] = history.setdefault(key, [])
+        if not snapshots or value["ts"] > snapshots[-1]["ts"]:
+            history[key] = (snapshots + [value])[-2:]
+
+
+@click.command()
+@click.option(
+    "--interval",
+    "-n",
+    default=2.0,
+    help="Secs between refreshes.",
+    type=float,
+)
+@click.option("--index", "-i", help="Only show this index.")
+@click.option(
+    "--once",
+    is_flag=True,
+    default=False,
+    help="Print a single refresh and exit.",
+)
+def main(interval: float, index: t.Optional[str], once: bool) -> None:
+    """Live throughput of the pgsync processes by index and stage."""
+    db: t.Any = redisqueue.Redis.from_url(
+        get_redis_url(), socket_timeout=settings.REDIS_SOCKET_TIMEOUT
+    )
+    history: t.Dict[bytes, t.List[dict]] = {}
+    refreshes: int = 0
+    try:
+        while True:
+            update(
+                history,
+                {
+                    key: stats
+                    for key, stats in read(db).items()
+                    if index is None or stats["index"] == index
+                },
+            )
+            refreshes += 1
+            if once:
+                # the rates need a second read
+                if refreshes == 2:
+                    click.echo(render(history))
+                    return
+            else:
+                click.clear()
+                click.echo(render(history))
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
@@ -91,7 +91,9 @@ BEGIN
         'indices', _indices,
         'tg_op', TG_OP,
         'table', TG_TABLE_NAME,
-        'schema', TG_TABLE_SCHEMA
+        'schema', TG_TABLE_SCHEMA,
+        -- the time of the change (epoch secs) for the replication lag
+        'ts', EXTRACT(EPOCH FROM CLOCK_TIMESTAMP())
     );
 
     -- Notify/Listen updates occur asynchronously,
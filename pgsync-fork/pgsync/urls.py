@@ -31,6 +31,7 @@ from .settings import (
 logger = logging.getLogger(__name__)
 
 DIALECT = {
+    "psycopg": "postgresql",
     "psycopg2": "postgresql",
     "pymysql": "mysql",
 }
@@ -145,7 +146,8 @@ def get_database_url(
     protocol: str = DIALECT.get(PG_DRIVER)
     if not protocol:
         raise ValueError(
-            f"Unsupported PG_DRIVER={PG_DRIVER!r}; expected 'psycopg2' or 'pymysql'."
+            f"Unsupported PG_DRIVER={PG_DRIVER!r}; "
+            f"expected 'psycopg2', 'psycopg' or 'pymysql'."
         )
 
     charset_qs: str = (
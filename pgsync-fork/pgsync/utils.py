@@ -4,6 +4,7 @@ import json
 import logging
 import os
 import re
+import resource
 import sys
 import tempfile
 import threading
@@ -40,6 +41,16 @@ def chunks(sequence: t.Sequence, size: int) -> t.Iterable[t.Sequence]:
         yield sequence[i : i + size]
 
 
+def atomic_write(path: str, data: str) -> None:
+    """Replace the content of a file atomically."""
+    tmp: str = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fp:
+        fp.write(data)
+        fp.flush()
+        os.fsync(fp.fileno())
+    os.replace(tmp, path)
+
+
 def timeit(func: t.Callable):
     def timed(*args, **kwargs):
         since: float = time()
@@ -100,6 +111,13 @@ def exception(func: t.Callable):
     return wrapper
 
 
+def peak_rss() -> int:
+    """Return the peak resident set size of this process in bytes."""
+    usage: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
 def format_number(n: int) -> str:
     """
     Format a number with commas if the setting is enabled."""
@@ -52,7 +52,12 @@ CLASSIFIERS = [
     "License :: OSI Approved :: MIT License",
     "Operating System :: OS Independent",
 ]
-SCRIPTS = ["bin/bootstrap", "bin/parallel_sync", "bin/pgsync"]
+SCRIPTS = [
+    "bin/bootstrap",
+    "bin/parallel_sync",
+    "bin/pgsync",
+    "bin/reindex",
+]
 SETUP_REQUIRES = ["pytest-runner"]
 TESTS_REQUIRE = ["pytest"]
 